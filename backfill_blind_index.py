@@ -0,0 +1,100 @@
+# /Backend/backfill_blind_index.py
+# 기존 승객 데이터의 검색용 blind index(phone_bidx, birth_bidx)와
+# CSV 동기화용 지문(row_key, row_fingerprint)을 채웁니다.
+# 값이 비어 있는 행만 배치 단위로 복호화하여 계산합니다.
+#
+# 실행: python backfill_blind_index.py --batch-size 500 [--all] [--dry-run]
+
+import argparse
+import asyncio
+from datetime import date
+from sqlalchemy import select, update, bindparam, or_
+from db import SessionLocal, engine
+from models.tables import Passenger
+from services.passenger_service import decrypt_passengers
+from services.ingestion_service import row_hashes
+
+passenger_table = Passenger.__table__
+
+update_stmt = (
+    update(passenger_table)
+    .where(passenger_table.c.passenger_id == bindparam("b_passenger_id"))
+    .values(
+        row_key=bindparam("b_row_key"),
+        row_fingerprint=bindparam("b_row_fingerprint"),
+        phone_bidx=bindparam("b_phone_bidx"),
+        birth_bidx=bindparam("b_birth_bidx"),
+    )
+)
+
+
+def normalize_birth(value) -> str:
+    """이전 적재 방식으로 저장된 생년월일도 YYYY-MM-DD로 맞춥니다."""
+    text = str(value or "").strip()
+    try:
+        return date.fromisoformat(text[:10]).isoformat()
+    except ValueError:
+        return text
+
+
+async def backfill(batch_size: int, refresh_all: bool, dry_run: bool):
+    last_id = 0
+    scanned = updated = failed = 0
+
+    async with SessionLocal() as db:
+        while True:
+            query = select(Passenger).where(Passenger.passenger_id > last_id)
+            if not refresh_all:
+                query = query.where(or_(Passenger.phone_bidx.is_(None), Passenger.row_fingerprint.is_(None)))
+            result = await db.execute(query.order_by(Passenger.passenger_id).limit(batch_size))
+            passengers = result.scalars().all()
+            if not passengers:
+                break
+            last_id = passengers[-1].passenger_id
+            scanned += len(passengers)
+
+            decrypted_rows = await decrypt_passengers(db, passengers)
+            params = []
+            for p, decrypted_data in zip(passengers, decrypted_rows):
+                if not decrypted_data:
+                    failed += 1
+                    continue
+                hashes = row_hashes(
+                    (p.passenger_name or "").strip(),
+                    p.gender,
+                    (p.job or "").strip() or None,
+                    normalize_birth(decrypted_data.get('생년월일')),
+                    str(decrypted_data.get('전화번호') or "").strip(),
+                    decrypted_data.get('지병여부'),
+                )
+                params.append({"b_passenger_id": p.passenger_id, **{f"b_{k}": v for k, v in hashes.items()}})
+
+            if params and not dry_run:
+                await db.execute(update_stmt, params)
+                await db.commit()
+            # 다음 배치 조회 시 ORM 객체가 쌓이지 않도록 정리
+            db.expunge_all()
+            updated += len(params)
+            print(f"[정보] ~{last_id}: {scanned}건 확인, {updated}건 갱신")
+
+    print(f"[완료] 확인 {scanned}건, 갱신 {updated}건, 복호화 실패 {failed}건{' (dry-run)' if dry_run else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="승객 blind index / 동기화 지문 백필")
+    parser.add_argument("--batch-size", type=int, default=500, help="한 번에 처리할 행 수")
+    parser.add_argument("--all", action="store_true", help="이미 값이 있는 행도 다시 계산")
+    parser.add_argument("--dry-run", action="store_true", help="DB를 수정하지 않고 계산만 수행")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await backfill(args.batch_size, args.all, args.dry_run)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
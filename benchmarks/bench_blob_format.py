@@ -0,0 +1,67 @@
+# /benchmarks/bench_blob_format.py
+# 레거시 JSON/base64 포맷과 v1 바이너리 포맷의 저장 크기 및 디코딩 시간 비교
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_blob_format --rows 2000
+
+import argparse
+import base64
+import json
+import time
+from services.encryption_utils import (
+    encrypt_sensitive_data,
+    decrypt_sensitive_data,
+    unpack_blob,
+)
+
+
+def to_legacy(encrypted_data: bytes, encrypted_aes_key: bytes):
+    """v1 blob을 변경 전 JSON/base64 포맷으로 되돌립니다."""
+    _, nonce, tag, ciphertext, wrapped_key = unpack_blob(encrypted_data, encrypted_aes_key)
+    aes_encrypted = {
+        'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+        'nonce': base64.b64encode(nonce).decode('utf-8'),
+        'tag': base64.b64encode(tag).decode('utf-8')
+    }
+    return json.dumps(aes_encrypted).encode('utf-8'), base64.b64encode(wrapped_key)
+
+
+def measure(label: str, rows):
+    size = sum(len(d) + len(k) for d, k in rows) / len(rows)
+
+    start = time.perf_counter()
+    for d, k in rows:
+        unpack_blob(d, k)
+    decode = (time.perf_counter() - start) / len(rows) * 1e6
+
+    start = time.perf_counter()
+    for d, k in rows:
+        decrypt_sensitive_data(d, k)
+    full = (time.perf_counter() - start) / len(rows) * 1e6
+
+    print(f"{label:<8} 평균 {size:7.1f} B/행   디코딩 {decode:7.2f} µs/행   전체 복호화 {full:9.1f} µs/행")
+    return size, decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="승객 blob 포맷 크기/디코딩 벤치마크")
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    v1_rows = []
+    for i in range(args.rows):
+        blobs = encrypt_sensitive_data({
+            '생년월일': f"19{50 + i % 50}-01-{1 + i % 28:02d}",
+            '전화번호': f"010-{i % 10000:04d}-{(i * 7) % 10000:04d}",
+            '지병여부': i % 3 == 0,
+        })
+        v1_rows.append((blobs['encrypted_data'], blobs['encrypted_aes_key']))
+    legacy_rows = [to_legacy(d, k) for d, k in v1_rows]
+
+    legacy_size, legacy_decode = measure("legacy", legacy_rows)
+    v1_size, v1_decode = measure("v1", v1_rows)
+
+    print(f"[결과] 저장 크기 {1 - v1_size / legacy_size:.1%} 절감, 디코딩 {legacy_decode / v1_decode:.1f}배 빠름")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# /benchmarks/bench_crypto.py
+# 승객 복호화 처리량(rows/sec) 비교: 기존 행 단위 방식 vs CryptoEngine 배치 방식 vs 업로드 단위 DEK(v2)
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_crypto --rows 3000
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from Crypto.Cipher import AES, PKCS1_OAEP
+from Crypto.PublicKey import RSA
+from services.encryption_utils import (
+    PRIVATE_KEY,
+    CryptoEngine,
+    encrypt_sensitive_data,
+    generate_data_key,
+    unpack_blob,
+)
+
+
+def legacy_decrypt(encrypted_data_blob: bytes, encrypted_aes_key_blob: bytes):
+    """변경 전 구현: 호출마다 RSA 개인 키를 다시 파싱합니다."""
+    _, nonce, tag, ciphertext, wrapped_key = unpack_blob(encrypted_data_blob, encrypted_aes_key_blob)
+    rsa_cipher = PKCS1_OAEP.new(RSA.import_key(PRIVATE_KEY))
+    aes_key = rsa_cipher.decrypt(wrapped_key)
+    cipher = AES.new(aes_key, AES.MODE_EAX, nonce=nonce)
+    return json.loads(cipher.decrypt_and_verify(ciphertext, tag).decode('utf-8'))
+
+
+def make_rows(n: int, data_key=None, key_id=None):
+    rows = []
+    for i in range(n):
+        blobs = encrypt_sensitive_data({
+            '생년월일': f"19{50 + i % 50}-01-{1 + i % 28:02d}",
+            '전화번호': f"010-{i % 10000:04d}-{(i * 7) % 10000:04d}",
+            '지병여부': i % 3 == 0,
+        }, data_key)
+        rows.append((blobs['encrypted_data'], blobs['encrypted_aes_key'], key_id))
+    return rows
+
+
+def report(label: str, n: int, elapsed: float):
+    print(f"{label:<32} {elapsed:8.3f}s  {n / elapsed:10.1f} rows/sec")
+
+
+async def run_engine(engine: CryptoEngine, rows, wrapped_keys=None):
+    # 풀 기동 비용은 측정에서 제외
+    await engine.decrypt_many(rows[:1], await engine.unwrap_data_keys(wrapped_keys or {}))
+    start = time.perf_counter()
+    # 목록 조회와 동일하게 DEK 언래핑(업로드당 RSA 1회)까지 포함해서 측정
+    data_keys = await engine.unwrap_data_keys(wrapped_keys or {})
+    result = await engine.decrypt_many(rows, data_keys)
+    elapsed = time.perf_counter() - start
+    assert all(r is not None for r in result)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="승객 복호화 처리량 벤치마크")
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"[정보] 테스트 데이터 {args.rows}건 생성 중...")
+    rows = make_rows(args.rows)
+
+    start = time.perf_counter()
+    for data, key, _ in rows:
+        legacy_decrypt(data, key)
+    report("before: 행 단위 (키 재파싱)", args.rows, time.perf_counter() - start)
+
+    inline = CryptoEngine(max_workers=0)
+    report("after: 배치 (workers=0)", args.rows, asyncio.run(run_engine(inline, rows)))
+
+    pooled = CryptoEngine(max_workers=args.workers)
+    try:
+        elapsed = asyncio.run(run_engine(pooled, rows))
+    finally:
+        pooled.shutdown()
+    report(f"after: 배치 (workers={args.workers})", args.rows, elapsed)
+
+    data_key, wrapped_key = generate_data_key()
+    envelope_rows = make_rows(args.rows, data_key, key_id=1)
+    report("after: DEK v2 (workers=0)", args.rows, asyncio.run(run_engine(inline, envelope_rows, {1: wrapped_key})))
+
+
+if __name__ == "__main__":
+    main()
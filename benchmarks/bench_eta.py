@@ -0,0 +1,70 @@
+# /benchmarks/bench_eta.py
+# 항로 ETA 계산: 요청마다 항로 전체를 다시 계산하는 방식과
+# 캐시된 누적 거리 배열을 이진 탐색하는 get_route_eta 비교
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_eta --points 5000 --ships 500
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from services.geo_utils import calculate_distance
+from services.route_cache import RouteGeometry, route_cache
+from services.navigation_service import get_route_eta
+
+ROUTE_ID = 1
+SPEED_KMH = 30
+
+
+def recompute_eta(rows, lat, lon):
+    """변경 전 방식: 가장 가까운 waypoint를 찾고 남은 구간 거리를 매번 다시 합산"""
+    nearest = min(range(len(rows)), key=lambda i: calculate_distance(lat, lon, rows[i][1], rows[i][2]))
+    remaining = 0
+    for i in range(nearest, len(rows) - 1):
+        remaining += calculate_distance(rows[i][1], rows[i][2], rows[i + 1][1], rows[i + 1][2])
+    return remaining / SPEED_KMH
+
+
+async def run(points: int, ships: int):
+    rng = np.random.default_rng(0)
+    latitudes = 34.0 + np.cumsum(rng.normal(0, 0.01, points))
+    longitudes = 126.0 + np.cumsum(rng.normal(0.005, 0.01, points))
+    rows = [(i, lat, lon) for i, (lat, lon) in enumerate(zip(latitudes.tolist(), longitudes.tolist()))]
+    # DB 없이 측정하도록 항로 기하 정보를 캐시에 직접 넣어 둠
+    route_cache._cache.set(ROUTE_ID, RouteGeometry(ROUTE_ID, None, rows), tags=[("route", ROUTE_ID)])
+
+    # 항로 근처의 선박 위치
+    picks = rng.integers(0, points, ships)
+    positions = [(latitudes[i] + rng.normal(0, 0.002), longitudes[i] + rng.normal(0, 0.002)) for i in picks]
+    distances = rng.uniform(0, route_cache._cache.get(ROUTE_ID).total_distance, ships).tolist()
+
+    baseline_n = max(1, ships // 20)
+    start = time.perf_counter()
+    for lat, lon in positions[:baseline_n]:
+        recompute_eta(rows, lat, lon)
+    baseline = (time.perf_counter() - start) / baseline_n
+
+    start = time.perf_counter()
+    for lat, lon in positions:
+        await get_route_eta(None, ROUTE_ID, SPEED_KMH, lat, lon, limit=10)
+    by_position = (time.perf_counter() - start) / ships
+
+    start = time.perf_counter()
+    for distance in distances:
+        await get_route_eta(None, ROUTE_ID, SPEED_KMH, distance_km=distance, limit=10)
+    by_distance = (time.perf_counter() - start) / ships
+
+    for label, elapsed in (("재계산", baseline), ("위치 투영", by_position), ("이동 거리", by_distance)):
+        print(f"{label:<8} {elapsed * 1e6:10.1f} µs/건   {1 / elapsed:10.0f} 건/초")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항로 ETA 계산 벤치마크")
+    parser.add_argument("--points", type=int, default=5000, help="항로 waypoint 수")
+    parser.add_argument("--ships", type=int, default=500, help="계산할 선박 수")
+    args = parser.parse_args()
+    asyncio.run(run(args.points, args.ships))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# /benchmarks/bench_haversine.py
+# 항로 총거리 계산: 구간마다 calculate_distance를 호출하는 기존 루프와 NumPy 벡터화 비교
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_haversine --points 5000 --routes 20
+
+import argparse
+import time
+import numpy as np
+from services.geo_utils import calculate_distance, segment_distances
+
+
+def loop_distance(latitudes, longitudes) -> float:
+    """변경 전 get_route_info의 거리 계산 방식"""
+    total_distance = 0
+    for i in range(len(latitudes) - 1):
+        total_distance += calculate_distance(
+            latitudes[i], longitudes[i],
+            latitudes[i + 1], longitudes[i + 1]
+        )
+    return total_distance
+
+
+def vector_distance(latitudes, longitudes) -> float:
+    return float(segment_distances(latitudes, longitudes).sum())
+
+
+def make_route(rng, points: int):
+    # 남해안 부근에서 조금씩 이동하는 항로
+    latitudes = 34.0 + np.cumsum(rng.normal(0, 0.01, points))
+    longitudes = 126.0 + np.cumsum(rng.normal(0.005, 0.01, points))
+    return latitudes, longitudes
+
+
+def measure(label: str, fn, routes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for latitudes, longitudes in routes:
+            fn(latitudes, longitudes)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<8} {elapsed:9.2f} ms / {len(routes)}개 항로")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항로 거리 계산 벤치마크")
+    parser.add_argument("--points", type=int, default=5000, help="항로당 waypoint 수")
+    parser.add_argument("--routes", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    arrays = [make_route(rng, args.points) for _ in range(args.routes)]
+    # 기존 코드는 ORM 객체의 float 속성을 읽었으므로 파이썬 리스트로 비교
+    lists = [(lat.tolist(), lon.tolist()) for lat, lon in arrays]
+
+    for (lat_list, lon_list), (lat, lon) in zip(lists, arrays):
+        assert abs(loop_distance(lat_list, lon_list) - vector_distance(lat, lon)) < 1e-6
+
+    loop = measure("loop", loop_distance, lists, args.repeat)
+    vector = measure("numpy", vector_distance, arrays, args.repeat)
+    print(f"[결과] {args.points}개 waypoint 기준 {loop / vector:.1f}배 빠름")
+
+
+if __name__ == "__main__":
+    main()
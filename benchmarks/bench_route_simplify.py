@@ -0,0 +1,64 @@
+# /benchmarks/bench_route_simplify.py
+# zoom 단계별 항로 GeoJSON 단순화 결과의 응답 크기와 지연 시간 측정
+# - 최초 생성: Douglas–Peucker 단순화 + 직렬화 시간
+# - 캐시 조회: 두 번째 요청부터 route_cache에서 꺼내는 시간
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_route_simplify --points 20000
+
+import argparse
+import asyncio
+import gzip
+import time
+import numpy as np
+from services.route_cache import RouteGeometry, RouteGeometryCache, zoom_tolerance, tolerance_precision
+
+ROUTE_ID = 1
+ZOOM_LEVELS = [None, 16, 14, 12, 10, 8, 6, 4]
+
+
+def make_rows(points: int):
+    # 해안선을 따라 굽이치는 항로 (작은 흔들림 + 큰 굴곡)
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 1, points)
+    latitudes = 34.0 + 0.8 * np.sin(t * 12) + np.cumsum(rng.normal(0, 0.0005, points))
+    longitudes = 126.0 + 3.0 * t + 0.2 * np.cos(t * 40) + np.cumsum(rng.normal(0, 0.0005, points))
+    return [(i + 1, lat, lon) for i, (lat, lon) in enumerate(zip(latitudes.tolist(), longitudes.tolist()))]
+
+
+async def run(points: int, repeat: int):
+    geometry = RouteGeometry(ROUTE_ID, None, make_rows(points))
+    cache = RouteGeometryCache()
+    # DB 없이 측정하도록 항로 기하 정보를 캐시에 직접 넣어 둠
+    cache._cache.set(ROUTE_ID, geometry, tags=[("route", ROUTE_ID)])
+
+    print(f"{'zoom':>5} {'tolerance':>10} {'자릿수':>4} {'점 수':>7} {'크기(B)':>10} {'gzip(B)':>9} {'생성(ms)':>9} {'캐시(µs)':>9}")
+    for zoom in ZOOM_LEVELS:
+        tolerance = zoom_tolerance(zoom) if zoom is not None else None
+        precision = tolerance_precision(tolerance) if tolerance else None
+
+        start = time.perf_counter()
+        body = await cache.get_geojson(None, ROUTE_ID, tolerance, precision)
+        cold = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await cache.get_geojson(None, ROUTE_ID, tolerance, precision)
+        warm = (time.perf_counter() - start) / repeat * 1e6
+
+        point_count = points if zoom is None else body.count(b"],[") + 1
+        print(
+            f"{'원본' if zoom is None else zoom:>5} {tolerance or 0:>10.6f} {precision if precision is not None else '-':>4} "
+            f"{point_count:>7} {len(body):>10} {len(gzip.compress(body)):>9} {cold:>9.2f} {warm:>9.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="항로 GeoJSON 단순화 벤치마크")
+    parser.add_argument("--points", type=int, default=20000, help="항로 waypoint 수")
+    parser.add_argument("--repeat", type=int, default=1000, help="캐시 조회 반복 횟수")
+    args = parser.parse_args()
+    asyncio.run(run(args.points, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
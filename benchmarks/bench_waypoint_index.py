@@ -0,0 +1,64 @@
+# /benchmarks/bench_waypoint_index.py
+# waypoints (route_id, waypoint_order) 복합 인덱스 유무에 따른 항로 조회 시간 비교
+# 항로/날씨 서비스가 사용하는 쿼리(route_id 필터 + waypoint_order 정렬)를 그대로 측정합니다.
+# 운영 DB를 건드리지 않도록 임시 SQLite 메모리 DB에 waypoints 테이블을 만들어 측정합니다.
+#
+# 실행 (BackEnd 루트에서): python -m benchmarks.bench_waypoint_index --routes 2000 --points 500
+
+import argparse
+import random
+import sqlite3
+import time
+
+QUERY = (
+    "SELECT route_id, waypoint_order, latitude, longitude FROM waypoints "
+    "WHERE route_id = ? ORDER BY waypoint_order"
+)
+
+
+def build(routes: int, points: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(
+        "CREATE TABLE waypoints (id INTEGER PRIMARY KEY, route_id INTEGER NOT NULL, "
+        "waypoint_order INTEGER NOT NULL, latitude REAL NOT NULL, longitude REAL NOT NULL)"
+    )
+    rng = random.Random(0)
+    # 실제처럼 여러 항로의 waypoint가 섞여 삽입된 상태를 만듦
+    rows = [(r, o, 34 + rng.random(), 126 + rng.random()) for r in range(1, routes + 1) for o in range(1, points + 1)]
+    rng.shuffle(rows)
+    conn.executemany("INSERT INTO waypoints (route_id, waypoint_order, latitude, longitude) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def measure(label: str, conn: sqlite3.Connection, route_ids, repeat: int) -> float:
+    plan = " / ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + QUERY, (route_ids[0],)))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for route_id in route_ids:
+            conn.execute(QUERY, (route_id,)).fetchall()
+    elapsed = (time.perf_counter() - start) / (repeat * len(route_ids)) * 1000
+    print(f"{label:<10} {elapsed:9.3f} ms/조회   실행 계획: {plan}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="waypoint 복합 인덱스 벤치마크")
+    parser.add_argument("--routes", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=500, help="항로당 waypoint 수")
+    parser.add_argument("--queries", type=int, default=50, help="조회할 항로 수")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"[정보] waypoint {args.routes * args.points:,}행 생성 중...")
+    conn = build(args.routes, args.points)
+    route_ids = random.Random(1).sample(range(1, args.routes + 1), min(args.queries, args.routes))
+
+    before = measure("인덱스 없음", conn, route_ids, args.repeat)
+    conn.execute("CREATE INDEX ix_waypoints_route_order ON waypoints (route_id, waypoint_order)")
+    after = measure("복합 인덱스", conn, route_ids, args.repeat)
+    print(f"[결과] 항로 1개 조회 {before / after:.0f}배 빠름")
+
+
+if __name__ == "__main__":
+    main()
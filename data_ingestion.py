@@ -1,88 +1,72 @@
 # /Backend/data_ingestion.py
+# CSV 승객 데이터 → 암호화 후 DB 적재 CLI
+# /passenger/upload-csv와 같은 적재 모듈(services/ingestion_service.py)을 사용합니다.
+#
+# 실행 예:
+#   python data_ingestion.py data/passenger_data.csv --admin-id 1
+#   python data_ingestion.py data/passenger_data.csv --admin-id 1 --batch-size 2000 --workers 4
+#   python data_ingestion.py data/passenger_data.csv --admin-id 1 --dry-run
+#
+# DB 접속 정보는 --database-url 또는 환경변수 DATABASE_URL로 지정합니다.
 
-import pandas as pd
-import mysql.connector
-from services.encryption_utils import encrypt_sensitive_data
+import argparse
+import asyncio
 import json
 import os
 import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from db import DATABASE_URL
+from services.encryption_utils import CryptoEngine, CRYPTO_WORKERS
+from services.ingestion_service import ingest_passenger_csv, sync_passenger_csv, CSV_CHUNK_SIZE
 
-# MySQL 연결 설정
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'db_password',
-    'database': 'db_name'
-}
 
-# ------------------------------
-# 1. CSV 데이터 불러오기
-# ------------------------------
-csv_path = "data/passenger_data.csv"
-if not os.path.exists(csv_path):
-    print(f"[오류] CSV 파일이 존재하지 않습니다. 경로를 확인하세요: {csv_path}")
-    sys.exit()
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="승객 CSV를 암호화하여 DB에 적재합니다.")
+    parser.add_argument("csv_path", help="적재할 CSV 파일 경로")
+    parser.add_argument("--admin-id", type=int, required=True, help="승객을 소유할 관리자 ID")
+    parser.add_argument("--batch-size", type=int, default=CSV_CHUNK_SIZE, help="한 번에 파싱/암호화/삽입할 행 수")
+    parser.add_argument("--workers", type=int, default=CRYPTO_WORKERS, help="암호화 프로세스 수 (0이면 단일 스레드)")
+    parser.add_argument("--sync", action="store_true", help="명단 전체 교체 대신 변경된 행만 반영")
+    parser.add_argument("--dry-run", action="store_true", help="DB에 쓰지 않고 검증/암호화만 수행")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="SQLAlchemy 비동기 DB URL")
+    return parser.parse_args(argv)
 
-try:
-    df = pd.read_csv(csv_path, encoding='utf-8')
-    print(f"[정보] '{csv_path}' 파일에서 데이터를 불러왔습니다.")
-    
-    # 성별을 M/F로 변환
-    df['gender_code'] = df['성별'].apply(lambda x: 'M' if x.strip().lower() == 'male' else 'F' if x.strip().lower() == 'female' else 'Other')
-    # 지병여부를 불리언으로 변환
-    df['is_sick'] = df['지병여부'].apply(lambda x: True if str(x).strip().lower() == 'true' else False)
 
-except Exception as e:
-    print(f"CSV 파일 처리 중 오류 발생: {e}")
-    sys.exit()
+async def run(args) -> dict:
+    crypto = CryptoEngine(max_workers=args.workers)
+    try:
+        with open(args.csv_path, "rb") as f:
+            if args.dry_run:
+                return await ingest_passenger_csv(None, f, args.admin_id, args.batch_size, dry_run=True, crypto=crypto)
 
-# ------------------------------
-# 2. 데이터베이스 연결 및 삽입
-# ------------------------------
-try:
-    conn = mysql.connector.connect(**DB_CONFIG)
-    cur = conn.cursor()
-    print("[정보] MySQL 데이터베이스에 연결되었습니다.")
+            engine = create_async_engine(args.database_url)
+            try:
+                Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+                async with Session() as db:
+                    if args.sync:
+                        return await sync_passenger_csv(db, f, args.admin_id, crypto=crypto)
+                    return await ingest_passenger_csv(db, f, args.admin_id, args.batch_size, crypto=crypto)
+            finally:
+                await engine.dispose()
+    finally:
+        crypto.shutdown()
 
-    # DB에 삽입 쿼리 준비
-    query = """
-    INSERT INTO passenger (passenger_name, gender, job, encrypted_data, encrypted_aes_key)
-    VALUES (%s, %s, %s, %s, %s)
-    """
 
-    for index, row in df.iterrows():
-        # 암호화 대상 데이터 (생년월일, 전화번호, 지병여부)
-        data_to_encrypt = {
-            '생년월일': str(row['생년월일']), # Pydantic date가 아니므로 문자열로 처리
-            '전화번호': str(row['전화번호']),
-            '지병여부': row['is_sick']
-        }
-        
-        # services/encryption_utils.py의 함수를 사용하여 데이터 암호화
-        encrypted_blobs = encrypt_sensitive_data(data_to_encrypt)
-        
-        # DB에 삽입할 튜플 준비
-        data_tuple = (
-            row['이름'],
-            row['gender_code'],
-            row['직업'],
-            encrypted_blobs['encrypted_data'],
-            encrypted_blobs['encrypted_aes_key']
-        )
-        
-        cur.execute(query, data_tuple)
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.csv_path):
+        print(f"[오류] CSV 파일이 존재하지 않습니다. 경로를 확인하세요: {args.csv_path}")
+        sys.exit(1)
 
-    conn.commit()
-    print("[성공] 모든 데이터가 성공적으로 암호화되어 DB에 저장되었습니다.")
+    try:
+        result = asyncio.run(run(args))
+    except Exception as e:
+        print(f"[오류] 데이터 적재 중 오류 발생: {e}")
+        sys.exit(1)
 
-except mysql.connector.Error as err:
-    print(f"MySQL 연결 또는 삽입 오류: {err}")
-    conn.rollback() # 오류 발생 시 롤백
-except Exception as e:
-    print(f"데이터 처리 중 예상치 못한 오류 발생: {e}")
-    conn.rollback()
-finally:
-    if 'conn' in locals() and conn.is_connected():
-        cur.close()
-        conn.close()
-        print("MySQL 연결이 닫혔습니다.")
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# /Backend/import_routes.py
+# 항로 파일(GeoJSON / GPX / CSV) → Route + waypoint 일괄 등록 CLI
+# /navigation/routes/import와 같은 모듈(services/route_import_service.py)을 사용합니다.
+#
+# 실행 예:
+#   python import_routes.py data/routes.geojson
+#   python import_routes.py data/track.gpx --name "목포-제주" --start-port 목포 --end-port 제주
+#   python import_routes.py data/waypoints.csv --replace --dry-run
+#
+# DB 접속 정보는 --database-url 또는 환경변수 DATABASE_URL로 지정합니다.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from db import DATABASE_URL
+from services.route_import_service import import_routes, detect_format, ROUTE_IMPORT_FORMATS
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="항로 파일을 DB에 등록합니다.")
+    parser.add_argument("path", help="항로 파일 경로")
+    parser.add_argument("--format", choices=ROUTE_IMPORT_FORMATS, help="파일 형식 (생략 시 확장자로 판단)")
+    parser.add_argument("--name", help="파일에 항로 이름이 없을 때 사용 (항로가 하나일 때만)")
+    parser.add_argument("--start-port", help="파일에 출발 항구가 없을 때 사용")
+    parser.add_argument("--end-port", help="파일에 도착 항구가 없을 때 사용")
+    parser.add_argument("--replace", action="store_true", help="같은 이름의 항로가 있으면 waypoint 교체")
+    parser.add_argument("--dry-run", action="store_true", help="DB에 쓰지 않고 검증만 수행")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="SQLAlchemy 비동기 DB URL")
+    return parser.parse_args(argv)
+
+
+async def run(args) -> dict:
+    fmt = detect_format(args.path, args.format)
+    with open(args.path, "rb") as f:
+        data = f.read()
+
+    engine = create_async_engine(args.database_url)
+    try:
+        Session = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with Session() as db:
+            return await import_routes(
+                db, data, fmt, args.name, args.start_port, args.end_port, args.replace, args.dry_run
+            )
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"[오류] 항로 파일이 존재하지 않습니다. 경로를 확인하세요: {args.path}")
+        sys.exit(1)
+
+    try:
+        result = asyncio.run(run(args))
+    except Exception as e:
+        print(f"[오류] 항로 등록 중 오류 발생: {e}")
+        sys.exit(1)
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,58 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from routers import logs, passenger, weather, navigation, user, ship
-from db import engine, Base
+from db import engine, Base, SessionLocal
+from migrations import run_migrations
+from services.encryption_utils import crypto_engine
+from services.upload_job_service import upload_job_queue
+from services.route_cache import route_cache, ROUTE_CACHE_WARM
+from services.ship_position_service import latest_positions, position_buffer
+from services.weather_client import weather_client
+from services.weather_prefetch import weather_prefetcher, WEATHER_PREFETCH_ENABLED
+from services.weather_alerts import weather_alerts
+from services.auth_service import require_admin, require_admin_stream, session_purger
+from services.weather_history import observation_buffer, weather_rollup, WEATHER_HISTORY_ENABLED
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 시작
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+    await weather_client.start()
+    await upload_job_queue.start()
+    await session_purger.start()
+    async with SessionLocal() as db:
+        await latest_positions.load(db)
+    await position_buffer.start()
+    if ROUTE_CACHE_WARM:
+        async with SessionLocal() as db:
+            count = await route_cache.warm(db)
+        print(f"[정보] 항로 {count}개를 캐시에 적재했습니다.")
+    if WEATHER_HISTORY_ENABLED:
+        await observation_buffer.start()
+        await weather_rollup.start()
+    if WEATHER_PREFETCH_ENABLED:
+        await weather_prefetcher.start()
+
+    yield
+
+    # 종료
+    weather_alerts.close()
+    await weather_prefetcher.stop()
+    await weather_rollup.stop()
+    await upload_job_queue.stop()
+    await session_purger.stop()
+    # 남은 위치/날씨 관측 이력을 모두 반영한 뒤 종료
+    await position_buffer.stop()
+    await observation_buffer.stop()
+    await weather_client.close()
+    crypto_engine.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,19 +62,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(logs.router, prefix="/logs", tags=["Logs"])
-app.include_router(weather.router, prefix="/weather", tags=["Weather"])
-app.include_router(passenger.router, prefix="/passenger", tags=["Passenger"])
-app.include_router(navigation.router, prefix="/navigation", tags=["Navigation"])
+# 로그인/회원가입(/user)을 제외한 모든 API는 세션 키 필요 (AUTH_ENABLED=true일 때)
+auth = [Depends(require_admin)]
+
+app.include_router(logs.router, prefix="/logs", tags=["Logs"], dependencies=auth)
+app.include_router(weather.router, prefix="/weather", tags=["Weather"], dependencies=auth)
+app.include_router(weather.stream_router, prefix="/weather", tags=["Weather"], dependencies=[Depends(require_admin_stream)])
+app.include_router(passenger.router, prefix="/passenger", tags=["Passenger"], dependencies=auth)
+app.include_router(navigation.router, prefix="/navigation", tags=["Navigation"], dependencies=auth)
 app.include_router(user.router, prefix="/user", tags=["User"])
-app.include_router(ship.router, prefix="/ship", tags=["ship"])
+app.include_router(ship.router, prefix="/ship", tags=["ship"], dependencies=auth)
 
 
 @app.get("/")
 def root():
     return {"message": "Ocean 백엔드 서버가 정상 작동 중입니다."}
-
-@app.on_event("startup")
-async def on_startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
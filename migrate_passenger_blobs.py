@@ -0,0 +1,97 @@
+# /Backend/migrate_passenger_blobs.py
+# 레거시 JSON/base64 포맷으로 저장된 승객 암호화 데이터를 v1 바이너리 포맷으로 변환합니다.
+# 복호화 없이 바이트만 재배열하므로 RSA 연산이 필요 없습니다.
+#
+# 실행: python migrate_passenger_blobs.py --batch-size 500 [--dry-run]
+
+import argparse
+import asyncio
+from sqlalchemy import select, update, bindparam
+from db import SessionLocal, engine
+from models.tables import Passenger
+from services.encryption_utils import is_legacy_blob, convert_legacy_blob
+
+passenger_table = Passenger.__table__
+
+update_stmt = (
+    update(passenger_table)
+    .where(passenger_table.c.passenger_id == bindparam("b_passenger_id"))
+    .values(
+        encrypted_data=bindparam("b_encrypted_data"),
+        encrypted_aes_key=bindparam("b_encrypted_aes_key"),
+    )
+)
+
+
+async def migrate(batch_size: int, dry_run: bool):
+    last_id = 0
+    scanned = converted = failed = 0
+    bytes_before = bytes_after = 0
+
+    async with SessionLocal() as db:
+        while True:
+            # passenger_id 기준 keyset 페이지네이션으로 배치 단위 조회
+            result = await db.execute(
+                select(
+                    Passenger.passenger_id,
+                    Passenger.encrypted_data,
+                    Passenger.encrypted_aes_key,
+                )
+                .where(Passenger.passenger_id > last_id)
+                .order_by(Passenger.passenger_id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            last_id = rows[-1].passenger_id
+            scanned += len(rows)
+
+            params = []
+            for row in rows:
+                if not is_legacy_blob(row.encrypted_data):
+                    continue
+                try:
+                    new_data, new_key = convert_legacy_blob(row.encrypted_data, row.encrypted_aes_key)
+                except Exception as e:
+                    print(f"[경고] passenger_id={row.passenger_id} 변환 실패: {e}")
+                    failed += 1
+                    continue
+
+                bytes_before += len(row.encrypted_data) + len(row.encrypted_aes_key)
+                bytes_after += len(new_data) + len(new_key)
+                params.append({
+                    "b_passenger_id": row.passenger_id,
+                    "b_encrypted_data": new_data,
+                    "b_encrypted_aes_key": new_key,
+                })
+
+            if params and not dry_run:
+                await db.execute(update_stmt, params)
+                await db.commit()
+            converted += len(params)
+            print(f"[정보] ~{last_id}: {scanned}건 확인, {converted}건 변환")
+
+    print(f"[완료] 확인 {scanned}건, 변환 {converted}건, 실패 {failed}건{' (dry-run)' if dry_run else ''}")
+    if converted:
+        saved = bytes_before - bytes_after
+        print(f"[정보] 저장 용량 {bytes_before:,}B → {bytes_after:,}B ({saved / bytes_before:.1%} 절감)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="승객 암호화 blob을 v1 바이너리 포맷으로 변환")
+    parser.add_argument("--batch-size", type=int, default=500, help="한 번에 처리할 행 수")
+    parser.add_argument("--dry-run", action="store_true", help="DB를 수정하지 않고 변환 결과만 출력")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await migrate(args.batch_size, args.dry_run)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
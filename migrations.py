@@ -0,0 +1,89 @@
+# /Backend/migrations.py
+# Base.metadata.create_all은 새 테이블만 만들고 기존 테이블에 컬럼/인덱스를 추가하지 않습니다.
+# 기존 DB에 필요한 스키마 변경은 여기에 멱등적으로(이미 적용된 경우 건너뜀) 추가합니다.
+
+from sqlalchemy import inspect
+
+
+def _columns(sync_conn, table: str) -> dict:
+    return {col["name"]: col for col in inspect(sync_conn).get_columns(table)}
+
+
+def _index_names(sync_conn, table: str) -> set:
+    return {idx["name"] for idx in inspect(sync_conn).get_indexes(table)}
+
+
+# 1. 업로드 단위 데이터 키(passenger_keys) 참조 컬럼
+def add_passenger_key_id(sync_conn):
+    columns = _columns(sync_conn, "passenger")
+    if "key_id" not in columns:
+        sync_conn.exec_driver_sql(
+            "ALTER TABLE passenger "
+            "ADD COLUMN key_id INT NULL, "
+            "ADD INDEX ix_passenger_key_id (key_id), "
+            "ADD CONSTRAINT fk_passenger_key_id FOREIGN KEY (key_id) REFERENCES passenger_keys (key_id)"
+        )
+    if not columns["encrypted_aes_key"]["nullable"]:
+        sync_conn.exec_driver_sql("ALTER TABLE passenger MODIFY encrypted_aes_key BLOB NULL")
+
+
+# 2. CSV 재업로드 동기화용 행 식별/지문 컬럼
+def add_passenger_row_fingerprint(sync_conn):
+    columns = _columns(sync_conn, "passenger")
+    if "row_key" not in columns:
+        sync_conn.exec_driver_sql(
+            "ALTER TABLE passenger "
+            "ADD COLUMN row_key VARCHAR(64) NULL, "
+            "ADD COLUMN row_fingerprint VARCHAR(64) NULL, "
+            "ADD INDEX ix_passenger_row_key (row_key)"
+        )
+
+
+# 3. 전화번호/생년월일 blind index 컬럼
+def add_passenger_blind_index(sync_conn):
+    columns = _columns(sync_conn, "passenger")
+    if "phone_bidx" not in columns:
+        sync_conn.exec_driver_sql(
+            "ALTER TABLE passenger "
+            "ADD COLUMN phone_bidx VARCHAR(64) NULL, "
+            "ADD COLUMN birth_bidx VARCHAR(64) NULL"
+        )
+    indexes = _index_names(sync_conn, "passenger")
+    if "ix_passenger_admin_phone_bidx" not in indexes:
+        sync_conn.exec_driver_sql("CREATE INDEX ix_passenger_admin_phone_bidx ON passenger (admin_id, phone_bidx)")
+    if "ix_passenger_admin_birth_bidx" not in indexes:
+        sync_conn.exec_driver_sql("CREATE INDEX ix_passenger_admin_birth_bidx ON passenger (admin_id, birth_bidx)")
+
+
+# 4. waypoint 조회(route_id 필터 + waypoint_order 정렬)용 복합 인덱스
+def add_waypoint_route_order_index(sync_conn):
+    if "ix_waypoints_route_order" not in _index_names(sync_conn, "waypoints"):
+        sync_conn.exec_driver_sql("CREATE INDEX ix_waypoints_route_order ON waypoints (route_id, waypoint_order)")
+
+
+# 5. 선박 운항 항로 컬럼 (출항 선박 항로 날씨 미리 조회용)
+def add_ship_route_id(sync_conn):
+    if "route_id" not in _columns(sync_conn, "ships"):
+        sync_conn.exec_driver_sql(
+            "ALTER TABLE ships "
+            "ADD COLUMN route_id INT NULL, "
+            "ADD INDEX ix_ships_route_id (route_id), "
+            "ADD CONSTRAINT fk_ships_route_id FOREIGN KEY (route_id) REFERENCES routes (id)"
+        )
+
+
+MIGRATIONS = [
+    add_passenger_key_id,
+    add_passenger_row_fingerprint,
+    add_passenger_blind_index,
+    add_waypoint_route_order_index,
+    add_ship_route_id,
+]
+
+
+def run_migrations(sync_conn):
+    """
+    create_all 직후 같은 트랜잭션에서 호출합니다. (conn.run_sync(run_migrations))
+    """
+    for migration in MIGRATIONS:
+        migration(sync_conn)
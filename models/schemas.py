@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime, date
 
 # 로그인 요청을 위한 스키마
@@ -26,6 +26,29 @@ class PassengerOut(BaseModel):
     class Config:
         orm_mode = True
 
+# 탑승객 페이지 출력용 (keyset 페이지네이션)
+class PassengerPage(BaseModel):
+    items: List[PassengerOut]
+    next_cursor: Optional[int]
+
+# CSV 업로드 작업 상태 출력용
+class UploadJobOut(BaseModel):
+    job_id: str
+    admin_id: int
+    mode: str
+    filename: Optional[str]
+    state: str
+    attempts: int
+    progress: float
+    processed_rows: int
+    inserted_rows: int
+    rejected_rows: int
+    result: Optional[dict]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
 # 로그 출력용
 class LogOut(BaseModel):
     log_id: int
@@ -71,6 +94,7 @@ class ShipOut(BaseModel):
     ship_name: str
     departure: int
     admin_id: Optional[int]
+    route_id: Optional[int] = None
 
     class Config:
         orm_mode = True
@@ -81,11 +105,35 @@ class ShipWithAdminOut(BaseModel):
     ship_name: str
     departure: int
     admin_name: Optional[str]
+    route_id: Optional[int] = None
 
     class Config:
         orm_mode = False  # 직접 dict 생성하므로 orm_mode는 False
 
+# 선박 위치 보고 (reported_at 생략 시 수신 시각)
+class ShipPositionIn(BaseModel):
+    ship_id: int
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    speed_kmh: Optional[float] = None
+    heading: Optional[float] = None
+    reported_at: Optional[datetime] = None
+
+class ShipPositionBatch(BaseModel):
+    positions: List[ShipPositionIn]
+
+class ShipPositionOut(BaseModel):
+    latitude: float
+    longitude: float
+    speed_kmh: Optional[float]
+    heading: Optional[float]
+    reported_at: datetime
+
+class ShipWithPositionOut(ShipWithAdminOut):
+    position: Optional[ShipPositionOut] = None
+
 class ShipCreateRequest(BaseModel):
     ship_no: int
     ship_name: str
-    admin_name: str
\ No newline at end of file
+    admin_name: str
+    route_id: Optional[int] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Enum, Text, DateTime, Float, ForeignKey, BLOB
+from sqlalchemy import Column, Integer, String, Date, Enum, Text, DateTime, Float, Numeric, ForeignKey, BLOB, Index
 from sqlalchemy.orm import relationship
 from db import Base
 import enum
@@ -28,10 +28,56 @@ class Passenger(Base):
     
     # 암호화된 데이터를 저장할 컬럼 추가
     encrypted_data = Column(BLOB, nullable=False)
-    encrypted_aes_key = Column(BLOB, nullable=False)
+    # 행 단위 RSA 래핑 키 (레거시/v1). 업로드 단위 데이터 키(v2)를 쓰는 행은 NULL
+    encrypted_aes_key = Column(BLOB, nullable=True)
+    key_id = Column(Integer, ForeignKey("passenger_keys.key_id"), nullable=True, index=True)
+    # CSV 재업로드 동기화용 HMAC: row_key(이름+생년월일)로 같은 승객을 찾고, row_fingerprint(전체 필드)로 변경 여부 판단
+    row_key = Column(String(64), index=True)
+    row_fingerprint = Column(String(64))
+    # 전화번호/생년월일 검색용 blind index (HMAC). 복호화 없이 일치 검색에 사용
+    phone_bidx = Column(String(64))
+    birth_bidx = Column(String(64))
     admin_id = Column(Integer, ForeignKey("admin.admin_id"), nullable=False)
     admin = relationship("Admin")
 
+    __table_args__ = (
+        Index("ix_passenger_admin_phone_bidx", "admin_id", "phone_bidx"),
+        Index("ix_passenger_admin_birth_bidx", "admin_id", "birth_bidx"),
+    )
+
+
+# 업로드 단위 데이터 키(DEK). RSA 공개 키로 래핑된 상태로만 저장합니다.
+class PassengerKey(Base):
+    __tablename__ = "passenger_keys"
+
+    key_id = Column(Integer, primary_key=True, index=True)
+    admin_id = Column(Integer, ForeignKey("admin.admin_id"), nullable=False, index=True)
+    encrypted_dek = Column(BLOB, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# CSV 업로드 백그라운드 작업. 워커가 재시작되어도 이어서 처리할 수 있도록 DB에 보관합니다.
+class UploadJob(Base):
+    __tablename__ = "upload_jobs"
+
+    job_id = Column(String(36), primary_key=True)
+    admin_id = Column(Integer, ForeignKey("admin.admin_id"), nullable=False, index=True)
+    mode = Column(String(10), nullable=False, default="replace")
+    chunk_size = Column(Integer, nullable=False)
+    filename = Column(String(255))
+    file_path = Column(String(255), nullable=False)
+    state = Column(Enum("queued", "running", "succeeded", "failed"), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    progress = Column(Float, nullable=False, default=0.0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    inserted_rows = Column(Integer, nullable=False, default=0)
+    rejected_rows = Column(Integer, nullable=False, default=0)
+    result = Column(Text)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
 
 class Log(Base):
     __tablename__ = "logs"
@@ -74,6 +120,11 @@ class Waypoint(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
 
+    # 항로/날씨 조회는 모두 route_id로 거르고 waypoint_order로 정렬
+    __table_args__ = (
+        Index("ix_waypoints_route_order", "route_id", "waypoint_order"),
+    )
+
 
 class Ship(Base):
     __tablename__ = "ships"
@@ -83,11 +134,78 @@ class Ship(Base):
     ship_name = Column(String(100), nullable=False)
     departure = Column(Integer, default=0)
     admin_id = Column(Integer, ForeignKey("admin.admin_id"))
+    # 운항 항로 (출항 중이면 이 항로의 날씨를 미리 조회)
+    route_id = Column(Integer, ForeignKey("routes.id"), nullable=True)
     
     # 이 부분에 관계(relationship)를 추가했습니다.
     admin = relationship("Admin", back_populates="ships")
 
 
+# 선박 위치 이력. 수신한 위치를 모아서(write-behind) 한 번에 삽입합니다.
+class ShipPosition(Base):
+    __tablename__ = "ship_positions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ship_id = Column(Integer, ForeignKey("ships.id"), nullable=False)
+    latitude = Column(Float, nullable=False)
+    longitude = Column(Float, nullable=False)
+    speed_kmh = Column(Float)
+    heading = Column(Float)
+    reported_at = Column(DateTime, nullable=False)
+    received_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_ship_positions_ship_reported", "ship_id", "reported_at"),
+    )
+
+
+# 날씨 관측 이력 (격자 셀 × 정시). WeatherAPI 현재 날씨를 받을 때마다 셀·시간당 한 행을 묶어서 삽입합니다.
+# 항로 waypoint는 weather_cache.snap으로 셀에 대응시켜 조회합니다.
+class WeatherObservation(Base):
+    __tablename__ = "weather_observations"
+
+    id = Column(Integer, primary_key=True)
+    cell_lat = Column(Numeric(7, 4, asdecimal=False), nullable=False)
+    cell_lon = Column(Numeric(8, 4, asdecimal=False), nullable=False)
+    observed_at = Column(DateTime, nullable=False)  # UTC, 정시로 내림
+    wind_kph = Column(Float)
+    gust_kph = Column(Float)
+    wave_m = Column(Float)  # 유의 파고 (응답에 있을 때만)
+    vis_km = Column(Float)
+    precip_mm = Column(Float)
+    temp_c = Column(Float)
+    condition_code = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_weather_observations_cell_time", "cell_lat", "cell_lon", "observed_at"),
+        Index("ix_weather_observations_time", "observed_at"),
+    )
+
+
+# 날씨 관측 일별 집계 (격자 셀 × 날짜, 날짜는 KST 기준)
+class WeatherDaily(Base):
+    __tablename__ = "weather_daily"
+
+    id = Column(Integer, primary_key=True)
+    cell_lat = Column(Numeric(7, 4, asdecimal=False), nullable=False)
+    cell_lon = Column(Numeric(8, 4, asdecimal=False), nullable=False)
+    day = Column(Date, nullable=False)
+    samples = Column(Integer, nullable=False)
+    wind_avg_kph = Column(Float)
+    wind_max_kph = Column(Float)
+    gust_max_kph = Column(Float)
+    wave_max_m = Column(Float)
+    vis_min_km = Column(Float)
+    precip_sum_mm = Column(Float)
+    temp_min_c = Column(Float)
+    temp_max_c = Column(Float)
+    condition_code = Column(Integer)  # 가장 많이 관측된 날씨 코드
+
+    __table_args__ = (
+        Index("ux_weather_daily_cell_day", "cell_lat", "cell_lon", "day", unique=True),
+    )
+
+
 # 이 클래스를 맨 아래에 추가했습니다.
 class Session(Base):
     __tablename__ = "sessions"
@@ -1,16 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from services.navigation_service import get_route_geojson, get_route_info
+from services.navigation_service import (
+    get_route_geojson,
+    get_route_info,
+    get_routes_info,
+    find_nearest,
+    get_route_eta,
+    ROUTE_INFO_MAX_IDS,
+)
+from services.route_cache import route_cache
+from services.route_import_service import import_routes, detect_format
+from services.spatial_index import spatial_index, NEAREST_MAX_RESULTS
 from db import get_db
 
 router = APIRouter()
 
+# 항로 캐시 상태 (/routes/{route_id}보다 먼저 선언)
+@router.get("/routes/cache/stats")
+async def read_route_cache_stats():
+    return route_cache.stats()
+
+# waypoint를 DB에서 직접 수정한 뒤 캐시를 비울 때 사용 (route_id 생략 시 전체)
+@router.delete("/routes/cache")
+async def invalidate_route_cache(route_id: Optional[int] = None):
+    route_cache.invalidate(route_id)
+    return {"message": "항로 캐시를 비웠습니다.", "route_id": route_id}
+
+# 항로 파일(GeoJSON / GPX / CSV) 일괄 등록
+@router.post("/routes/import")
+async def import_routes_api(
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None, description="geojson | gpx | csv (생략 시 확장자로 판단)"),
+    name: Optional[str] = Form(None, description="파일에 항로 이름이 없을 때 사용 (항로가 하나일 때만)"),
+    start_port: Optional[str] = Form(None, description="파일에 출발 항구가 없을 때 사용"),
+    end_port: Optional[str] = Form(None, description="파일에 도착 항구가 없을 때 사용"),
+    replace: bool = Form(False, description="같은 이름의 항로가 있으면 waypoint 교체"),
+    dry_run: bool = Form(False, description="DB에 쓰지 않고 검증만 수행"),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        fmt = detect_format(file.filename, format)
+        data = await file.read()
+        return await import_routes(db, data, fmt, name, start_port, end_port, replace, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"항로 등록 중 오류 발생: {e}")
+
+# 여러 항로의 거리/소요 시간 일괄 조회 (/routes/{route_id}보다 먼저 선언)
+@router.get("/routes/info")
+async def get_routes_info_api(
+    ids: str = Query(..., description="쉼표로 구분된 항로 ID (예: 1,2,3)"),
+    db: AsyncSession = Depends(get_db)
+):
+    try:
+        route_ids = [int(v) for v in ids.split(",") if v.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids는 쉼표로 구분된 정수여야 합니다.")
+    if not route_ids:
+        raise HTTPException(status_code=400, detail="조회할 항로 ID가 없습니다.")
+    if len(route_ids) > ROUTE_INFO_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {ROUTE_INFO_MAX_IDS}개 항로까지 조회할 수 있습니다.")
+    return await get_routes_info(db, route_ids)
+
+# zoom/tolerance/precision을 모두 생략하면 원본 해상도 GeoJSON
 @router.get("/routes/{route_id}")
-async def get_route(route_id: int, db: AsyncSession = Depends(get_db)):
-    geojson = await get_route_geojson(db, route_id)
+async def get_route(
+    route_id: int,
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="지도 zoom 단계 (단순화 허용 오차 결정)"),
+    tolerance: Optional[float] = Query(None, gt=0, description="단순화 허용 오차 (경위도 도 단위, zoom보다 우선)"),
+    precision: Optional[int] = Query(None, ge=0, le=10, description="좌표 소수 자릿수"),
+    db: AsyncSession = Depends(get_db)
+):
+    geojson = await get_route_geojson(db, route_id, zoom, tolerance, precision)
     if not geojson:
         raise HTTPException(status_code=404, detail="Route not found")
-    return geojson
+    return Response(content=geojson, media_type="application/json")
 
 @router.get("/routes/{route_id}/info")
 async def get_route_info_api(route_id: int, db: AsyncSession = Depends(get_db)):
@@ -18,3 +84,39 @@ async def get_route_info_api(route_id: int, db: AsyncSession = Depends(get_db)):
     if not info:
         raise HTTPException(status_code=404, detail="Route info not found")
     return info
+
+# 현재 위치(lat/lon) 또는 이동 거리(distance_km)와 속력 기준 도착 예정 시각
+@router.get("/routes/{route_id}/eta")
+async def get_route_eta_api(
+    route_id: int,
+    speed_kmh: float = Query(..., gt=0, description="선박 속력 (km/h)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    distance_km: Optional[float] = Query(None, ge=0, description="출발지부터 이동한 거리 (lat/lon 대신 사용)"),
+    limit: Optional[int] = Query(None, ge=0, description="반환할 다음 waypoint 최대 개수 (생략 시 전체)"),
+    db: AsyncSession = Depends(get_db)
+):
+    if distance_km is None and (lat is None or lon is None):
+        raise HTTPException(status_code=400, detail="lat/lon 또는 distance_km 중 하나를 지정해야 합니다.")
+    eta = await get_route_eta(db, route_id, speed_kmh, lat, lon, distance_km, limit)
+    if not eta:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return eta
+
+# 좌표 기준 최근접 waypoint / 항로 / 항구 조회 (radius_km를 주면 그 반경 이내만)
+@router.get("/nearest")
+async def get_nearest(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    kind: str = Query("waypoint", description="waypoint: 최근접 waypoint, route: 최근접 항로, location: 최근접 항구"),
+    k: int = Query(5, ge=1, le=NEAREST_MAX_RESULTS),
+    radius_km: Optional[float] = Query(None, gt=0),
+    db: AsyncSession = Depends(get_db)
+):
+    if kind not in ("waypoint", "route", "location"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 조회 종류입니다: {kind}")
+    return await find_nearest(db, lat, lon, kind, k, radius_km)
+
+@router.get("/nearest/stats")
+async def read_spatial_index_stats():
+    return spatial_index.stats()
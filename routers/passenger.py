@@ -1,14 +1,67 @@
 # /routers/passenger.py
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import get_db
-from services.passenger_service import get_passenger_by_id, get_all_passengers_decrypted,process_and_save_csv
-from models.schemas import PassengerOut
-from typing import List
+from services.passenger_service import (
+    get_passenger_by_id,
+    get_all_passengers_decrypted,
+    get_passengers_page,
+    search_passengers,
+    stream_passengers_ndjson,
+    passenger_cache,
+    PASSENGER_PAGE_MAX,
+)
+from services.ingestion_service import ingest_passenger_csv, sync_passenger_csv, CSV_CHUNK_SIZE
+from services.upload_job_service import upload_job_queue, get_upload_job
+from models.schemas import PassengerOut, PassengerPage, UploadJobOut
+from typing import List, Optional
+from datetime import date
 
 router = APIRouter()
 
+# 승객 페이지 조회 (/{passenger_id}보다 먼저 선언해야 경로가 가려지지 않음)
+@router.get("/page", response_model=PassengerPage)
+async def read_passengers_page(
+    admin_id: int = Query(..., description="로그인한 관리자의 ID"),
+    cursor: Optional[int] = Query(None, description="이전 페이지 응답의 next_cursor"),
+    limit: int = Query(100, gt=0, le=PASSENGER_PAGE_MAX, description="페이지당 승객 수"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    passenger_id 기준 keyset 페이지네이션으로 승객을 복호화하여 반환합니다.
+    """
+    return await get_passengers_page(db, admin_id, cursor, limit)
+
+# 승객 NDJSON 스트리밍
+@router.get("/stream")
+async def stream_passengers(admin_id: int = Query(..., description="로그인한 관리자의 ID")):
+    """
+    승객을 복호화되는 대로 한 줄에 한 명씩(NDJSON) 스트리밍합니다.
+    """
+    return StreamingResponse(stream_passengers_ndjson(admin_id), media_type="application/x-ndjson")
+
+# 전화번호/생년월일로 승객 검색
+@router.get("/search", response_model=List[PassengerOut])
+async def search_passenger(
+    admin_id: int = Query(..., description="로그인한 관리자의 ID"),
+    phone: Optional[str] = Query(None, description="전화번호 (하이픈 유무 무관)"),
+    birth: Optional[date] = Query(None, description="생년월일 (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    암호화된 전화번호/생년월일을 blind index로 일치 검색하여, 일치하는 승객만 복호화해 반환합니다.
+    """
+    if phone is None and birth is None:
+        raise HTTPException(status_code=400, detail="phone 또는 birth 중 하나 이상을 입력하세요.")
+    return await search_passengers(db, admin_id, phone, birth)
+
+# 복호화 캐시 적중률 확인용
+@router.get("/cache/stats")
+async def read_passenger_cache_stats():
+    return passenger_cache.stats()
+
 # 기존 라우터: 특정 승객 조회
 @router.get("/{passenger_id}", response_model=PassengerOut)
 async def read_passenger(passenger_id: int, db: AsyncSession = Depends(get_db)):
@@ -33,17 +86,45 @@ async def read_all_passengers(
 async def upload_csv(
     file: UploadFile = File(...), 
     admin_id: int = Form(...), 
+    mode: str = Form("replace", description="replace(=stream): 명단 전체 교체, sync: 변경된 행만 반영"),
+    chunk_size: int = Form(CSV_CHUNK_SIZE, gt=0, description="청크(배치)당 행 수"),
     db: AsyncSession = Depends(get_db)
 ):
     """
     CSV 파일을 업로드하여 승객 정보를 암호화하고 DB에 저장합니다.
     """
+    if mode not in ("replace", "stream", "sync"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 업로드 모드입니다: {mode}")
+
     try:
-        # 파일 내용을 읽음
-        file_data = await file.read()
-        
-        # 서비스 함수 호출
-        result = await process_and_save_csv(db, file_data, admin_id)
-        return result
+        if mode == "sync":
+            return await sync_passenger_csv(db, file.file, admin_id)
+
+        # 파일 전체를 읽지 않고 업로드 임시 파일에서 청크 단위로 처리
+        return await ingest_passenger_csv(db, file.file, admin_id, chunk_size)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"파일 처리 중 오류 발생: {e}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"파일 처리 중 오류 발생: {e}")
+
+# CSV 업로드 작업 등록 (즉시 job_id 반환, 백그라운드 워커에서 처리)
+@router.post("/upload-jobs", status_code=202)
+async def create_upload_job(
+    file: UploadFile = File(...),
+    admin_id: int = Form(...),
+    mode: str = Form("replace", description="replace: 명단 전체 교체, sync: 변경된 행만 반영"),
+    chunk_size: int = Form(CSV_CHUNK_SIZE, gt=0, description="청크(배치)당 행 수"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    CSV 파일을 저장하고 업로드 작업을 큐에 등록합니다. 진행 상황은 /upload-jobs/{job_id}로 조회합니다.
+    """
+    if mode not in ("replace", "sync"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 업로드 모드입니다: {mode}")
+    return await upload_job_queue.submit(db, file, admin_id, mode, chunk_size)
+
+# CSV 업로드 작업 상태 조회
+@router.get("/upload-jobs/{job_id}", response_model=UploadJobOut)
+async def read_upload_job(job_id: str, db: AsyncSession = Depends(get_db)):
+    job = await get_upload_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found")
+    return job
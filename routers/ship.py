@@ -1,22 +1,44 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from db import get_db
 from services.ship_service import get_all_ships_with_admin, create_ship
-from models.schemas import ShipWithAdminOut, ShipCreateRequest
+from services.ship_position_service import (
+    ingest_positions,
+    latest_positions,
+    position_buffer,
+    SHIP_POSITION_MAX_REQUEST,
+)
+from models.schemas import ShipWithPositionOut, ShipCreateRequest, ShipPositionBatch
 from typing import List
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ShipWithAdminOut])
-async def read_ships(db: AsyncSession = Depends(get_db)):
-    ships = await get_all_ships_with_admin(db)
+# include_position=true면 선박별 최신 위치(position)를 함께 반환
+@router.get("/", response_model=List[ShipWithPositionOut], response_model_exclude_unset=True)
+async def read_ships(
+    include_position: bool = Query(False, description="최신 위치 포함 여부"),
+    db: AsyncSession = Depends(get_db)
+):
+    ships = await get_all_ships_with_admin(db, include_position)
     return ships
 
+# 선박 위치 일괄 보고. 최신 위치는 즉시 반영되고 이력은 묶어서 저장됩니다.
+@router.post("/positions", status_code=202)
+async def report_positions(batch: ShipPositionBatch, db: AsyncSession = Depends(get_db)):
+    if len(batch.positions) > SHIP_POSITION_MAX_REQUEST:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {SHIP_POSITION_MAX_REQUEST}건까지 보고할 수 있습니다.")
+    return await ingest_positions(db, batch.positions)
+
+@router.get("/positions/stats")
+async def read_position_stats():
+    return {"latest": latest_positions.stats(), "history": position_buffer.stats()}
+
 @router.post("/register")
 async def register_ship(request: ShipCreateRequest, db: AsyncSession = Depends(get_db)):
     return await create_ship(
         session=db,
         ship_no=request.ship_no,
         ship_name=request.ship_name,
-        admin_name=request.admin_name
+        admin_name=request.admin_name,
+        route_id=request.route_id
     )
\ No newline at end of file
@@ -5,6 +5,7 @@ from services.user_service import authenticate_admin, create_session, register_a
 from db import get_db
 from fastapi.security import OAuth2PasswordBearer
 from services.user_service import logout_admin 
+from services.auth_service import require_admin, auth_stats
 
 router = APIRouter()
 
@@ -52,4 +53,9 @@ async def logout_current_admin(
             detail="로그아웃 실패: 유효한 세션을 찾을 수 없습니다."
         )
     
-    return {"message": "로그아웃 성공"}
\ No newline at end of file
+    return {"message": "로그아웃 성공"}
+
+# 세션 캐시 적중률, 만료 세션 삭제 현황
+@router.get("/auth/stats", dependencies=[Depends(require_admin)])
+async def read_auth_stats():
+    return auth_stats()
@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from services.weather_service import (
     fetch_weather_by_route,
-    fetch_forecast_by_route
+    fetch_forecast_by_route,
+    fetch_forecast_timeline
 )
-from db import get_db
+from services.weather_cache import weather_cache
+from services.weather_prefetch import weather_prefetcher
+from services.weather_client import weather_client
+from services.weather_alerts import weather_alerts
+from services.weather_history import get_route_history, history_stats, weather_rollup
+from services.route_cache import route_cache
+from db import get_db, SessionLocal
 
 router = APIRouter()
+# SSE 스트림 전용. EventSource는 헤더를 보낼 수 없어 main.py에서 ?session_key=도 받는 인증을 따로 적용
+stream_router = APIRouter()
 
 # 현재 날씨 조회 
 @router.get("/route/{route_id}")
@@ -22,3 +34,83 @@ async def get_forecast_by_route(
 ):
     print(f"📡 Received route_id={route_id}, offset={offset}")
     return await fetch_forecast_by_route(session, route_id, offset)
+
+# 항로 전체 시간별 예보 - 모든 waypoint × 모든 시간을 열(column) 형식으로 한 번에 반환
+@router.get("/route/{route_id}/timeline")
+async def get_forecast_timeline(route_id: int, session: AsyncSession = Depends(get_db)):
+    return await fetch_forecast_timeline(session, route_id)
+
+# 날씨 응답 캐시 적중률/업스트림 호출 수
+@router.get("/cache/stats")
+async def get_weather_cache_stats():
+    return weather_cache.stats()
+
+# WeatherAPI 회로 차단기 상태, 업스트림 지연 시간/결과, 캐시(오래된 값 반환 포함) 통계
+@router.get("/metrics")
+async def get_weather_metrics():
+    return {**weather_client.stats(), "cache": weather_cache.stats()}
+
+# 출항 선박 항로 날씨 미리 조회 현황
+@router.get("/prefetch/stats")
+async def get_weather_prefetch_stats():
+    return weather_prefetcher.stats()
+
+# 미리 조회를 즉시 한 번 실행 (주기와 별개)
+@router.post("/prefetch/run")
+async def run_weather_prefetch():
+    return await weather_prefetcher.run_once()
+
+# 위험 상태 변화 실시간 알림 (SSE). route_id가 없으면 전체 선단
+#   event: snapshot (연결 직후 현재 상태) / danger (위험 ↔ 안전 전환) / summary (주기별 항로 요약)
+@stream_router.get("/alerts/stream")
+async def stream_weather_alerts(
+    request: Request,
+    route_id: Optional[int] = Query(None, description="항로 ID (생략 시 출항 중인 전체 항로)"),
+):
+    # 스트림이 끝날 때까지 요청 의존성(get_db)의 연결이 잡혀 있지 않도록 항로 확인은 별도 세션에서 끝냄
+    if route_id is not None:
+        async with SessionLocal() as db:
+            geometry = await route_cache.get(db, route_id)
+        if not geometry:
+            raise HTTPException(status_code=404, detail="해당 경로의 waypoint를 찾을 수 없습니다.")
+    subscriber = await weather_alerts.subscribe(route_id)
+    return StreamingResponse(
+        weather_alerts.stream(subscriber, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# 현재 위험 waypoint와 항로별 요약 (스트림 없이 한 번 조회)
+@router.get("/alerts")
+async def get_weather_alerts(route_id: Optional[int] = Query(None)):
+    return weather_alerts.snapshot(route_id)
+
+@router.get("/alerts/stats")
+async def get_weather_alert_stats():
+    return weather_alerts.stats()
+
+# 항로 관측 이력 (waypoint × 시간 열 형식). from/to는 시간대가 없으면 KST, 생략 시 최근 24시간
+#   resolution: hour(시간별 관측) / day(일별 집계) / auto(짧은 최근 범위는 hour, 그 외 day)
+@router.get("/route/{route_id}/history")
+async def get_weather_history(
+    route_id: int,
+    from_: Optional[datetime] = Query(None, alias="from", description="시작 시각 (예: 2025-06-01T00:00)"),
+    to: Optional[datetime] = Query(None, description="끝 시각 (포함하지 않음)"),
+    resolution: str = Query("auto", description="auto, hour, day"),
+    session: AsyncSession = Depends(get_db)
+):
+    if resolution not in ("auto", "hour", "day"):
+        raise HTTPException(status_code=400, detail="resolution은 auto, hour, day 중 하나여야 합니다.")
+    try:
+        return await get_route_history(session, route_id, from_, to, resolution)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/history/stats")
+async def get_weather_history_stats():
+    return history_stats()
+
+# 일별 집계/오래된 시간별 관측 정리를 즉시 한 번 실행
+@router.post("/history/rollup")
+async def run_weather_history_rollup():
+    return await weather_rollup.run_once()
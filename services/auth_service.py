@@ -0,0 +1,197 @@
+# /services/auth_service.py
+# 세션 키 인증
+#   - 검증한 세션 키 → 관리자 정보를 TTL 캐시에 두어, 캐시 적중 시 DB를 조회하지 않습니다.
+#     (캐시 유효 시간은 SESSION_CACHE_TTL과 세션 만료 시각 중 먼저 오는 쪽)
+#   - 로그아웃(user_service.logout_admin) 시 즉시 캐시에서 제거합니다.
+#   - 만료된 sessions 행은 백그라운드에서 주기적으로 묶어서 삭제합니다.
+#   - require_admin: 라우터에 거는 FastAPI 의존성 (AUTH_ENABLED=false면 검사하지 않음)
+#     require_admin_stream: SSE용. 헤더 대신 ?session_key= 도 허용
+
+import asyncio
+import os
+import time
+from datetime import datetime
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import SessionLocal
+from models.tables import Admin, Session as DBSession
+from services.cache_utils import TTLCache
+
+AUTH_ENABLED = os.getenv("AUTH_ENABLED", "false").lower() in ("1", "true", "yes")
+# 검증한 세션 키를 캐시하는 시간(초). 캐시는 프로세스(워커)마다 따로 있으므로
+# 다른 워커/인스턴스에서 한 로그아웃은 이 시간이 지나야 반영됩니다. (로그아웃을 처리한 워커는 즉시 반영)
+SESSION_CACHE_TTL = float(os.getenv("SESSION_CACHE_TTL", "60"))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+# 존재하지 않는 세션 키도 잠깐 기억해 같은 잘못된 키로 DB를 반복 조회하지 않음 (키는 서버가 만드는 uuid라 나중에 유효해질 일이 없음)
+SESSION_CACHE_NEGATIVE_TTL = float(os.getenv("SESSION_CACHE_NEGATIVE_TTL", "30"))
+# 만료 세션 삭제 주기(초)와 한 번에 지우는 행 수
+SESSION_PURGE_INTERVAL = float(os.getenv("SESSION_PURGE_INTERVAL", "600"))
+SESSION_PURGE_BATCH_SIZE = int(os.getenv("SESSION_PURGE_BATCH_SIZE", "1000"))
+
+_INVALID = object()
+_MISS = object()
+
+
+class AuthAdmin:
+    """인증된 관리자 (DB 세션과 무관한 값이라 캐시에 보관 가능)"""
+
+    __slots__ = ("admin_id", "admin_name", "session_key", "expires_at")
+
+    def __init__(self, admin_id: int, admin_name: str, session_key: str, expires_at: datetime):
+        self.admin_id = admin_id
+        self.admin_name = admin_name
+        self.session_key = session_key
+        self.expires_at = expires_at
+
+
+session_cache = TTLCache(max_entries=SESSION_CACHE_MAX_ENTRIES, ttl=SESSION_CACHE_TTL)
+
+
+def _cached_session(session_key: str):
+    """캐시된 검증 결과. 유효하지 않은 키로 기억하면 None, 캐시에 없으면 _MISS"""
+    cached = session_cache.get(session_key, _MISS)
+    return None if cached is _INVALID else cached
+
+
+async def _load_session(db: AsyncSession, session_key: str) -> Optional[AuthAdmin]:
+    # 세션과 관리자를 한 번에 조회
+    result = await db.execute(
+        select(Admin.admin_id, Admin.admin_name, DBSession.expires_at)
+        .join(DBSession, DBSession.admin_id == Admin.admin_id)
+        .where(DBSession.session_key == session_key)
+    )
+    row = result.first()
+    now = datetime.utcnow()
+    if row is None or row.expires_at is None or row.expires_at <= now:
+        session_cache.set(session_key, _INVALID, ttl=SESSION_CACHE_NEGATIVE_TTL)
+        return None
+
+    admin = AuthAdmin(row.admin_id, row.admin_name, session_key, row.expires_at)
+    session_cache.set(session_key, admin, ttl=min(SESSION_CACHE_TTL, (row.expires_at - now).total_seconds()))
+    return admin
+
+
+async def validate_session_key(db: AsyncSession, session_key: str) -> Optional[AuthAdmin]:
+    """유효한 세션 키면 관리자 정보를, 없거나 만료됐으면 None을 반환합니다."""
+    cached = _cached_session(session_key)
+    return await _load_session(db, session_key) if cached is _MISS else cached
+
+
+def invalidate_session_key(session_key: str):
+    session_cache.invalidate(session_key)
+
+
+_bearer = OAuth2PasswordBearer(tokenUrl="/user/login", auto_error=False)
+
+
+async def _authenticate(session_key: Optional[str]) -> Optional[AuthAdmin]:
+    if not AUTH_ENABLED:
+        return None
+    admin = _cached_session(session_key) if session_key else None
+    if admin is _MISS:
+        # 캐시 미적중 때만 연결을 잠깐 빌림. 요청 의존성(get_db)을 쓰면 스트리밍 응답이 끝날 때까지 연결이 잡혀 있음
+        async with SessionLocal() as db:
+            admin = await _load_session(db, session_key)
+    if admin is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="유효한 세션이 필요합니다.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return admin
+
+
+async def require_admin(session_key: Optional[str] = Depends(_bearer)) -> Optional[AuthAdmin]:
+    """Authorization: Bearer <session_key> 검사. AUTH_ENABLED=false면 None을 반환하고 통과시킵니다."""
+    return await _authenticate(session_key)
+
+
+async def require_admin_stream(
+    header_key: Optional[str] = Depends(_bearer),
+    session_key: Optional[str] = Query(None, description="세션 키 (헤더를 보낼 수 없는 EventSource용)"),
+) -> Optional[AuthAdmin]:
+    """
+    SSE 엔드포인트용 require_admin. 브라우저 EventSource는 헤더를 설정할 수 없으므로
+    Authorization 헤더가 없으면 ?session_key= 쿼리 파라미터를 받습니다.
+    """
+    return await _authenticate(header_key or session_key)
+
+
+class SessionPurger:
+    """만료된 sessions 행을 SESSION_PURGE_BATCH_SIZE개씩 삭제합니다. (행 잠금 시간을 짧게 유지)"""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+        self.runs = 0
+        self.purged = 0
+        self.last_run_at: Optional[float] = None
+        self.last_purged = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> int:
+        now = datetime.utcnow()
+        purged = 0
+        async with SessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    select(DBSession.id).where(DBSession.expires_at <= now).limit(self.batch_size)
+                )
+                ids = list(result.scalars())
+                if not ids:
+                    break
+                await db.execute(delete(DBSession).where(DBSession.id.in_(ids)))
+                await db.commit()
+                purged += len(ids)
+                if len(ids) < self.batch_size:
+                    break
+        self.runs += 1
+        self.purged += purged
+        self.last_purged = purged
+        self.last_run_at = time.time()
+        return purged
+
+    async def _run(self):
+        while True:
+            try:
+                purged = await self.run_once()
+                if purged:
+                    print(f"[정보] 만료된 세션 {purged}건을 삭제했습니다.")
+            except Exception as e:
+                print(f"[오류] 만료 세션 삭제 실패: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "interval_seconds": self.interval,
+            "batch_size": self.batch_size,
+            "runs": self.runs,
+            "purged": self.purged,
+            "last_run_at": self.last_run_at,
+            "last_purged": self.last_purged,
+        }
+
+
+session_purger = SessionPurger(SESSION_PURGE_INTERVAL, SESSION_PURGE_BATCH_SIZE)
+
+
+def auth_stats() -> dict:
+    return {
+        "enabled": AUTH_ENABLED,
+        "cache": session_cache.stats(),
+        "purge": session_purger.stats(),
+    }
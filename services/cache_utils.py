@@ -0,0 +1,155 @@
+# /services/cache_utils.py
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    프로세스 내 LRU + TTL 캐시입니다.
+    항목 수(max_entries)와 추정 바이트 크기(max_bytes)로 용량을 제한하고,
+    가장 오래 사용되지 않은 항목부터 제거합니다. 태그 단위 일괄 무효화를 지원합니다.
+    이벤트 루프 한 곳에서만 사용하므로 별도의 잠금은 두지 않습니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof or (lambda value: 0)
+        self._clock = clock
+        # key -> (value, 만료 시각, 크기, 태그)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default=None, count: bool = True):
+        entry = self._entries.get(key)
+        if entry is None:
+            if count:
+                self.misses += 1
+            return default
+
+        value, expires_at, _, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.expirations += 1
+            if count:
+                self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value, tags: Iterable[Hashable] = (), ttl: Optional[float] = None):
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            # 단일 항목이 전체 용량보다 크면 캐시하지 않음
+            self.invalidate(key)
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (value, self._clock() + (self.ttl if ttl is None else ttl), size, tags)
+        self._bytes += size
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        if key in self._entries:
+            self._remove(key)
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        keys = self._tags.pop(tag, set())
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size, tags = self._entries.pop(key)
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SingleFlight:
+    """
+    같은 키에 대한 동시 로드를 한 번의 호출로 합칩니다.
+    먼저 들어온 요청이 loader를 실행하고, 실행 중에 들어온 요청은 그 결과(또는 예외)를 함께 받습니다.
+    기다리던 요청 하나가 취소되어도 진행 중인 로드는 취소되지 않습니다.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
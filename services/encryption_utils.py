@@ -1,9 +1,16 @@
 # /services/encryption_utils.py
 
+import asyncio
 import json
 import base64
+import hashlib
+import hmac
 import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
 from Crypto.Cipher import AES, PKCS1_OAEP
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
@@ -12,6 +19,11 @@ from Crypto.Random import get_random_bytes
 PRIVATE_KEY_PATH = "keys/rsa_private.pem"
 PUBLIC_KEY_PATH = "keys/rsa_public.pem"
 
+# 암·복호화 프로세스 풀 설정 (0이면 프로세스 풀 없이 스레드에서 실행)
+CRYPTO_WORKERS = int(os.getenv("CRYPTO_WORKERS", str(os.cpu_count() or 1)))
+# 한 번에 워커로 넘기는 레코드 수
+CRYPTO_CHUNK_SIZE = int(os.getenv("CRYPTO_CHUNK_SIZE", "256"))
+
 # RSA 키 로드 (KMS 역할 시뮬레이션)
 try:
     with open(PRIVATE_KEY_PATH, "rb") as f:
@@ -23,46 +35,233 @@ except IOError as e:
     print(f"경로를 확인하세요: {PRIVATE_KEY_PATH}, {PUBLIC_KEY_PATH}")
     sys.exit()
 
-def encrypt_sensitive_data(data: dict):
+# 키 파싱은 프로세스당 한 번만 수행 (행마다 RSA.import_key를 반복하지 않음)
+_RSA_PUBLIC_CIPHER = PKCS1_OAEP.new(RSA.import_key(PUBLIC_KEY))
+_RSA_PRIVATE_CIPHER = PKCS1_OAEP.new(RSA.import_key(PRIVATE_KEY))
+
+
+def derive_key(label: bytes) -> bytes:
     """
-    민감 데이터를 AES로 암호화하고, AES 키는 RSA 공개 키로 암호화합니다.
+    RSA 개인 키에서 용도별 HMAC 키를 파생합니다. (별도 비밀 파일 없이 키 관리 일원화)
+    """
+    return hmac.new(PRIVATE_KEY, label, hashlib.sha256).digest()
+
+def keyed_digest(key: bytes, *parts) -> str:
+    """
+    필드 값들을 구분자로 이어 HMAC-SHA256 hex 문자열을 만듭니다.
+    """
+    message = "\x1f".join("" if part is None else str(part) for part in parts)
+    return hmac.new(key, message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+# CSV 재업로드 동기화용 행 식별/지문 키
+ROW_KEY_KEY = derive_key(b"passenger-row-key")
+ROW_FINGERPRINT_KEY = derive_key(b"passenger-row-fingerprint")
+
+# 암호화된 필드 검색용 blind index 키
+PHONE_INDEX_KEY = derive_key(b"passenger-phone-index")
+BIRTH_INDEX_KEY = derive_key(b"passenger-birth-index")
+
+
+def phone_blind_index(phone: Optional[str]) -> Optional[str]:
+    """전화번호의 숫자만 남겨 HMAC을 계산합니다. (010-1234-5678 == 01012345678)"""
+    digits = re.sub(r"\D", "", phone or "")
+    return keyed_digest(PHONE_INDEX_KEY, digits) if digits else None
+
+def birth_blind_index(birth: Optional[str]) -> Optional[str]:
+    """생년월일(YYYY-MM-DD)의 HMAC을 계산합니다."""
+    return keyed_digest(BIRTH_INDEX_KEY, birth) if birth else None
+
+# 행 단위 RSA 대신 업로드 단위 데이터 키(DEK)로 암호화할지 여부 (envelope encryption)
+ENVELOPE_ENCRYPTION = os.getenv("ENVELOPE_ENCRYPTION", "true").lower() == "true"
+
+# 암호화 blob 포맷
+# - 레거시: encrypted_data = JSON({ciphertext, nonce, tag} base64), encrypted_aes_key = base64(RSA 래핑 키)
+# - v1   : encrypted_data = [0x01][nonce 16B][tag 16B][ciphertext] (AES-EAX), encrypted_aes_key = RSA 래핑 키 원본 바이트
+# - v2   : encrypted_data = [0x02][nonce 12B][tag 16B][ciphertext] (AES-GCM), 키는 passenger_keys의 DEK
+BLOB_FORMAT_V1 = 0x01
+BLOB_FORMAT_V2 = 0x02
+BLOB_FORMAT_LEGACY = 0x7B  # '{'
+_NONCE_SIZES = {BLOB_FORMAT_V1: 16, BLOB_FORMAT_V2: 12}
+_TAG_SIZE = 16
+
+
+def pack_blob(nonce: bytes, tag: bytes, ciphertext: bytes, version: int = BLOB_FORMAT_V1) -> bytes:
+    return bytes([version]) + nonce + tag + ciphertext
+
+def unpack_blob(encrypted_data_blob: bytes, encrypted_aes_key_blob: Optional[bytes]):
+    """
+    저장된 blob을 (포맷 버전, nonce, tag, ciphertext, 래핑된 AES 키)로 분해합니다.
+    레거시 JSON 포맷과 v1/v2 바이너리 포맷을 모두 읽습니다. v2는 래핑된 키가 None입니다.
+    """
+    blob = bytes(encrypted_data_blob)
+    version = blob[0]
+    if version == BLOB_FORMAT_LEGACY:
+        enc_data = {k: base64.b64decode(v) for k, v in json.loads(blob.decode('utf-8')).items()}
+        return (
+            BLOB_FORMAT_LEGACY,
+            enc_data['nonce'],
+            enc_data['tag'],
+            enc_data['ciphertext'],
+            base64.b64decode(encrypted_aes_key_blob),
+        )
+
+    nonce_size = _NONCE_SIZES.get(version)
+    if nonce_size is None:
+        raise ValueError(f"알 수 없는 암호화 포맷 버전입니다: {version}")
+
+    body = memoryview(blob)[1:]
+    nonce = bytes(body[:nonce_size])
+    tag = bytes(body[nonce_size:nonce_size + _TAG_SIZE])
+    ciphertext = bytes(body[nonce_size + _TAG_SIZE:])
+    wrapped_key = bytes(encrypted_aes_key_blob) if version == BLOB_FORMAT_V1 else None
+    return version, nonce, tag, ciphertext, wrapped_key
+
+def is_legacy_blob(encrypted_data_blob: bytes) -> bool:
+    return encrypted_data_blob[:1] == bytes([BLOB_FORMAT_LEGACY])
+
+def convert_legacy_blob(encrypted_data_blob: bytes, encrypted_aes_key_blob: bytes):
+    """
+    레거시 JSON 포맷을 v1 바이너리 포맷으로 재포장합니다. (복호화 없이 바이트만 재배열)
+    """
+    _, nonce, tag, ciphertext, wrapped_key = unpack_blob(encrypted_data_blob, encrypted_aes_key_blob)
+    return pack_blob(nonce, tag, ciphertext), wrapped_key
+
+
+def generate_data_key():
+    """
+    업로드 단위 데이터 키(DEK)를 생성합니다. (원본 키, RSA로 래핑된 키)를 반환합니다.
+    """
+    data_key = get_random_bytes(32)
+    return data_key, _RSA_PUBLIC_CIPHER.encrypt(data_key)
+
+def unwrap_data_key(wrapped_data_key: bytes) -> bytes:
+    return _RSA_PRIVATE_CIPHER.decrypt(bytes(wrapped_data_key))
+
+
+def encrypt_sensitive_data(data: dict, data_key: Optional[bytes] = None):
+    """
+    민감 데이터를 AES로 암호화합니다.
+    data_key가 없으면 행마다 새 AES 키를 만들어 RSA 공개 키로 래핑하고(v1),
+    data_key가 주어지면 해당 DEK와 고유 nonce로 AES-GCM 암호화합니다(v2).
     """
-    aes_key = get_random_bytes(32)  # 256-bit AES
-    
     data_bytes = json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    if data_key is not None:
+        cipher = AES.new(data_key, AES.MODE_GCM, nonce=get_random_bytes(_NONCE_SIZES[BLOB_FORMAT_V2]))
+        ciphertext, tag = cipher.encrypt_and_digest(data_bytes)
+        return {
+            'encrypted_data': pack_blob(cipher.nonce, tag, ciphertext, BLOB_FORMAT_V2),
+            'encrypted_aes_key': None
+        }
+
+    aes_key = get_random_bytes(32)  # 256-bit AES
     cipher = AES.new(aes_key, AES.MODE_EAX)
     ciphertext, tag = cipher.encrypt_and_digest(data_bytes)
-    
-    aes_encrypted = {
-        'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
-        'nonce': base64.b64encode(cipher.nonce).decode('utf-8'),
-        'tag': base64.b64encode(tag).decode('utf-8')
-    }
-    
-    rsa_cipher = PKCS1_OAEP.new(RSA.import_key(PUBLIC_KEY))
-    encrypted_aes_key = rsa_cipher.encrypt(aes_key)
-    
+
     return {
-        'encrypted_data': json.dumps(aes_encrypted).encode('utf-8'),
-        'encrypted_aes_key': base64.b64encode(encrypted_aes_key)
+        'encrypted_data': pack_blob(cipher.nonce, tag, ciphertext),
+        'encrypted_aes_key': _RSA_PUBLIC_CIPHER.encrypt(aes_key)
     }
 
-def decrypt_sensitive_data(encrypted_data_blob: bytes, encrypted_aes_key_blob: bytes):
+def decrypt_sensitive_data(encrypted_data_blob: bytes, encrypted_aes_key_blob: Optional[bytes], data_key: Optional[bytes] = None):
     """
-    암호화된 데이터를 RSA 개인 키로 복호화합니다.
+    암호화된 데이터를 복호화합니다. (레거시/v1은 RSA 개인 키, v2는 전달받은 DEK 사용)
     """
     try:
-        rsa_cipher = PKCS1_OAEP.new(RSA.import_key(PRIVATE_KEY))
-        encrypted_aes_key = base64.b64decode(encrypted_aes_key_blob)
-        aes_key = rsa_cipher.decrypt(encrypted_aes_key)
-
-        enc_data_decoded = json.loads(encrypted_data_blob.decode('utf-8'))
-        enc_data = {k: base64.b64decode(v) for k, v in enc_data_decoded.items()}
-        
-        cipher = AES.new(aes_key, AES.MODE_EAX, nonce=enc_data['nonce'])
-        data_bytes = cipher.decrypt_and_verify(enc_data['ciphertext'], enc_data['tag'])
-        
+        version, nonce, tag, ciphertext, wrapped_key = unpack_blob(encrypted_data_blob, encrypted_aes_key_blob)
+
+        if version == BLOB_FORMAT_V2:
+            if data_key is None:
+                raise ValueError("v2 데이터 복호화에 필요한 데이터 키가 없습니다.")
+            cipher = AES.new(data_key, AES.MODE_GCM, nonce=nonce)
+        else:
+            aes_key = _RSA_PRIVATE_CIPHER.decrypt(wrapped_key)
+            cipher = AES.new(aes_key, AES.MODE_EAX, nonce=nonce)
+
+        data_bytes = cipher.decrypt_and_verify(ciphertext, tag)
         return json.loads(data_bytes.decode('utf-8'))
     except Exception as e:
         print(f"복호화 중 오류 발생: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# 프로세스 풀 워커에서 실행되는 배치 함수 (pickle 가능하도록 모듈 최상위에 정의)
+def _encrypt_chunk(records: List[dict], data_key: Optional[bytes]) -> List[dict]:
+    return [encrypt_sensitive_data(record, data_key) for record in records]
+
+def _decrypt_chunk(items: List[Tuple[bytes, Optional[bytes], Optional[int]]], data_keys: Dict[int, bytes]) -> List[Optional[dict]]:
+    return [decrypt_sensitive_data(data, key, data_keys.get(key_id)) for data, key, key_id in items]
+
+def _unwrap_chunk(wrapped_keys: List[bytes]) -> List[bytes]:
+    return [unwrap_data_key(wrapped) for wrapped in wrapped_keys]
+
+
+class CryptoEngine:
+    """
+    승객 데이터 암·복호화를 배치 단위로 프로세스 풀에서 실행합니다.
+    RSA/AES 연산이 이벤트 루프를 막지 않도록 async 핸들러에서는 이 엔진을 사용합니다.
+    """
+
+    def __init__(self, max_workers: int = CRYPTO_WORKERS, chunk_size: int = CRYPTO_CHUNK_SIZE):
+        self.max_workers = max(0, max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.max_workers == 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def _run_chunked(self, func, items: list, *args) -> list:
+        if not items:
+            return []
+
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        executor = self._get_executor()
+
+        if executor is None:
+            results = [await asyncio.to_thread(func, chunk, *args) for chunk in chunks]
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(executor, func, chunk, *args) for chunk in chunks)
+                )
+            except BrokenProcessPool:
+                # 워커가 비정상 종료된 경우 다음 호출에서 풀을 새로 만듭니다.
+                self._executor = None
+                raise
+
+        return [item for chunk in results for item in chunk]
+
+    async def encrypt_many(self, records: List[dict], data_key: Optional[bytes] = None) -> List[dict]:
+        """민감 데이터 딕셔너리 목록을 암호화합니다. 결과 순서는 입력 순서와 같습니다."""
+        return await self._run_chunked(_encrypt_chunk, list(records), data_key)
+
+    async def decrypt_many(
+        self,
+        items: List[Tuple[bytes, Optional[bytes], Optional[int]]],
+        data_keys: Optional[Dict[int, bytes]] = None,
+    ) -> List[Optional[dict]]:
+        """
+        (encrypted_data, encrypted_aes_key, key_id) 목록을 복호화합니다. 실패한 항목은 None입니다.
+        v2 행은 data_keys[key_id]의 DEK로 복호화합니다.
+        """
+        return await self._run_chunked(_decrypt_chunk, list(items), data_keys or {})
+
+    async def unwrap_data_keys(self, wrapped_keys: Dict[int, bytes]) -> Dict[int, bytes]:
+        """{key_id: 래핑된 DEK}를 RSA로 한 번씩만 풀어 {key_id: DEK}로 반환합니다."""
+        key_ids = list(wrapped_keys)
+        unwrapped = await self._run_chunked(_unwrap_chunk, [wrapped_keys[k] for k in key_ids])
+        return dict(zip(key_ids, unwrapped))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# 애플리케이션 전역 엔진
+crypto_engine = CryptoEngine()
@@ -0,0 +1,106 @@
+# /services/geo_utils.py
+# 위경도 거리 계산 공통 함수
+
+from math import radians, sin, cos, sqrt, atan2, hypot
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # 지구 반지름 (km)
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180  # 위도 1도의 거리 (km)
+# 단순화 시 이 길이 이하의 구간은 NumPy 대신 파이썬 루프로 처리
+_SIMPLIFY_SCALAR_SPAN = 64
+
+
+def calculate_distance(lat1, lon1, lat2, lon2):
+    R = EARTH_RADIUS_KM
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1 - a))
+    return R * c
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """calculate_distance의 배열 버전. 인자는 같은 길이의 배열(또는 스칼라)입니다."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def segment_distances(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """연속한 좌표 사이의 구간 거리(km). 길이는 좌표 수 - 1"""
+    return haversine_km(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+
+
+def cumulative_distances(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """시작점부터 각 좌표까지의 누적 거리(km). 첫 값은 0"""
+    cumulative = np.zeros(len(latitudes), dtype=np.float64)
+    if len(latitudes) > 1:
+        np.cumsum(segment_distances(latitudes, longitudes), out=cumulative[1:])
+    return cumulative
+
+
+def project_onto_polyline(latitudes: np.ndarray, longitudes: np.ndarray, lat: float, lon: float):
+    """
+    좌표를 폴리라인에서 가장 가까운 구간에 투영합니다. (기준점 주변 등장방형 평면 근사)
+    반환: (구간 시작 인덱스, 구간 안에서의 비율 0~1, 폴리라인까지의 거리 km)
+    """
+    scale = cos(radians(lat))
+    xs = (longitudes - lon) * scale
+    ys = latitudes - lat
+    if len(xs) < 2:
+        return 0, 0.0, float(hypot(xs[0], ys[0]) * KM_PER_DEG)
+
+    ax, ay = xs[:-1], ys[:-1]
+    dx, dy = xs[1:] - ax, ys[1:] - ay
+    length2 = dx * dx + dy * dy
+    t = np.divide(-(ax * dx + ay * dy), length2, out=np.zeros_like(length2), where=length2 > 0)
+    np.clip(t, 0.0, 1.0, out=t)
+    px, py = ax + t * dx, ay + t * dy
+    d2 = px * px + py * py
+
+    i = int(np.argmin(d2))
+    return i, float(t[i]), float(sqrt(d2[i]) * KM_PER_DEG)
+
+
+def simplify_indices(xs: np.ndarray, ys: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Douglas–Peucker 단순화 결과로 남길 좌표의 인덱스(오름차순)를 반환합니다.
+    거리는 입력 좌표계(경위도 도 단위) 기준의 평면 거리입니다. 시작/끝 점은 항상 남습니다.
+    """
+    n = len(xs)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    x_list, y_list = xs.tolist(), ys.tolist()
+    # 재귀 대신 스택으로 구간을 처리 (waypoint 수가 많아도 재귀 한도에 걸리지 않도록)
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        x0, y0 = x_list[start], y_list[start]
+        dx, dy = x_list[end] - x0, y_list[end] - y0
+        length = hypot(dx, dy)
+        if end - start <= _SIMPLIFY_SCALAR_SPAN:
+            # 짧은 구간은 NumPy 호출 오버헤드가 더 크므로 파이썬으로 계산
+            best, index = -1.0, start
+            for j in range(start + 1, end):
+                px, py = x_list[j] - x0, y_list[j] - y0
+                d = abs(dx * py - dy * px) / length if length else hypot(px, py)
+                if d > best:
+                    best, index = d, j
+        else:
+            px, py = xs[start + 1:end] - x0, ys[start + 1:end] - y0
+            distances = np.abs(dx * py - dy * px) / length if length else np.hypot(px, py)
+            i = int(np.argmax(distances))
+            best, index = float(distances[i]), start + 1 + i
+
+        if best > tolerance:
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return np.flatnonzero(keep)
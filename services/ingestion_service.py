@@ -0,0 +1,380 @@
+# /services/ingestion_service.py
+# 승객 CSV 적재 공통 모듈
+# HTTP 업로드(/passenger/upload-csv)와 CLI(data_ingestion.py)가 모두 이 모듈을 사용합니다.
+#   CSV 청크 파싱 → 열 단위 정규화/검증 → 프로세스 풀 병렬 암호화 → 배치 단위 벌크 INSERT
+
+from sqlalchemy import select, delete, insert, update, bindparam, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.tables import Passenger, PassengerKey
+from typing import Awaitable, Callable, Optional, List
+from services.encryption_utils import (
+    CryptoEngine,
+    crypto_engine,
+    generate_data_key,
+    keyed_digest,
+    phone_blind_index,
+    birth_blind_index,
+    ENVELOPE_ENCRYPTION,
+    ROW_KEY_KEY,
+    ROW_FINGERPRINT_KEY,
+)
+from services.passenger_service import invalidate_admin_passengers
+from collections import defaultdict
+import asyncio
+import os
+import pandas as pd
+
+# 한 번에 파싱/암호화/삽입하는 행 수 (배치 크기)
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "1000"))
+# 응답에 포함할 거부 행 상세 최대 개수 (건수는 전체 집계)
+MAX_REJECTED_DETAILS = 100
+
+# 청크 처리 후 호출되는 진행 상황 콜백 (업로드 작업 상태 갱신 등)
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+REQUIRED_COLUMNS = ['이름', '성별', '생년월일', '전화번호', '지병여부', '직업']
+_GENDER_CODES = {'male': 'M', 'female': 'F'}
+# 생년월일은 연-월-일 순서만 허용합니다. (구분자 - / . 또는 YYYYMMDD, 뒤에 붙은 시각은 무시)
+# 01/02/1990처럼 순서가 모호한 값은 추측하지 않고 형식 오류로 거부합니다.
+_BIRTH_PATTERN = (
+    r'^(?P<y>\d{4})(?:[-./]\s*(?P<m>\d{1,2})[-./]\s*(?P<d>\d{1,2})\.?|(?P<m2>\d{2})(?P<d2>\d{2}))'
+    r'(?:[ T]\d{1,2}:\d{2}(?::\d{2})?)?$'
+)
+
+
+def parse_birth_dates(values: pd.Series) -> pd.Series:
+    """
+    생년월일 문자열 열을 날짜로 변환합니다. 허용하지 않는 형식이나 없는 날짜는 NaT입니다.
+    형식을 고정해 두므로 각 행의 결과가 같은 청크의 다른 행(청크 경계)에 영향받지 않습니다.
+    """
+    parts = values.str.strip().str.extract(_BIRTH_PATTERN)
+    month = parts['m'].fillna(parts['m2'])
+    day = parts['d'].fillna(parts['d2'])
+    return pd.to_datetime(parts['y'] + '-' + month + '-' + day, format='%Y-%m-%d', errors='coerce')
+
+
+async def create_upload_key(db: AsyncSession, admin_id: int):
+    """
+    업로드 단위 데이터 키를 만들어 passenger_keys에 저장하고 (key_id, DEK)를 반환합니다.
+    envelope 암호화가 꺼져 있으면 (None, None)을 반환하여 행 단위 RSA 방식으로 암호화합니다.
+    """
+    if not ENVELOPE_ENCRYPTION:
+        return None, None
+
+    data_key, wrapped_key = generate_data_key()
+    upload_key = PassengerKey(admin_id=admin_id, encrypted_dek=wrapped_key)
+    db.add(upload_key)
+    await db.flush()
+    return upload_key.key_id, data_key
+
+
+def normalize_passenger_chunk(df: pd.DataFrame):
+    """
+    CSV 청크를 열 단위(벡터화)로 정규화/검증합니다.
+    (정상 행 DataFrame, 거부된 행 목록)을 반환합니다. 행 번호는 헤더를 포함한 CSV 줄 번호입니다.
+    """
+    names = df['이름'].str.strip()
+    birth = parse_birth_dates(df['생년월일'])
+
+    df = df.assign(
+        passenger_name=names,
+        gender_code=df['성별'].str.strip().str.lower().map(_GENDER_CODES).fillna('Other'),
+        is_sick=df['지병여부'].str.strip().str.lower() == 'true',
+        birth=birth.dt.strftime('%Y-%m-%d'),
+        contact=df['전화번호'].str.strip(),
+        job=df['직업'].str.strip().replace({'': None}),
+    )
+
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    reasons[birth.isna()] = "생년월일 형식 오류"
+    reasons[names.eq('')] = "이름 누락"
+    invalid = reasons.notna()
+
+    rejected = [
+        {"row": int(index) + 2, "reason": reason}
+        for index, reason in reasons[invalid].items()
+    ]
+    return df[~invalid], rejected
+
+
+def row_hashes(name, gender, job, birth, contact, is_sick) -> dict:
+    """
+    정규화된 승객 1명의 HMAC 값들을 계산합니다.
+    - row_key / row_fingerprint: CSV 재업로드 동기화용 (이름+생년월일 / 전체 필드)
+    - phone_bidx / birth_bidx: 암호화된 전화번호/생년월일 검색용 blind index
+    """
+    return {
+        "row_key": keyed_digest(ROW_KEY_KEY, name, birth),
+        "row_fingerprint": keyed_digest(ROW_FINGERPRINT_KEY, name, gender, job, birth, contact, bool(is_sick)),
+        "phone_bidx": phone_blind_index(contact),
+        "birth_bidx": birth_blind_index(birth),
+    }
+
+
+def add_row_fingerprints(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    정규화된 행마다 동기화용 지문과 검색용 blind index를 계산해 컬럼으로 추가합니다.
+    """
+    hashes = [
+        row_hashes(name, gender, job, birth, contact, is_sick)
+        for name, gender, job, birth, contact, is_sick in zip(
+            df['passenger_name'], df['gender_code'], df['job'], df['birth'], df['contact'], df['is_sick']
+        )
+    ]
+    return df.assign(**{
+        column: [h[column] for h in hashes]
+        for column in ("row_key", "row_fingerprint", "phone_bidx", "birth_bidx")
+    })
+
+
+def _passenger_rows(df: pd.DataFrame, encrypted_rows: List[dict], admin_id: int, key_id: Optional[int]) -> List[dict]:
+    return [
+        {
+            "passenger_name": name,
+            "gender": gender,
+            "job": job,
+            "encrypted_data": blobs['encrypted_data'],
+            "encrypted_aes_key": blobs['encrypted_aes_key'],
+            "key_id": key_id,
+            "row_key": row_key,
+            "row_fingerprint": fingerprint,
+            "phone_bidx": phone_bidx,
+            "birth_bidx": birth_bidx,
+            "admin_id": admin_id,
+        }
+        for name, gender, job, row_key, fingerprint, phone_bidx, birth_bidx, blobs in zip(
+            df['passenger_name'], df['gender_code'], df['job'], df['row_key'], df['row_fingerprint'],
+            df['phone_bidx'], df['birth_bidx'], encrypted_rows
+        )
+    ]
+
+
+def _sensitive_records(df: pd.DataFrame) -> List[dict]:
+    return [
+        {'생년월일': birth, '전화번호': contact, '지병여부': bool(is_sick)}
+        for birth, contact, is_sick in zip(df['birth'], df['contact'], df['is_sick'])
+    ]
+
+
+def read_passenger_csv(file, chunk_size: Optional[int] = None):
+    """
+    승객 CSV를 문자열 컬럼으로 읽습니다. (전화번호 앞자리 0 유지)
+    chunk_size를 주면 청크 단위 리더를 반환합니다.
+    """
+    return pd.read_csv(file, encoding='utf-8', dtype=str, keep_default_na=False, chunksize=chunk_size)
+
+
+def check_required_columns(df: pd.DataFrame):
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing)}")
+
+
+async def ingest_passenger_csv(
+    db: Optional[AsyncSession],
+    file,
+    admin_id: int,
+    chunk_size: int = CSV_CHUNK_SIZE,
+    dry_run: bool = False,
+    crypto: CryptoEngine = crypto_engine,
+    progress: Optional[ProgressCallback] = None,
+):
+    """
+    CSV 파일을 고정 크기 청크로 파싱 → 정규화 → 암호화 → 벌크 삽입하여 관리자의 승객 명단을 교체합니다.
+    전체 파일이나 ORM 객체를 메모리에 올리지 않으므로 파일 크기와 무관하게 메모리 사용량이 일정합니다.
+    기존 데이터 삭제와 모든 청크 삽입은 하나의 트랜잭션으로 처리되어, 실패 시 기존 명단이 유지됩니다.
+    dry_run이면 DB에 접근하지 않고(db=None 가능) 검증/암호화 결과만 집계합니다.
+    progress가 주어지면 청크마다 누적 행 수를 담아 호출합니다.
+    """
+    reader = read_passenger_csv(file, chunk_size)
+    try:
+        if dry_run:
+            # 실제 적재와 같은 암호화 경로를 거치도록 create_upload_key와 같은 조건으로 키를 준비
+            key_id, data_key = None, generate_data_key()[0] if ENVELOPE_ENCRYPTION else None
+        else:
+            await db.execute(delete(Passenger).filter(Passenger.admin_id == admin_id))
+            await db.execute(delete(PassengerKey).filter(PassengerKey.admin_id == admin_id))
+            key_id, data_key = await create_upload_key(db, admin_id)
+
+        chunks = []
+        rejected = []
+        rejected_count = 0
+        inserted_count = 0
+        while True:
+            # CSV 파싱은 동기 I/O이므로 스레드에서 실행
+            df = await asyncio.to_thread(next, reader, None)
+            if df is None:
+                break
+            check_required_columns(df)
+
+            valid, chunk_rejected = normalize_passenger_chunk(df)
+            valid = add_row_fingerprints(valid)
+            encrypted_rows = await crypto.encrypt_many(_sensitive_records(valid), data_key)
+
+            rows = _passenger_rows(valid, encrypted_rows, admin_id, key_id)
+            if rows and not dry_run:
+                await db.execute(insert(Passenger), rows)
+
+            chunks.append({
+                "chunk": len(chunks),
+                "rows": len(df),
+                "inserted": len(rows),
+                "rejected": len(chunk_rejected),
+            })
+            inserted_count += len(rows)
+            rejected_count += len(chunk_rejected)
+            rejected.extend(chunk_rejected[:MAX_REJECTED_DETAILS - len(rejected)])
+
+            if progress is not None:
+                await progress({
+                    "chunks": len(chunks),
+                    "processed": inserted_count + rejected_count,
+                    "inserted": inserted_count,
+                    "rejected": rejected_count,
+                })
+
+        if not dry_run:
+            await db.commit()
+            invalidate_admin_passengers(admin_id)
+        return {
+            "status": "dry-run" if dry_run else "success",
+            "message": f"{inserted_count}명의 승객 데이터가 성공적으로 {'검증' if dry_run else '저장'}되었습니다.",
+            "inserted": inserted_count,
+            "rejected_count": rejected_count,
+            "chunks": chunks,
+            "rejected": rejected,
+        }
+
+    except Exception as e:
+        if not dry_run:
+            await db.rollback()
+        raise e
+    finally:
+        reader.close()
+
+
+passenger_table = Passenger.__table__
+
+_sync_update_stmt = (
+    update(passenger_table)
+    .where(passenger_table.c.passenger_id == bindparam("b_passenger_id"))
+    .values(
+        passenger_name=bindparam("b_passenger_name"),
+        gender=bindparam("b_gender"),
+        job=bindparam("b_job"),
+        encrypted_data=bindparam("b_encrypted_data"),
+        encrypted_aes_key=bindparam("b_encrypted_aes_key"),
+        key_id=bindparam("b_key_id"),
+        row_key=bindparam("b_row_key"),
+        row_fingerprint=bindparam("b_row_fingerprint"),
+        phone_bidx=bindparam("b_phone_bidx"),
+        birth_bidx=bindparam("b_birth_bidx"),
+    )
+)
+
+
+async def sync_passenger_csv(
+    db: AsyncSession,
+    file,
+    admin_id: int,
+    crypto: CryptoEngine = crypto_engine,
+    progress: Optional[ProgressCallback] = None,
+):
+    """
+    재업로드된 CSV를 기존 명단과 비교하여 바뀐 행만 추가/수정/삭제합니다.
+    - row_fingerprint가 같은 행은 그대로 둡니다. (복호화/재암호화 없음)
+    - 지문은 다르지만 row_key(이름+생년월일)가 같은 행은 수정합니다.
+    - 나머지 새 행은 추가하고, 대응되는 새 행이 없는 기존 행은 삭제합니다.
+    파싱이 모두 끝난 뒤 하나의 트랜잭션으로 반영하므로, 실패 시 기존 명단이 그대로 유지됩니다.
+    """
+    df = await asyncio.to_thread(read_passenger_csv, file)
+    check_required_columns(df)
+
+    valid, rejected = normalize_passenger_chunk(df)
+    valid = add_row_fingerprints(valid).reset_index(drop=True)
+    if progress is not None:
+        await progress({"chunks": 1, "processed": len(df), "inserted": 0, "rejected": len(rejected)})
+
+    try:
+        result = await db.execute(
+            select(Passenger.passenger_id, Passenger.row_key, Passenger.row_fingerprint)
+            .filter(Passenger.admin_id == admin_id)
+        )
+        existing = result.all()
+
+        # 1) 지문이 같은 행 → 변경 없음 (중복 행은 개수만큼 짝지음)
+        by_fingerprint = defaultdict(list)
+        for row in existing:
+            by_fingerprint[row.row_fingerprint].append(row)
+
+        unmatched = []
+        unchanged_count = 0
+        for i, fingerprint in enumerate(valid['row_fingerprint']):
+            if by_fingerprint.get(fingerprint):
+                by_fingerprint[fingerprint].pop()
+                unchanged_count += 1
+            else:
+                unmatched.append(i)
+
+        # 2) 같은 승객(row_key)이 남아 있으면 수정, 없으면 추가
+        by_row_key = defaultdict(list)
+        for rows in by_fingerprint.values():
+            for row in rows:
+                by_row_key[row.row_key].append(row.passenger_id)
+
+        changed = []  # (passenger_id, 새 행 위치)
+        added = []
+        for i in unmatched:
+            candidates = by_row_key.get(valid.at[i, 'row_key'])
+            if candidates:
+                changed.append((candidates.pop(), i))
+            else:
+                added.append(i)
+
+        # 3) 짝이 없는 기존 행 → 삭제
+        removed = [passenger_id for ids in by_row_key.values() for passenger_id in ids]
+
+        # 바뀐 행만 암호화
+        to_encrypt = [i for _, i in changed] + added
+        if to_encrypt:
+            key_id, data_key = await create_upload_key(db, admin_id)
+            subset = valid.loc[to_encrypt]
+            encrypted_rows = await crypto.encrypt_many(_sensitive_records(subset), data_key)
+            rows = _passenger_rows(subset, encrypted_rows, admin_id, key_id)
+
+            updates = [
+                {f"b_{k}": v for k, v in row.items() if k != "admin_id"} | {"b_passenger_id": passenger_id}
+                for (passenger_id, _), row in zip(changed, rows[:len(changed)])
+            ]
+            if updates:
+                await db.execute(_sync_update_stmt, updates)
+            if len(rows) > len(changed):
+                await db.execute(insert(Passenger), rows[len(changed):])
+
+        if removed:
+            await db.execute(delete(Passenger).filter(Passenger.passenger_id.in_(removed)))
+
+        # 더 이상 참조되지 않는 업로드 키 정리
+        await db.execute(
+            delete(PassengerKey).filter(
+                PassengerKey.admin_id == admin_id,
+                ~exists().where(Passenger.key_id == PassengerKey.key_id),
+            )
+        )
+        await db.commit()
+        invalidate_admin_passengers(admin_id)
+
+    except Exception as e:
+        await db.rollback()
+        raise e
+
+    return {
+        "status": "success",
+        "message": f"추가 {len(added)}명, 수정 {len(changed)}명, 삭제 {len(removed)}명, 변경 없음 {unchanged_count}명",
+        "added": len(added),
+        "changed": len(changed),
+        "removed": len(removed),
+        "unchanged": unchanged_count,
+        "rejected_count": len(rejected),
+        "rejected": rejected[:MAX_REJECTED_DETAILS],
+    }
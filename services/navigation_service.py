@@ -1,77 +1,150 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from models.tables import Route, Waypoint
-from math import radians, sin, cos, sqrt, atan2
-
-async def get_route_geojson(db: AsyncSession, route_id: int):
-    print("요청된 route_id:", route_id)
-
-    result = await db.execute(
-        select(Waypoint).where(Waypoint.route_id == route_id).order_by(Waypoint.waypoint_order)
-    )
-    waypoints = result.scalars().all()
-    print("조회된 waypoint 수:", len(waypoints))
-    if not waypoints:
-        return None
+from services.geo_utils import calculate_distance, project_onto_polyline  # noqa: F401 (calculate_distance는 기존 import 경로 유지)
+from services.route_cache import route_cache, RouteGeometry, zoom_tolerance, tolerance_precision
+from services.spatial_index import spatial_index
 
-    geojson = {
-        "type": "FeatureCollection",
-        "features": [
-            {
-                "type": "Feature",
-                "properties": {
-                    "route_id": route_id
-                },
-                "geometry": {
-                    "type": "LineString",
-                    "coordinates": [
-                        [wp.longitude, wp.latitude] for wp in waypoints
-                    ]
-                }
-            }
-        ]
-    }
-    return geojson
+# 쾌속선 / 화물선 평균 속력 (km/h)
+SPEED_FAST = 40
+SPEED_CARGO = 25
+# /routes/info 한 번에 조회할 수 있는 최대 항로 수
+ROUTE_INFO_MAX_IDS = 200
+
+
+async def get_route_geojson(
+    db: AsyncSession,
+    route_id: int,
+    zoom: Optional[int] = None,
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+):
+    """
+    미리 직렬화된 GeoJSON 본문(bytes)을 반환합니다.
+    zoom 또는 tolerance(경위도 도 단위)를 주면 단순화된 LineString을 반환하며,
+    tolerance가 zoom보다 우선합니다. precision을 생략하면 허용 오차에 맞춰 정합니다.
+    """
+    if tolerance is None and zoom is not None:
+        tolerance = zoom_tolerance(zoom)
+    if precision is None and tolerance:
+        precision = tolerance_precision(tolerance)
+    return await route_cache.get_geojson(db, route_id, tolerance, precision)
+
+
+def _route_info(geometry: RouteGeometry):
+    total_distance = geometry.total_distance
 
+    duration_fast = total_distance / SPEED_FAST
+    duration_cargo = total_distance / SPEED_CARGO
+
+    return {
+        "route_id": geometry.route_id,
+        "departure": geometry.start_port,
+        "arrival": geometry.end_port,
+        "distance": f"{total_distance:.1f} km",
+        "duration_fast": f"{duration_fast:.1f} 시간",
+        "duration_cargo": f"{duration_cargo:.1f} 시간"
+    }
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371  # 지구 반지름 (km)
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a))
-    return R * c
 
 async def get_route_info(db: AsyncSession, route_id: int):
-    result = await db.execute(
-        select(Waypoint).where(Waypoint.route_id == route_id).order_by(Waypoint.waypoint_order)
-    )
-    waypoints = result.scalars().all()
-    if not waypoints:
+    geometry = await route_cache.get(db, route_id)
+    if not geometry or not geometry.exists:
         return None
+    return _route_info(geometry)
+
+
+async def get_routes_info(db: AsyncSession, route_ids: List[int]):
+    """
+    여러 항로의 거리/소요 시간을 한 번에 계산합니다.
+    캐시에 없는 항로는 한 번의 waypoint 조회로 적재하며, 결과는 요청한 순서를 따릅니다.
+    """
+    geometries = await route_cache.get_many(db, route_ids)
+    routes, missing = [], []
+    for route_id in dict.fromkeys(route_ids):
+        geometry = geometries.get(route_id)
+        if geometry and geometry.exists:
+            routes.append(_route_info(geometry))
+        else:
+            missing.append(route_id)
+    return {"routes": routes, "missing": missing}
 
-    total_distance = 0
-    for i in range(len(waypoints) - 1):
-        total_distance += calculate_distance(
-            waypoints[i].latitude, waypoints[i].longitude,
-            waypoints[i + 1].latitude, waypoints[i + 1].longitude
-        )
 
-    speed_fast = 40
-    speed_cargo = 25
-    duration_fast = total_distance / speed_fast
-    duration_cargo = total_distance / speed_cargo
+async def find_nearest(
+    db: AsyncSession,
+    lat: float,
+    lon: float,
+    kind: str,
+    k: int,
+    radius_km: Optional[float] = None,
+):
+    """기준 좌표에서 가까운 waypoint/항로/항구를 공간 인덱스로 찾습니다."""
+    results = await spatial_index.nearest(db, lat, lon, kind, k, radius_km)
+    return {"latitude": lat, "longitude": lon, "kind": kind, "results": results}
 
-    route_row = await db.execute(select(Route).where(Route.id == route_id))
-    route = route_row.scalar()
-    if not route:
+
+async def get_route_eta(
+    db: AsyncSession,
+    route_id: int,
+    speed_kmh: float,
+    lat: Optional[float] = None,
+    lon: Optional[float] = None,
+    distance_km: Optional[float] = None,
+    limit: Optional[int] = None,
+):
+    """
+    현재 위치(lat/lon) 또는 출발지부터 이동한 거리(distance_km)와 속력으로
+    남은 거리, 도착 예정 시각, 앞으로 지날 waypoint별 도착 예정 시각을 계산합니다.
+    항로는 다시 계산하지 않고 캐시된 누적 거리 배열을 이진 탐색합니다.
+    """
+    geometry = await route_cache.get(db, route_id)
+    if not geometry:
         return None
 
+    cumulative = geometry.cumulative_km
+    total_distance = geometry.total_distance
+    off_route_km = None
+    if distance_km is None:
+        # 현재 위치를 가장 가까운 구간에 투영해 이동 거리를 구함
+        i, t, off_route_km = project_onto_polyline(geometry.latitudes, geometry.longitudes, lat, lon)
+        travelled = float(cumulative[i] + t * (cumulative[i + 1] - cumulative[i])) if len(cumulative) > 1 else 0.0
+    else:
+        travelled = min(max(distance_km, 0.0), total_distance)
+
+    remaining = total_distance - travelled
+    now = datetime.now(timezone.utc)
+
+    # 아직 지나지 않은 첫 waypoint 위치
+    start = int(np.searchsorted(cumulative, travelled, side="right"))
+    end = len(cumulative) if limit is None else min(len(cumulative), start + limit)
+    distances = (cumulative[start:end] - travelled).tolist()
+
+    upcoming = [
+        {
+            "waypoint_order": order,
+            "latitude": latitude,
+            "longitude": longitude,
+            "distance_km": round(distance, 3),
+            "eta_hours": round(distance / speed_kmh, 3),
+            "eta": (now + timedelta(hours=distance / speed_kmh)).isoformat(timespec="seconds"),
+        }
+        for order, latitude, longitude, distance in zip(
+            geometry.orders[start:end].tolist(),
+            geometry.latitudes[start:end].tolist(),
+            geometry.longitudes[start:end].tolist(),
+            distances,
+        )
+    ]
+
     return {
         "route_id": route_id,
-        "departure": route.start_port,
-        "arrival": route.end_port,
-        "distance": f"{total_distance:.1f} km",
-        "duration_fast": f"{duration_fast:.1f} 시간",
-        "duration_cargo": f"{duration_cargo:.1f} 시간"
+        "speed_kmh": speed_kmh,
+        "total_km": round(total_distance, 3),
+        "travelled_km": round(travelled, 3),
+        "remaining_km": round(remaining, 3),
+        "off_route_km": round(off_route_km, 3) if off_route_km is not None else None,
+        "eta_hours": round(remaining / speed_kmh, 3),
+        "eta": (now + timedelta(hours=remaining / speed_kmh)).isoformat(timespec="seconds"),
+        "upcoming_waypoints": upcoming,
     }
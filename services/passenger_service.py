@@ -1,112 +1,220 @@
 # /services/passenger_service.py
 
-from sqlalchemy import select, delete
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from models.tables import Passenger
+from models.tables import Passenger, PassengerKey
 from models.schemas import PassengerOut
-from services.encryption_utils import decrypt_sensitive_data
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date
-from services.encryption_utils import encrypt_sensitive_data, decrypt_sensitive_data
-import io
-import pandas as pd
+from services.encryption_utils import crypto_engine, phone_blind_index, birth_blind_index
+from services.cache_utils import TTLCache
+from db import SessionLocal
+import os
+
+# 페이지 조회 시 한 번에 반환할 수 있는 최대 승객 수
+PASSENGER_PAGE_MAX = 500
+# NDJSON 스트리밍 시 DB에서 가져와 한 번에 복호화하는 행 수
+PASSENGER_STREAM_BATCH = 200
+
+# 복호화된 승객 정보 캐시 설정
+PASSENGER_CACHE_TTL = float(os.getenv("PASSENGER_CACHE_TTL", "300"))
+PASSENGER_CACHE_MAX_ENTRIES = int(os.getenv("PASSENGER_CACHE_MAX_ENTRIES", "20000"))
+PASSENGER_CACHE_MAX_BYTES = int(os.getenv("PASSENGER_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+# PassengerOut 1건의 대략적인 메모리 크기 (객체/필드 오버헤드)
+_PASSENGER_OUT_OVERHEAD = 400
+
+
+def _estimate_size(value) -> int:
+    """캐시 용량 계산용 추정 크기 (PassengerOut 또는 그 목록)"""
+    records = value if isinstance(value, list) else [value]
+    return sum(
+        _PASSENGER_OUT_OVERHEAD + len(p.passenger_name or "") * 4 + len(p.contact or "") + len(p.job or "") * 4
+        for p in records
+    )
+
+
+# 키: ("passenger", passenger_id) / ("manifest", admin_id), 태그: ("admin", admin_id)
+passenger_cache = TTLCache(
+    max_entries=PASSENGER_CACHE_MAX_ENTRIES,
+    max_bytes=PASSENGER_CACHE_MAX_BYTES,
+    ttl=PASSENGER_CACHE_TTL,
+    sizeof=_estimate_size,
+)
+
+
+def invalidate_admin_passengers(admin_id: int) -> int:
+    """관리자의 승객 명단이 바뀌었을 때 해당 관리자의 캐시 항목을 모두 제거합니다."""
+    return passenger_cache.invalidate_tag(("admin", admin_id))
+
+
+async def load_data_keys(db: AsyncSession, condition) -> Dict[int, bytes]:
+    """
+    조건에 맞는 업로드 단위 데이터 키를 조회해 key_id마다 RSA 언래핑을 한 번만 수행합니다.
+    """
+    result = await db.execute(
+        select(PassengerKey.key_id, PassengerKey.encrypted_dek).where(condition)
+    )
+    wrapped_keys = {row.key_id: row.encrypted_dek for row in result}
+    if not wrapped_keys:
+        return {}
+    return await crypto_engine.unwrap_data_keys(wrapped_keys)
+
+
+async def decrypt_passengers(
+    db: AsyncSession,
+    passengers: List[Passenger],
+    data_keys: Optional[Dict[int, bytes]] = None,
+) -> List[Optional[dict]]:
+    """
+    승객 목록을 배치로 복호화합니다.
+    업로드 단위 데이터 키(v2)는 key_id마다 RSA 언래핑을 한 번만 수행합니다.
+    data_keys를 미리 넘기면 키 조회를 생략합니다.
+    """
+    if data_keys is None:
+        key_ids = {p.key_id for p in passengers if p.key_id is not None}
+        data_keys = await load_data_keys(db, PassengerKey.key_id.in_(key_ids)) if key_ids else {}
+
+    return await crypto_engine.decrypt_many(
+        [(p.encrypted_data, p.encrypted_aes_key, p.key_id) for p in passengers],
+        data_keys
+    )
+
+
+def to_passenger_out(passenger: Passenger, decrypted_data: dict) -> PassengerOut:
+    return PassengerOut(
+        passenger_id=passenger.passenger_id,
+        passenger_name=passenger.passenger_name,
+        gender=passenger.gender,
+        job=passenger.job,
+        birth=decrypted_data.get('생년월일'),
+        contact=decrypted_data.get('전화번호'),
+        special_needs=decrypted_data.get('지병여부')
+    )
+
 
 # 파라미터로 승객 조회
 async def get_passenger_by_id(db: AsyncSession, passenger_id: int) -> Optional[PassengerOut]:
+    cached = passenger_cache.get(("passenger", passenger_id))
+    if cached is not None:
+        return cached
+
     result = await db.execute(select(Passenger).filter(Passenger.passenger_id == passenger_id))
     passenger = result.scalar_one_or_none()
     
     if not passenger:
         return None
 
-    # 암호화된 데이터 복호화
-    decrypted_data = decrypt_sensitive_data(
-        passenger.encrypted_data,
-        passenger.encrypted_aes_key
-    )
+    # 암호화된 데이터 복호화 (프로세스 풀에서 실행)
+    [decrypted_data] = await decrypt_passengers(db, [passenger])
     
     if not decrypted_data:
         # 복호화 실패 시, 적절한 오류 처리
         return None
 
     # 복호화된 데이터와 평문 데이터를 결합
-    return PassengerOut(
-        passenger_id=passenger.passenger_id,
-        passenger_name=passenger.passenger_name,
-        gender=passenger.gender,
-        job=passenger.job,
-        birth=decrypted_data.get('생년월일'),
-        contact=decrypted_data.get('전화번호'),
-        special_needs=decrypted_data.get('지병여부')
-    )
+    passenger_out = to_passenger_out(passenger, decrypted_data)
+    passenger_cache.set(("passenger", passenger_id), passenger_out, tags=[("admin", passenger.admin_id)])
+    return passenger_out
 
 # 승객 조회
 async def get_all_passengers_decrypted(db: AsyncSession, admin_id:int) -> List[PassengerOut]:
     """모든 승객의 정보를 복호화하여 리스트로 반환합니다."""
-    
+    cached = passenger_cache.get(("manifest", admin_id))
+    if cached is not None:
+        return cached
+
     result = await db.execute(select(Passenger).filter(Passenger.admin_id == admin_id))
     passengers = result.scalars().all()
     
-    decrypted_passengers = []
-    for p in passengers:
-        decrypted_data = decrypt_sensitive_data(
-            p.encrypted_data,
-            p.encrypted_aes_key
-        )
-        
-        if decrypted_data:
-            decrypted_passengers.append(PassengerOut(
-                passenger_id=p.passenger_id,
-                passenger_name=p.passenger_name,
-                gender=p.gender,
-                job=p.job,
-                birth=decrypted_data.get('생년월일'),
-                contact=decrypted_data.get('전화번호'),
-                special_needs=decrypted_data.get('지병여부')
-            ))
-            
+    # 행 단위 복호화 대신 배치로 한 번에 복호화 (이벤트 루프를 막지 않음)
+    decrypted_rows = await decrypt_passengers(db, passengers)
+
+    decrypted_passengers = [
+        to_passenger_out(p, decrypted_data)
+        for p, decrypted_data in zip(passengers, decrypted_rows)
+        if decrypted_data
+    ]
+    passenger_cache.set(("manifest", admin_id), decrypted_passengers, tags=[("admin", admin_id)])
     return decrypted_passengers
 
 
-async def process_and_save_csv(db: AsyncSession, file_data: bytes, admin_id: int):
+# 승객 페이지 조회 (passenger_id 기준 keyset 페이지네이션)
+async def get_passengers_page(db: AsyncSession, admin_id: int, cursor: Optional[int], limit: int) -> dict:
+    """
+    cursor(이전 페이지의 마지막 passenger_id) 다음부터 limit명을 복호화하여 반환합니다.
+    다음 페이지가 없으면 next_cursor는 None입니다.
+    """
+    query = select(Passenger).filter(Passenger.admin_id == admin_id)
+    if cursor is not None:
+        query = query.filter(Passenger.passenger_id > cursor)
+    result = await db.execute(query.order_by(Passenger.passenger_id).limit(limit + 1))
+    passengers = result.scalars().all()
+
+    has_more = len(passengers) > limit
+    passengers = passengers[:limit]
+    decrypted_rows = await decrypt_passengers(db, passengers)
+
+    return {
+        "items": [
+            to_passenger_out(p, decrypted_data)
+            for p, decrypted_data in zip(passengers, decrypted_rows)
+            if decrypted_data
+        ],
+        "next_cursor": passengers[-1].passenger_id if has_more else None,
+    }
+
+
+# 승객 NDJSON 스트리밍
+async def stream_passengers_ndjson(admin_id: int, batch_size: int = PASSENGER_STREAM_BATCH):
     """
-    업로드된 CSV 파일을 읽고, 해당 관리자의 기존 데이터를 삭제한 후 DB에 일괄 저장합니다.
+    DB에서 승객을 passenger_id 순으로 스트리밍하면서 batch_size 단위로 복호화해 한 줄씩 내보냅니다.
+    응답이 끝날 때까지 연결을 유지해야 하므로 요청 의존성(get_db)과 별도의 세션을 사용합니다.
     """
-    try:
-        # admin_id에 해당하는 기존 승객 데이터만 삭제
-        await db.execute(delete(Passenger).filter(Passenger.admin_id == admin_id))
-        await db.commit()
-        print(f"[정보] 관리자 ID {admin_id}가 등록한 기존 승객 데이터가 삭제되었습니다.")
-        
-        df = pd.read_csv(io.BytesIO(file_data), encoding='utf-8')
-        
-        df['gender_code'] = df['성별'].apply(lambda x: 'M' if x.strip().lower() == 'male' else 'F' if x.strip().lower() == 'female' else 'Other')
-        df['is_sick'] = df['지병여부'].apply(lambda x: True if str(x).strip().lower() == 'true' else False)
-        
-        passenger_list = []
-        for index, row in df.iterrows():
-            sensitive_data = {
-                '생년월일': str(row['생년월일']),
-                '전화번호': str(row['전화번호']),
-                '지병여부': row['is_sick']
-            }
-            
-            encrypted_blobs = encrypt_sensitive_data(sensitive_data)
-            
-            new_passenger = Passenger(
-                passenger_name=row['이름'],
-                gender=row['gender_code'],
-                job=row['직업'],
-                encrypted_data=encrypted_blobs['encrypted_data'],
-                encrypted_aes_key=encrypted_blobs['encrypted_aes_key'],
-                admin_id=admin_id
+    async with SessionLocal() as db:
+        # 스트리밍 커서가 열려 있는 동안 같은 연결로 다른 쿼리를 보낼 수 없으므로 키를 먼저 준비
+        data_keys = await load_data_keys(db, PassengerKey.admin_id == admin_id)
+
+        result = await db.stream(
+            select(Passenger)
+            .filter(Passenger.admin_id == admin_id)
+            .order_by(Passenger.passenger_id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for passengers in result.scalars().partitions(batch_size):
+            decrypted_rows = await decrypt_passengers(db, passengers, data_keys)
+            yield "".join(
+                to_passenger_out(p, decrypted_data).json() + "\n"
+                for p, decrypted_data in zip(passengers, decrypted_rows)
+                if decrypted_data
             )
-            passenger_list.append(new_passenger)
 
-        db.add_all(passenger_list)
-        await db.commit()
-        return {"status": "success", "message": f"{len(passenger_list)}명의 승객 데이터가 성공적으로 저장되었습니다."}
 
-    except Exception as e:
-        await db.rollback()
-        raise e
\ No newline at end of file
+# 전화번호/생년월일 일치 검색 (blind index 사용)
+async def search_passengers(
+    db: AsyncSession,
+    admin_id: int,
+    phone: Optional[str] = None,
+    birth: Optional[date] = None,
+) -> List[PassengerOut]:
+    """
+    HMAC blind index 컬럼으로 일치하는 승객만 조회하여 해당 행만 복호화합니다.
+    """
+    query = select(Passenger).filter(Passenger.admin_id == admin_id)
+    if phone is not None:
+        phone_bidx = phone_blind_index(phone)
+        if phone_bidx is None:
+            return []
+        query = query.filter(Passenger.phone_bidx == phone_bidx)
+    if birth is not None:
+        query = query.filter(Passenger.birth_bidx == birth_blind_index(birth.isoformat()))
+
+    result = await db.execute(query.order_by(Passenger.passenger_id))
+    passengers = result.scalars().all()
+    decrypted_rows = await decrypt_passengers(db, passengers)
+
+    return [
+        to_passenger_out(p, decrypted_data)
+        for p, decrypted_data in zip(passengers, decrypted_rows)
+        if decrypted_data
+    ]
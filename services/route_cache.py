@@ -0,0 +1,252 @@
+# /services/route_cache.py
+# 항로(waypoint) 기하 정보 캐시
+# 항로는 거의 바뀌지 않지만 지도 화면이 계속 조회하므로, 항로마다 좌표 배열·누적 거리·
+# 미리 직렬화한 GeoJSON을 한 번만 만들어 두고 항로/날씨 서비스가 함께 사용합니다.
+# 처음 조회될 때 적재하며, waypoint를 수정했다면 invalidate()로 비워야 합니다.
+# 지도 축척(zoom)/허용 오차별로 단순화한 GeoJSON도 같은 캐시에 항로 태그로 함께 보관합니다.
+
+import asyncio
+import json
+import math
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.tables import Route, Waypoint
+from services.cache_utils import TTLCache
+from services.geo_utils import cumulative_distances, simplify_indices
+
+# DB를 직접 수정한 경우에도 결국 반영되도록 두는 만료 시간(초)
+ROUTE_CACHE_TTL = float(os.getenv("ROUTE_CACHE_TTL", "3600"))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "1000"))
+ROUTE_CACHE_MAX_BYTES = int(os.getenv("ROUTE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# 서버 시작 시 전체 항로를 미리 적재할지 여부
+ROUTE_CACHE_WARM = os.getenv("ROUTE_CACHE_WARM", "false").lower() in ("1", "true", "yes")
+# zoom으로 허용 오차를 정할 때 몇 픽셀 이내의 오차를 허용할지
+ROUTE_SIMPLIFY_PIXELS = float(os.getenv("ROUTE_SIMPLIFY_PIXELS", "1"))
+
+
+def zoom_tolerance(zoom: int) -> float:
+    """웹 지도(256px 타일) zoom 단계에서 ROUTE_SIMPLIFY_PIXELS 픽셀에 해당하는 경위도(도) 크기"""
+    return ROUTE_SIMPLIFY_PIXELS * 360 / (256 * 2 ** zoom)
+
+
+def tolerance_precision(tolerance: float) -> int:
+    """허용 오차보다 한 자리 더 정밀한 소수 자릿수 (좌표 반올림 기본값)"""
+    return min(max(math.ceil(-math.log10(tolerance)) + 1, 0), 10)
+
+
+def _render_geojson(route_id: int, coordinates: list, properties: Optional[dict] = None) -> bytes:
+    return json.dumps({
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "properties": {
+                    "route_id": route_id,
+                    **(properties or {})
+                },
+                "geometry": {
+                    "type": "LineString",
+                    "coordinates": coordinates
+                }
+            }
+        ]
+    }, separators=(",", ":")).encode()
+
+
+class RouteGeometry:
+    """
+    항로 하나의 기하 정보 (읽기 전용)
+    - orders / latitudes / longitudes: waypoint_order 순으로 정렬된 배열
+    - cumulative_km: 시작점부터 각 waypoint까지의 누적 거리 (첫 값은 0)
+    - geojson: /navigation/routes/{id} 응답 본문 (직렬화된 bytes)
+    """
+
+    __slots__ = ("route_id", "name", "start_port", "end_port",
+                 "orders", "latitudes", "longitudes", "cumulative_km", "geojson")
+
+    def __init__(self, route_id: int, route: Optional[Route], rows: List[Tuple[int, float, float]]):
+        self.route_id = route_id
+        self.name = route.name if route else None
+        self.start_port = route.start_port if route else None
+        self.end_port = route.end_port if route else None
+
+        self.orders = np.fromiter((r[0] for r in rows), dtype=np.int32, count=len(rows))
+        self.latitudes = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+        self.longitudes = np.fromiter((r[2] for r in rows), dtype=np.float64, count=len(rows))
+        self.cumulative_km = cumulative_distances(self.latitudes, self.longitudes)
+
+        self.geojson = _render_geojson(route_id, [[lon, lat] for _, lat, lon in rows])
+
+    @property
+    def exists(self) -> bool:
+        """routes 테이블에 항로 정보(출발/도착 항구)가 있는지 여부"""
+        return self.start_port is not None
+
+    @property
+    def total_distance(self) -> float:
+        return float(self.cumulative_km[-1])
+
+    def points(self) -> Iterator[Tuple[int, float, float]]:
+        """(waypoint_order, latitude, longitude)를 순서대로 반환"""
+        return zip(self.orders.tolist(), self.latitudes.tolist(), self.longitudes.tolist())
+
+    def render_simplified(self, tolerance: Optional[float], precision: Optional[int]) -> bytes:
+        """
+        Douglas–Peucker로 단순화하고 좌표를 precision 자리로 반올림한 GeoJSON 본문을 만듭니다.
+        tolerance가 없으면 모든 waypoint를 유지합니다.
+        """
+        indices = simplify_indices(self.longitudes, self.latitudes, tolerance or 0)
+        longitudes, latitudes = self.longitudes[indices], self.latitudes[indices]
+        if precision is not None:
+            longitudes, latitudes = longitudes.round(precision), latitudes.round(precision)
+
+        coordinates = np.column_stack((longitudes, latitudes)).tolist()
+        return _render_geojson(self.route_id, coordinates, {
+            "tolerance": tolerance,
+            "precision": precision,
+            "point_count": len(coordinates),
+            "original_point_count": len(self.orders),
+        })
+
+    def nbytes(self) -> int:
+        return (self.orders.nbytes + self.latitudes.nbytes + self.longitudes.nbytes
+                + self.cumulative_km.nbytes + len(self.geojson))
+
+
+def _waypoint_query():
+    return select(Waypoint.route_id, Waypoint.waypoint_order, Waypoint.latitude, Waypoint.longitude)
+
+
+class RouteGeometryCache:
+    def __init__(self):
+        self._cache = TTLCache(
+            max_entries=ROUTE_CACHE_MAX_ENTRIES,
+            max_bytes=ROUTE_CACHE_MAX_BYTES,
+            ttl=ROUTE_CACHE_TTL,
+            sizeof=lambda value: len(value) if isinstance(value, bytes) else value.nbytes(),
+        )
+        # 적재 도중 무효화되면 오래된 결과를 저장하지 않기 위한 세대 번호
+        self._generation = 0
+        # 항로가 무효화될 때 알림을 받을 함수 목록 (예: 공간 인덱스)
+        self._listeners: List[Callable[[Optional[int]], None]] = []
+
+    async def get(self, db: AsyncSession, route_id: int) -> Optional[RouteGeometry]:
+        """항로 기하 정보를 반환합니다. waypoint가 없는 항로는 None (캐시하지 않음)"""
+        geometry = self._cache.get(route_id)
+        if geometry is not None:
+            return geometry
+
+        generation = self._generation
+        result = await db.execute(
+            _waypoint_query().where(Waypoint.route_id == route_id).order_by(Waypoint.waypoint_order)
+        )
+        rows = [(r.waypoint_order, r.latitude, r.longitude) for r in result]
+        if not rows:
+            return None
+
+        route = (await db.execute(select(Route).where(Route.id == route_id))).scalar()
+        geometry = RouteGeometry(route_id, route, rows)
+        if generation == self._generation:
+            self._cache.set(route_id, geometry, tags=[("route", route_id)])
+        return geometry
+
+    async def get_geojson(
+        self,
+        db: AsyncSession,
+        route_id: int,
+        tolerance: Optional[float] = None,
+        precision: Optional[int] = None,
+    ) -> Optional[bytes]:
+        """
+        항로 GeoJSON 본문을 반환합니다. 둘 다 None이면 원본 해상도이고,
+        그 외에는 (tolerance, precision)별로 단순화한 결과를 캐시해 재사용합니다.
+        """
+        if tolerance is None and precision is None:
+            geometry = await self.get(db, route_id)
+            return geometry.geojson if geometry else None
+
+        if tolerance is not None:
+            # 임의의 실수 값마다 캐시 항목이 생기지 않도록 유효숫자 2자리로 맞춤
+            tolerance = float(f"{tolerance:.2g}")
+        key = ("simplified", route_id, tolerance, precision)
+        body = self._cache.get(key)
+        if body is not None:
+            return body
+
+        generation = self._generation
+        geometry = await self.get(db, route_id)
+        if not geometry:
+            return None
+        # 긴 항로는 단순화에 수십 ms가 걸릴 수 있으므로 이벤트 루프 밖에서 수행
+        body = await asyncio.to_thread(geometry.render_simplified, tolerance, precision)
+        if generation == self._generation:
+            self._cache.set(key, body, tags=[("route", route_id)])
+        return body
+
+    async def get_many(self, db: AsyncSession, route_ids: Iterable[int]) -> Dict[int, RouteGeometry]:
+        """
+        여러 항로를 한 번에 반환합니다. 캐시에 없는 항로는 한 번의 waypoint 조회로 적재합니다.
+        waypoint가 없는 항로는 결과에서 빠집니다.
+        """
+        geometries: Dict[int, RouteGeometry] = {}
+        missing = []
+        for route_id in dict.fromkeys(route_ids):
+            geometry = self._cache.get(route_id)
+            if geometry is not None:
+                geometries[route_id] = geometry
+            else:
+                missing.append(route_id)
+
+        if missing:
+            geometries.update(await self._load_many(db, missing))
+        return geometries
+
+    async def warm(self, db: AsyncSession) -> int:
+        """전체 항로를 한 번의 waypoint 조회로 적재합니다."""
+        return len(await self._load_many(db, None))
+
+    async def _load_many(self, db: AsyncSession, route_ids: Optional[List[int]]) -> Dict[int, RouteGeometry]:
+        generation = self._generation
+        route_query = select(Route)
+        waypoint_query = _waypoint_query().order_by(Waypoint.route_id, Waypoint.waypoint_order)
+        if route_ids is not None:
+            route_query = route_query.where(Route.id.in_(route_ids))
+            waypoint_query = waypoint_query.where(Waypoint.route_id.in_(route_ids))
+
+        routes = {route.id: route for route in (await db.execute(route_query)).scalars()}
+        grouped: Dict[int, List[Tuple[int, float, float]]] = {}
+        for r in await db.execute(waypoint_query):
+            grouped.setdefault(r.route_id, []).append((r.waypoint_order, r.latitude, r.longitude))
+
+        geometries = {
+            route_id: RouteGeometry(route_id, routes.get(route_id), rows)
+            for route_id, rows in grouped.items()
+        }
+        if generation == self._generation:
+            for route_id, geometry in geometries.items():
+                self._cache.set(route_id, geometry, tags=[("route", route_id)])
+        return geometries
+
+    def invalidate(self, route_id: Optional[int] = None):
+        """route_id를 주면 해당 항로(단순화 결과 포함)만, 생략하면 전체를 비웁니다."""
+        self._generation += 1
+        if route_id is None:
+            self._cache.clear()
+        else:
+            self._cache.invalidate_tag(("route", route_id))
+        for listener in self._listeners:
+            listener(route_id)
+
+    def add_invalidation_listener(self, listener: Callable[[Optional[int]], None]):
+        """invalidate(route_id)가 호출될 때 같은 인자로 listener를 호출합니다."""
+        self._listeners.append(listener)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+# 애플리케이션 전역 항로 캐시
+route_cache = RouteGeometryCache()
@@ -0,0 +1,278 @@
+# /services/route_import_service.py
+# 항로 일괄 등록 공통 모듈 (POST /navigation/routes/import, import_routes.py CLI 공용)
+#   GeoJSON LineString / GPX 트랙·경로 / CSV 파싱 → 검증 → Route + waypoint 다중 행 INSERT (한 트랜잭션)
+
+import io
+import json
+import math
+import os
+import xml.etree.ElementTree as ET
+from typing import List, Optional
+import pandas as pd
+from sqlalchemy import select, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.tables import Route, Waypoint
+from services.route_cache import route_cache
+
+ROUTE_IMPORT_FORMATS = ("geojson", "gpx", "csv")
+# waypoint 다중 행 INSERT 한 번에 넣을 행 수
+WAYPOINT_INSERT_BATCH = int(os.getenv("WAYPOINT_INSERT_BATCH", "1000"))
+
+_EXTENSIONS = {".geojson": "geojson", ".json": "geojson", ".gpx": "gpx", ".csv": "csv"}
+_CSV_LAT_COLUMNS = ("latitude", "lat")
+_CSV_LON_COLUMNS = ("longitude", "lon", "lng")
+
+
+def detect_format(filename: Optional[str], fmt: Optional[str] = None) -> str:
+    """fmt가 없으면 파일 확장자로 형식을 판단합니다."""
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        fmt = _EXTENSIONS.get(os.path.splitext(filename or "")[1].lower())
+    if fmt not in ROUTE_IMPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 항로 파일 형식입니다: {fmt or filename} (geojson, gpx, csv)")
+    return fmt
+
+
+def _route(name, start_port, end_port, points) -> dict:
+    return {"name": name, "start_port": start_port, "end_port": end_port, "points": points}
+
+
+def parse_geojson(data: bytes) -> List[dict]:
+    """FeatureCollection / Feature / geometry의 LineString(또는 MultiLineString)을 항로로 읽습니다."""
+    try:
+        doc = json.loads(data)
+    except ValueError as e:
+        raise ValueError(f"GeoJSON 파싱 실패: {e}")
+    if not isinstance(doc, dict):
+        raise ValueError("GeoJSON 객체가 아닙니다.")
+
+    if doc.get("type") == "FeatureCollection":
+        features = doc.get("features") or []
+    elif doc.get("type") == "Feature":
+        features = [doc]
+    else:
+        features = [{"type": "Feature", "properties": {}, "geometry": doc}]
+
+    routes = []
+    for feature in features:
+        props = feature.get("properties") or {}
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "LineString":
+            lines = [geometry.get("coordinates") or []]
+        elif geometry.get("type") == "MultiLineString":
+            lines = geometry.get("coordinates") or []
+        else:
+            lines = None
+
+        route = _route(props.get("name") or props.get("route_name"), props.get("start_port"), props.get("end_port"), None)
+        if lines is not None:
+            try:
+                # GeoJSON 좌표 순서는 [경도, 위도]
+                route["points"] = [(c[1], c[0]) for line in lines for c in line]
+            except (TypeError, IndexError, KeyError):
+                route["error"] = "좌표 형식 오류"
+        routes.append(route)
+    return routes
+
+
+def _local(tag: str) -> str:
+    """XML 네임스페이스를 뗀 태그 이름"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_gpx(data: bytes) -> List[dict]:
+    """GPX의 트랙(trk, 세그먼트는 이어 붙임)과 경로(rte)를 항로로 읽습니다."""
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError as e:
+        raise ValueError(f"GPX 파싱 실패: {e}")
+
+    routes = []
+    for element in root:
+        kind = _local(element.tag)
+        if kind not in ("trk", "rte"):
+            continue
+        name = next((child.text for child in element if _local(child.tag) == "name"), None)
+        point_tag = "trkpt" if kind == "trk" else "rtept"
+        route = _route(name.strip() if name else None, None, None, None)
+        try:
+            route["points"] = [
+                (float(pt.get("lat")), float(pt.get("lon")))
+                for pt in element.iter()
+                if _local(pt.tag) == point_tag
+            ]
+        except (TypeError, ValueError):
+            route["error"] = f"{point_tag}의 lat/lon 값이 올바르지 않습니다."
+        routes.append(route)
+    return routes
+
+
+def parse_route_csv(data: bytes) -> List[dict]:
+    """
+    CSV 한 행이 waypoint 하나입니다.
+    필수 컬럼: latitude(lat), longitude(lon/lng)
+    선택 컬럼: route_name(name), start_port, end_port, waypoint_order (route_name별로 항로를 나눔)
+    """
+    df = pd.read_csv(io.BytesIO(data), encoding="utf-8", dtype=str, keep_default_na=False)
+    df.columns = [c.strip().lower() for c in df.columns]
+    lat_col = next((c for c in _CSV_LAT_COLUMNS if c in df.columns), None)
+    lon_col = next((c for c in _CSV_LON_COLUMNS if c in df.columns), None)
+    if not lat_col or not lon_col:
+        raise ValueError("필수 컬럼이 없습니다: latitude, longitude")
+
+    name_col = next((c for c in ("route_name", "name") if c in df.columns), None)
+    df = df.assign(
+        _lat=pd.to_numeric(df[lat_col].str.strip(), errors="coerce"),
+        _lon=pd.to_numeric(df[lon_col].str.strip(), errors="coerce"),
+        _name=df[name_col].str.strip() if name_col else "",
+        _row=df.index + 2,
+    )
+    if "waypoint_order" in df.columns:
+        df = df.assign(_order=pd.to_numeric(df["waypoint_order"].str.strip(), errors="coerce"))
+        df = df.sort_values(["_name", "_order", "_row"], kind="stable")
+
+    routes = []
+    for name, group in df.groupby("_name", sort=False):
+        bad = group[group["_lat"].isna() | group["_lon"].isna()]
+        if len(bad):
+            route = _route(name or None, None, None, None)
+            route["error"] = f"좌표 형식 오류 ({', '.join(str(r) for r in bad['_row'].head(5))}행)"
+            routes.append(route)
+            continue
+
+        first = group.iloc[0]
+        routes.append(_route(
+            name or None,
+            (first.get("start_port") or "").strip() or None,
+            (first.get("end_port") or "").strip() or None,
+            list(zip(group["_lat"].tolist(), group["_lon"].tolist())),
+        ))
+    return routes
+
+
+_PARSERS = {"geojson": parse_geojson, "gpx": parse_gpx, "csv": parse_route_csv}
+
+
+def validate_route(route: dict) -> Optional[str]:
+    """항로가 올바르면 None, 아니면 거부 사유를 반환합니다."""
+    if route.get("error"):
+        return route["error"]
+    if route["points"] is None:
+        return "LineString 형상이 아닙니다."
+    if not route["name"]:
+        return "항로 이름 누락"
+    if len(route["name"]) > 255:
+        return "항로 이름이 너무 깁니다. (최대 255자)"
+    for field in ("start_port", "end_port"):
+        if not route[field]:
+            return f"{field} 누락"
+        if len(route[field]) > 100:
+            return f"{field}이(가) 너무 깁니다. (최대 100자)"
+    if len(route["points"]) < 2:
+        return "waypoint가 2개 이상이어야 합니다."
+    for i, (lat, lon) in enumerate(route["points"]):
+        if not (isinstance(lat, (int, float)) and isinstance(lon, (int, float))):
+            return f"{i + 1}번째 좌표가 숫자가 아닙니다."
+        if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+            return f"{i + 1}번째 좌표가 범위를 벗어났습니다. ({lat}, {lon})"
+    return None
+
+
+async def import_routes(
+    db: Optional[AsyncSession],
+    data: bytes,
+    fmt: str,
+    name: Optional[str] = None,
+    start_port: Optional[str] = None,
+    end_port: Optional[str] = None,
+    replace: bool = False,
+    dry_run: bool = False,
+):
+    """
+    항로 파일을 검증한 뒤 Route와 waypoint를 하나의 트랜잭션으로 등록합니다.
+    - name/start_port/end_port: 파일에 값이 없을 때 사용할 기본값 (name은 항로가 하나일 때만)
+    - replace: 같은 이름의 항로가 있으면 waypoint를 교체 (기본은 거부)
+    - dry_run: DB에 쓰지 않고 검증 결과만 반환 (db가 있으면 이름 중복도 확인)
+    """
+    routes = _PARSERS[fmt](data)
+    if not routes:
+        raise ValueError("파일에 항로(LineString/트랙/경로)가 없습니다.")
+
+    for route in routes:
+        if not route["name"] and name and len(routes) == 1:
+            route["name"] = name
+        route["start_port"] = route["start_port"] or start_port
+        route["end_port"] = route["end_port"] or end_port
+
+    valid, rejected, seen = [], [], set()
+    for index, route in enumerate(routes):
+        reason = validate_route(route)
+        if reason is None and route["name"] in seen:
+            reason = "파일 안에 같은 이름의 항로가 있습니다."
+        if reason:
+            rejected.append({"index": index, "name": route["name"], "reason": reason})
+            continue
+        seen.add(route["name"])
+        valid.append(route)
+
+    existing = {}
+    if db is not None and valid:
+        result = await db.execute(select(Route).where(Route.name.in_([r["name"] for r in valid])))
+        for route in result.scalars():
+            existing.setdefault(route.name, route)
+        if not replace:
+            rejected.extend(
+                {"index": routes.index(r), "name": r["name"], "reason": "같은 이름의 항로가 이미 있습니다. (replace로 교체 가능)"}
+                for r in valid if r["name"] in existing
+            )
+            valid = [r for r in valid if r["name"] not in existing]
+
+    summary = {
+        "status": "dry-run" if dry_run else "success",
+        "routes": len(valid),
+        "waypoints": sum(len(r["points"]) for r in valid),
+        "rejected": sorted(rejected, key=lambda r: r["index"]),
+    }
+    if dry_run or not valid:
+        summary["imported"] = []
+        return summary
+
+    imported = []
+    try:
+        targets = []
+        for route in valid:
+            target = existing.get(route["name"])
+            if target is not None:
+                target.start_port, target.end_port = route["start_port"], route["end_port"]
+                await db.execute(delete(Waypoint).where(Waypoint.route_id == target.id))
+            else:
+                target = Route(name=route["name"], start_port=route["start_port"], end_port=route["end_port"])
+                db.add(target)
+            targets.append(target)
+        # 새 항로의 id 확보
+        await db.flush()
+
+        rows = [
+            {"route_id": target.id, "waypoint_order": order, "latitude": lat, "longitude": lon}
+            for target, route in zip(targets, valid)
+            for order, (lat, lon) in enumerate(route["points"], start=1)
+        ]
+        for start in range(0, len(rows), WAYPOINT_INSERT_BATCH):
+            await db.execute(insert(Waypoint), rows[start:start + WAYPOINT_INSERT_BATCH])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    for target, route in zip(targets, valid):
+        # 교체된 항로의 캐시/공간 인덱스 갱신 (새 항로도 공간 인덱스에 반영되도록 알림)
+        route_cache.invalidate(target.id)
+        imported.append({
+            "route_id": target.id,
+            "name": route["name"],
+            "waypoints": len(route["points"]),
+            "replaced": route["name"] in existing,
+        })
+    summary["imported"] = imported
+    return summary
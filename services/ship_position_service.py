@@ -0,0 +1,125 @@
+# /services/ship_position_service.py
+# 선박 위치 보고 수집
+# - 최신 위치는 메모리(latest_positions)에 선박별로 보관해 조회 시 DB를 읽지 않습니다.
+# - 위치 이력(ship_positions)은 write-behind 버퍼로 모아서 묶음 단위로 삽입합니다.
+
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.tables import Ship, ShipPosition
+from models.schemas import ShipPositionIn
+from services.write_behind import WriteBehindBuffer
+
+# 위치 이력 반영 주기(초)와 한 번에 삽입할 행 수
+SHIP_POSITION_FLUSH_INTERVAL = float(os.getenv("SHIP_POSITION_FLUSH_INTERVAL", "1.0"))
+SHIP_POSITION_BATCH_SIZE = int(os.getenv("SHIP_POSITION_BATCH_SIZE", "500"))
+# DB 장애 등으로 밀린 위치 이력을 메모리에 보관할 최대 건수
+SHIP_POSITION_MAX_PENDING = int(os.getenv("SHIP_POSITION_MAX_PENDING", "50000"))
+# 요청 한 번에 보낼 수 있는 최대 위치 수
+SHIP_POSITION_MAX_REQUEST = 1000
+
+position_buffer = WriteBehindBuffer(
+    "ship_positions",
+    ShipPosition.__table__,
+    flush_interval=SHIP_POSITION_FLUSH_INTERVAL,
+    batch_size=SHIP_POSITION_BATCH_SIZE,
+    max_pending=SHIP_POSITION_MAX_PENDING,
+)
+
+
+def _to_utc_naive(value: datetime) -> datetime:
+    """DB에는 UTC 기준 naive datetime으로 저장합니다."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class LatestPositionStore:
+    """선박별 가장 최근(reported_at 기준) 위치"""
+
+    def __init__(self):
+        self._positions: Dict[int, dict] = {}
+        self._known_ships: Set[int] = set()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def get(self, ship_id: int) -> Optional[dict]:
+        return self._positions.get(ship_id)
+
+    def update(self, ship_id: int, position: dict) -> bool:
+        """늦게 도착한 과거 위치는 무시합니다. 갱신했으면 True"""
+        current = self._positions.get(ship_id)
+        if current is not None and current["reported_at"] > position["reported_at"]:
+            return False
+        self._positions[ship_id] = position
+        return True
+
+    async def load(self, db: AsyncSession):
+        """서버 시작 시 DB에 저장된 선박별 마지막 위치로 채웁니다."""
+        latest = (
+            select(ShipPosition.ship_id, func.max(ShipPosition.reported_at).label("reported_at"))
+            .group_by(ShipPosition.ship_id)
+            .subquery()
+        )
+        result = await db.execute(
+            select(ShipPosition).join(
+                latest,
+                (ShipPosition.ship_id == latest.c.ship_id) & (ShipPosition.reported_at == latest.c.reported_at),
+            )
+        )
+        for p in result.scalars():
+            self.update(p.ship_id, {
+                "latitude": p.latitude,
+                "longitude": p.longitude,
+                "speed_kmh": p.speed_kmh,
+                "heading": p.heading,
+                "reported_at": p.reported_at,
+            })
+        self._known_ships.update((await db.execute(select(Ship.id))).scalars().all())
+
+    async def known_ships(self, db: AsyncSession, ship_ids: Iterable[int]) -> Set[int]:
+        """등록된 선박 ID만 골라 반환합니다. 처음 보는 ID만 DB에서 확인합니다."""
+        ship_ids = set(ship_ids)
+        unknown = ship_ids - self._known_ships
+        if unknown:
+            found = (await db.execute(select(Ship.id).where(Ship.id.in_(unknown)))).scalars().all()
+            self._known_ships.update(found)
+        return ship_ids & self._known_ships
+
+    def stats(self) -> dict:
+        return {"ships": len(self._positions), "known_ships": len(self._known_ships)}
+
+
+# 애플리케이션 전역 최신 위치 저장소
+latest_positions = LatestPositionStore()
+
+
+async def ingest_positions(db: AsyncSession, positions: List[ShipPositionIn]) -> dict:
+    """
+    위치 보고를 최신 위치 저장소에 반영하고 이력 버퍼에 넣습니다. (DB 쓰기는 버퍼가 묶어서 수행)
+    등록되지 않은 선박의 위치는 거절합니다.
+    """
+    received_at = datetime.utcnow()
+    valid_ships = await latest_positions.known_ships(db, (p.ship_id for p in positions))
+
+    rows, rejected = [], []
+    for index, p in enumerate(positions):
+        if p.ship_id not in valid_ships:
+            rejected.append({"index": index, "ship_id": p.ship_id, "reason": "등록되지 않은 선박입니다."})
+            continue
+
+        position = {
+            "latitude": p.latitude,
+            "longitude": p.longitude,
+            "speed_kmh": p.speed_kmh,
+            "heading": p.heading,
+            "reported_at": _to_utc_naive(p.reported_at) if p.reported_at else received_at,
+        }
+        latest_positions.update(p.ship_id, position)
+        rows.append({"ship_id": p.ship_id, "received_at": received_at, **position})
+
+    position_buffer.add(rows)
+    return {"accepted": len(rows), "rejected_count": len(rejected), "rejected": rejected}
@@ -2,10 +2,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import NoResultFound
-from models.tables import Ship, Admin
+from models.tables import Ship, Admin, Route
 from fastapi import HTTPException
+from services.ship_position_service import latest_positions
 
-async def get_all_ships_with_admin(session: AsyncSession):
+async def get_all_ships_with_admin(session: AsyncSession, include_position: bool = False):
     result = await session.execute(
         select(Ship, Admin.admin_name)
         .join(Admin, Ship.admin_id == Admin.admin_id, isouter=True)  # LEFT OUTER JOIN
@@ -18,12 +19,16 @@ async def get_all_ships_with_admin(session: AsyncSession):
             "ship_no": ship.ship_no,
             "ship_name": ship.ship_name,
             "departure": ship.departure,
-            "admin_name": admin_name
+            "admin_name": admin_name,
+            "route_id": ship.route_id
         }
+        if include_position:
+            # 최신 위치는 메모리 저장소에서 읽음 (추가 쿼리 없음)
+            ship_dict["position"] = latest_positions.get(ship.id)
         ships.append(ship_dict)
     return ships
 
-async def create_ship(session: AsyncSession, ship_no: int, ship_name: str, admin_name: str):
+async def create_ship(session: AsyncSession, ship_no: int, ship_name: str, admin_name: str, route_id: int = None):
     # 1. 관리자 존재 여부 확인
     result = await session.execute(
         select(Admin).where(Admin.admin_name == admin_name)
@@ -33,12 +38,17 @@ async def create_ship(session: AsyncSession, ship_no: int, ship_name: str, admin
     if not admin:
         raise HTTPException(status_code=404, detail="담당 관리자명을 찾을 수 없습니다.")
 
-    # 2. 선박 생성
+    # 2. 운항 항로 존재 여부 확인
+    if route_id is not None and await session.get(Route, route_id) is None:
+        raise HTTPException(status_code=404, detail="운항 항로를 찾을 수 없습니다.")
+
+    # 3. 선박 생성
     new_ship = Ship(
         ship_no=ship_no,
         ship_name=ship_name,
         departure=0,  # 기본값: 미출항
-        admin_id=admin.admin_id
+        admin_id=admin.admin_id,
+        route_id=route_id
     )
     session.add(new_ship)
     await session.commit()
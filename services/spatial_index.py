@@ -0,0 +1,296 @@
+# /services/spatial_index.py
+# waypoint / 항구(locations) 좌표에 대한 프로세스 내 격자(grid) 공간 인덱스
+# 선박 위치를 항로에 맞추거나 지도 클릭 지점과 가까운 항로/waypoint를 찾을 때 사용합니다.
+# 전체 waypoint를 훑지 않고 기준점 주변 격자 칸만 확인합니다.
+#
+# 처음 조회될 때 route_cache에서 모든 항로를 받아 만들고, 이후에는 route_cache.invalidate(route_id)가
+# 호출된 항로만 다음 조회 때 다시 적재합니다. (locations는 전체 무효화 시에만 다시 읽음)
+
+import asyncio
+import math
+import os
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from models.tables import Location, Waypoint
+from services.geo_utils import KM_PER_DEG, haversine_km
+from services.route_cache import route_cache, RouteGeometry
+
+# 격자 한 칸의 크기 (경위도 도 단위)
+SPATIAL_GRID_CELL_DEG = float(os.getenv("SPATIAL_GRID_CELL_DEG", "0.1"))
+# /navigation/nearest 한 번에 반환할 수 있는 최대 결과 수
+NEAREST_MAX_RESULTS = 100
+
+Cell = Tuple[int, int]
+
+
+class GridIndex:
+    """
+    좌표를 cell_deg 크기의 격자 칸에 나누어 보관합니다. 키 단위로 추가/삭제할 수 있습니다.
+    """
+
+    def __init__(self, cell_deg: float):
+        self.cell_deg = cell_deg
+        self._cells: Dict[Cell, Dict[Hashable, Tuple[float, float]]] = {}
+        self._where: Dict[Hashable, Cell] = {}
+        self._extent: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self):
+        return len(self._where)
+
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def insert(self, key: Hashable, lat: float, lon: float):
+        if key in self._where:
+            self.remove(key)
+        cell = self._cell(lat, lon)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        self._where[key] = cell
+        self._extent = None
+
+    def remove(self, key: Hashable):
+        cell = self._where.pop(key, None)
+        if cell is None:
+            return
+        members = self._cells[cell]
+        del members[key]
+        if not members:
+            del self._cells[cell]
+        self._extent = None
+
+    def position(self, key: Hashable) -> Tuple[float, float]:
+        return self._cells[self._where[key]][key]
+
+    def clear(self):
+        self._cells.clear()
+        self._where.clear()
+        self._extent = None
+
+    def _bounds(self) -> Tuple[int, int, int, int]:
+        """데이터가 있는 칸의 범위 (최소 위도칸, 최대 위도칸, 최소 경도칸, 최대 경도칸)"""
+        if self._extent is None:
+            rows = [cell[0] for cell in self._cells]
+            cols = [cell[1] for cell in self._cells]
+            self._extent = (min(rows), max(rows), min(cols), max(cols))
+        return self._extent
+
+    def _measure(self, lat: float, lon: float, cells, best: dict, group: Callable, radius_km: Optional[float]):
+        """주어진 칸들의 좌표까지 거리를 한 번에 계산해 그룹별 최단 거리를 갱신합니다."""
+        keys, lats, lons = [], [], []
+        for cell in cells:
+            members = self._cells.get(cell)
+            if members:
+                for key, (p_lat, p_lon) in members.items():
+                    keys.append(key)
+                    lats.append(p_lat)
+                    lons.append(p_lon)
+        if not keys:
+            return
+
+        distances = haversine_km(lat, lon, np.array(lats), np.array(lons)).tolist()
+        for key, distance in zip(keys, distances):
+            if radius_km is not None and distance > radius_km:
+                continue
+            g = group(key)
+            current = best.get(g)
+            if current is None or distance < current[0]:
+                best[g] = (distance, key)
+
+    def query(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        radius_km: Optional[float] = None,
+        group: Callable[[Hashable], Hashable] = lambda key: key,
+    ) -> List[Tuple[Hashable, float]]:
+        """
+        기준점에서 가까운 순으로 최대 k개의 (키, 거리 km)를 반환합니다.
+        group을 주면 같은 그룹에서는 가장 가까운 키 하나만 남깁니다. (예: 항로별 최근접 waypoint)
+        radius_km를 주면 그 거리 이내의 결과만 반환합니다.
+        """
+        if not self._cells or k <= 0:
+            return []
+
+        best: Dict[Hashable, Tuple[float, Hashable]] = {}
+        ci, cj = self._cell(lat, lon)
+
+        if radius_km is not None:
+            # 반경이 덮는 칸만 확인
+            dlat = radius_km / KM_PER_DEG
+            max_lat = min(abs(lat) + dlat, 89.9)
+            dlon = min(radius_km / (KM_PER_DEG * math.cos(math.radians(max_lat))), 180)
+            i0, j0 = self._cell(lat - dlat, lon - dlon)
+            i1, j1 = self._cell(lat + dlat, lon + dlon)
+            if (i1 - i0 + 1) * (j1 - j0 + 1) > len(self._cells):
+                cells = [c for c in self._cells if i0 <= c[0] <= i1 and j0 <= c[1] <= j1]
+            else:
+                cells = [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+            self._measure(lat, lon, cells, best, group, radius_km)
+        else:
+            # 기준 칸에서 한 겹씩 바깥으로 넓혀 가며 탐색
+            min_i, max_i, min_j, max_j = self._bounds()
+            r = 0
+            while True:
+                if (2 * r + 1) ** 2 > len(self._cells):
+                    # 남은 겹을 칸 단위로 훑는 것보다 데이터가 있는 칸이 적으면 (데이터에서 먼 기준점)
+                    # 아직 확인하지 않은 칸을 한 번에 계산하고 끝냄
+                    rest = [c for c in self._cells if max(abs(c[0] - ci), abs(c[1] - cj)) >= r]
+                    self._measure(lat, lon, rest, best, group, None)
+                    break
+                if r == 0:
+                    ring = [(ci, cj)]
+                else:
+                    ring = [(ci + di, cj + dj) for di in (-r, r) for dj in range(-r, r + 1)]
+                    ring += [(ci + di, cj + dj) for dj in (-r, r) for di in range(-r + 1, r)]
+                self._measure(lat, lon, ring, best, group, None)
+
+                # 아직 확인하지 않은 칸까지의 최소 거리 (경도 방향은 고위도 쪽 기준으로 보수적으로 계산)
+                reach_deg = r * self.cell_deg
+                edge_lat = min(abs(lat) + reach_deg, 90)
+                reach_km = reach_deg * KM_PER_DEG * math.cos(math.radians(edge_lat))
+                if len(best) >= k and sorted(d for d, _ in best.values())[k - 1] <= reach_km:
+                    break
+                if ci - r <= min_i and ci + r >= max_i and cj - r <= min_j and cj + r >= max_j:
+                    break
+                r += 1
+
+        ranked = sorted(best.values(), key=lambda item: item[0])[:k]
+        return [(key, distance) for distance, key in ranked]
+
+
+class SpatialIndex:
+    """
+    waypoint와 항구 좌표 인덱스. 항로 단위로 갱신합니다.
+    waypoint 키: ("waypoint", route_id, waypoint_order) / 항구 키: ("location", id)
+    """
+
+    def __init__(self, cell_deg: float = SPATIAL_GRID_CELL_DEG):
+        self.waypoints = GridIndex(cell_deg)
+        self.locations = GridIndex(cell_deg)
+        self._route_keys: Dict[int, List[tuple]] = {}
+        self._location_names: Dict[int, str] = {}
+        self._built = False
+        self._dirty: Set[int] = set()
+        # 빌드 도중 전체 무효화가 들어오면 그 빌드 결과를 최신으로 취급하지 않기 위한 번호
+        self._version = 0
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self, route_id: Optional[int] = None):
+        """route_id 항로를 다음 조회 때 다시 적재합니다. None이면 전체를 다시 만듭니다."""
+        if route_id is None:
+            self._built = False
+            self._version += 1
+            self._dirty.clear()
+        else:
+            self._dirty.add(route_id)
+
+    def set_route(self, route_id: int, geometry: Optional[RouteGeometry]):
+        """항로의 waypoint를 교체합니다. geometry가 None이면 항로를 제거합니다."""
+        for key in self._route_keys.pop(route_id, []):
+            self.waypoints.remove(key)
+        if geometry is None:
+            return
+
+        keys = []
+        for order, lat, lon in geometry.points():
+            key = ("waypoint", route_id, order)
+            self.waypoints.insert(key, lat, lon)
+            keys.append(key)
+        self._route_keys[route_id] = keys
+
+    async def ensure_fresh(self, db: AsyncSession):
+        if self._built and not self._dirty:
+            return
+        async with self._lock:
+            if not self._built:
+                await self._build(db)
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                geometries = await route_cache.get_many(db, dirty)
+                for route_id in dirty:
+                    self.set_route(route_id, geometries.get(route_id))
+
+    async def _build(self, db: AsyncSession):
+        # 빌드 도중 들어온 항로 변경은 빌드 이후 다시 반영되도록 미리 비워 둠
+        self._dirty.clear()
+        version = self._version
+        route_ids = (await db.execute(select(Waypoint.route_id).distinct())).scalars().all()
+        geometries = await route_cache.get_many(db, route_ids)
+        locations = (await db.execute(select(Location))).scalars().all()
+
+        self.waypoints.clear()
+        self._route_keys.clear()
+        for route_id, geometry in geometries.items():
+            self.set_route(route_id, geometry)
+
+        self.locations.clear()
+        self._location_names = {}
+        for location in locations:
+            self.locations.insert(("location", location.id), location.latitude, location.longitude)
+            self._location_names[location.id] = location.name
+
+        self._built = version == self._version
+        print(f"[정보] 공간 인덱스 생성: 항로 {len(self._route_keys)}개, waypoint {len(self.waypoints)}개, 항구 {len(self.locations)}개")
+
+    async def nearest(
+        self,
+        db: AsyncSession,
+        lat: float,
+        lon: float,
+        kind: str = "waypoint",
+        k: int = 5,
+        radius_km: Optional[float] = None,
+    ) -> List[dict]:
+        """
+        kind
+        - waypoint: 가까운 waypoint
+        - route: 가까운 항로 (항로별 최근접 waypoint 기준)
+        - location: 가까운 항구
+        """
+        await self.ensure_fresh(db)
+
+        if kind == "location":
+            results = []
+            for key, distance in self.locations.query(lat, lon, k, radius_km):
+                p_lat, p_lon = self.locations.position(key)
+                results.append({
+                    "kind": "location",
+                    "id": key[1],
+                    "name": self._location_names.get(key[1]),
+                    "latitude": p_lat,
+                    "longitude": p_lon,
+                    "distance_km": round(distance, 3),
+                })
+            return results
+
+        group = (lambda key: key[1]) if kind == "route" else (lambda key: key)
+        results = []
+        for key, distance in self.waypoints.query(lat, lon, k, radius_km, group):
+            p_lat, p_lon = self.waypoints.position(key)
+            results.append({
+                "kind": kind,
+                "route_id": key[1],
+                "waypoint_order": key[2],
+                "latitude": p_lat,
+                "longitude": p_lon,
+                "distance_km": round(distance, 3),
+            })
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "built": self._built,
+            "routes": len(self._route_keys),
+            "waypoints": len(self.waypoints),
+            "locations": len(self.locations),
+            "dirty_routes": len(self._dirty),
+            "cell_deg": self.waypoints.cell_deg,
+        }
+
+
+# 애플리케이션 전역 공간 인덱스. 항로 캐시가 무효화되면 해당 항로를 다시 적재하도록 표시
+spatial_index = SpatialIndex()
+route_cache.add_invalidation_listener(spatial_index.mark_dirty)
@@ -0,0 +1,219 @@
+# /services/upload_job_service.py
+# CSV 업로드를 작업(job)으로 받아 백그라운드 워커에서 처리합니다.
+# 업로드 파일은 UPLOAD_JOB_DIR에 보관하고 작업 상태는 upload_jobs 테이블에 기록하므로,
+# 서버가 재시작되어도 대기/실행 중이던 작업을 다시 큐에 넣어 처리합니다.
+
+import asyncio
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import SessionLocal
+from models.tables import UploadJob
+from services.ingestion_service import ingest_passenger_csv, sync_passenger_csv
+
+# 업로드 파일 보관 디렉터리
+UPLOAD_JOB_DIR = os.getenv("UPLOAD_JOB_DIR", "uploads")
+# 동시에 처리할 업로드 작업 수
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "2"))
+# 대기 중인 작업 수가 이 값을 넘으면 새 작업을 거절
+UPLOAD_JOB_QUEUE_MAX = int(os.getenv("UPLOAD_JOB_QUEUE_MAX", "100"))
+# 재시작 등으로 중단된 작업을 다시 시도하는 최대 횟수
+UPLOAD_JOB_MAX_ATTEMPTS = 3
+
+
+def _save_upload(source, path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    source.seek(0)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def update_job(job_id: str, **values):
+    """
+    작업 상태를 별도 세션으로 즉시 커밋합니다. (적재 트랜잭션과 분리)
+    """
+    values["updated_at"] = datetime.utcnow()
+    async with SessionLocal() as db:
+        await db.execute(update(UploadJob).where(UploadJob.job_id == job_id).values(**values))
+        await db.commit()
+
+
+async def get_upload_job(db: AsyncSession, job_id: str) -> Optional[dict]:
+    result = await db.execute(select(UploadJob).where(UploadJob.job_id == job_id))
+    job = result.scalar_one_or_none()
+    if not job:
+        return None
+
+    return {
+        "job_id": job.job_id,
+        "admin_id": job.admin_id,
+        "mode": job.mode,
+        "filename": job.filename,
+        "state": job.state,
+        "attempts": job.attempts,
+        "progress": job.progress,
+        "processed_rows": job.processed_rows,
+        "inserted_rows": job.inserted_rows,
+        "rejected_rows": job.rejected_rows,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+class UploadJobQueue:
+    """
+    asyncio 워커 풀로 업로드 작업을 처리합니다. 동시 실행 수는 워커 수로 제한됩니다.
+    """
+
+    def __init__(self, workers: int = UPLOAD_JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """중단된 작업을 복구한 뒤 워커를 시작합니다."""
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(UploadJob.job_id)
+                .where(UploadJob.state.in_(["queued", "running"]))
+                .order_by(UploadJob.created_at)
+            )
+            pending = [row.job_id for row in result]
+            if pending:
+                await db.execute(
+                    update(UploadJob)
+                    .where(UploadJob.job_id.in_(pending))
+                    .values(state="queued", updated_at=datetime.utcnow())
+                )
+                await db.commit()
+
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+        if pending:
+            print(f"[정보] 업로드 작업 {len(pending)}건을 다시 큐에 넣었습니다.")
+
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # 실행 중이던 작업은 'running' 상태로 남아 다음 시작 시 복구됩니다.
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, db: AsyncSession, upload, admin_id: int, mode: str, chunk_size: int) -> dict:
+        if self._queue.qsize() >= UPLOAD_JOB_QUEUE_MAX:
+            raise HTTPException(status_code=503, detail="대기 중인 업로드 작업이 너무 많습니다. 잠시 후 다시 시도하세요.")
+
+        job_id = str(uuid.uuid4())
+        file_path = os.path.join(UPLOAD_JOB_DIR, f"{job_id}.csv")
+        await asyncio.to_thread(_save_upload, upload.file, file_path)
+
+        job = UploadJob(
+            job_id=job_id,
+            admin_id=admin_id,
+            mode=mode,
+            chunk_size=chunk_size,
+            filename=upload.filename,
+            file_path=file_path,
+            state="queued",
+        )
+        db.add(job)
+        try:
+            await db.commit()
+        except Exception:
+            await asyncio.to_thread(_remove_file, file_path)
+            raise
+
+        self._queue.put_nowait(job_id)
+        return {"job_id": job_id, "state": "queued"}
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[오류] 업로드 작업 {job_id} 처리 중 예외 발생: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        async with SessionLocal() as db:
+            result = await db.execute(select(UploadJob).where(UploadJob.job_id == job_id))
+            job = result.scalar_one_or_none()
+        if not job or job.state not in ("queued", "running"):
+            return
+
+        if job.attempts >= UPLOAD_JOB_MAX_ATTEMPTS:
+            await update_job(job_id, state="failed", error="최대 재시도 횟수를 초과했습니다.", finished_at=datetime.utcnow())
+            await asyncio.to_thread(_remove_file, job.file_path)
+            return
+
+        await update_job(job_id, state="running", attempts=job.attempts + 1, error=None)
+
+        try:
+            with open(job.file_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size or 1
+
+                async def report(status: dict):
+                    # 진행 상황 기록 실패가 적재 자체를 실패시키지 않도록 오류는 로그만 남김
+                    try:
+                        await update_job(
+                            job_id,
+                            progress=min(f.tell() / size, 1.0),
+                            processed_rows=status["processed"],
+                            inserted_rows=status["inserted"],
+                            rejected_rows=status["rejected"],
+                        )
+                    except Exception as e:
+                        print(f"[경고] 업로드 작업 {job_id} 진행 상황 기록 실패: {e}")
+
+                # 적재 자체는 하나의 트랜잭션이므로 중간에 중단되어도 처음부터 다시 실행해도 안전
+                async with SessionLocal() as db:
+                    if job.mode == "sync":
+                        outcome = await sync_passenger_csv(db, f, job.admin_id, progress=report)
+                        inserted = outcome["added"] + outcome["changed"]
+                        processed = inserted + outcome["unchanged"] + outcome["rejected_count"]
+                    else:
+                        outcome = await ingest_passenger_csv(db, f, job.admin_id, job.chunk_size, progress=report)
+                        inserted = outcome["inserted"]
+                        processed = inserted + outcome["rejected_count"]
+
+            await update_job(
+                job_id,
+                state="succeeded",
+                progress=1.0,
+                processed_rows=processed,
+                inserted_rows=inserted,
+                rejected_rows=outcome["rejected_count"],
+                result=json.dumps(outcome, ensure_ascii=False),
+                finished_at=datetime.utcnow(),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await update_job(job_id, state="failed", error=str(e), finished_at=datetime.utcnow())
+        await asyncio.to_thread(_remove_file, job.file_path)
+
+
+# 애플리케이션 전역 작업 큐
+upload_job_queue = UploadJobQueue()
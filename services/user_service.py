@@ -5,6 +5,7 @@ from models.tables import Admin, Session as DBSession
 from datetime import datetime, timedelta
 import uuid
 from sqlalchemy import delete
+from services.auth_service import validate_session_key, invalidate_session_key
 
 # 1. 관리자 인증 함수 수정
 async def authenticate_admin(session: AsyncSession, admin_name: str, password: str):
@@ -36,15 +37,9 @@ async def create_session(session: AsyncSession, admin_id: int):
     return db_session
 
 # 3. 세션 키로 관리자 정보 조회 함수 추가
+#    (검증 결과는 auth_service의 세션 캐시에 보관되어 캐시 적중 시 DB를 조회하지 않음)
 async def get_admin_by_session_key(session: AsyncSession, session_key: str):
-    result = await session.execute(
-        select(DBSession).where(DBSession.session_key == session_key)
-    )
-    session_record = result.scalars().first()
-    
-    if session_record and session_record.expires_at > datetime.utcnow():
-        return session_record.admin
-    return None
+    return await validate_session_key(session, session_key)
 
 # 4. 관리자 등록 함수
 async def register_admin(session: AsyncSession, admin_name: str, password: str):
@@ -67,6 +62,8 @@ async def register_admin(session: AsyncSession, admin_name: str, password: str):
     }
 
 async def logout_admin(session: AsyncSession, session_key: str):
+    # 캐시된 세션은 DB 결과와 관계없이 즉시 무효화
+    invalidate_session_key(session_key)
 
     # 세션 키에 해당하는 레코드 찾기
     result = await session.execute(
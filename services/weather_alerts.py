@@ -0,0 +1,264 @@
+# /services/weather_alerts.py
+# 항로 waypoint 위험 상태(weather_service.danger_reasons) 변화를 SSE로 밀어 주는 알림 허브
+#   - 날씨 미리 조회 주기(weather_prefetch)가 끝날 때 한 번만 계산합니다. (출항 선박 항로 + 구독 중인 항로)
+#   - 이전 주기와 비교해 위험 ↔ 안전이 바뀐 waypoint만 "danger" 이벤트로 보내고,
+#     매 주기 항로별 요약("summary")을 보냅니다.
+#   - 이벤트 문자열은 한 번만 만들어 모든 구독자 큐에 넣습니다. (구독자 수와 무관하게 계산 1회)
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from db import SessionLocal
+from services.route_cache import route_cache
+from services.weather_client import gather_in_order, WEATHER_REQUEST_DEADLINE
+from services.weather_service import FORECAST_REQUEST, fetch_cached, danger_reasons, DANGER_RULES
+from services.weather_prefetch import weather_prefetcher
+
+# 구독자별 대기 이벤트 상한. 넘으면 느린 구독자로 보고 연결을 끊음
+WEATHER_ALERT_QUEUE_SIZE = int(os.getenv("WEATHER_ALERT_QUEUE_SIZE", "100"))
+# 이벤트가 없을 때 연결 유지용 주석을 보내는 간격(초)
+WEATHER_ALERT_KEEPALIVE = float(os.getenv("WEATHER_ALERT_KEEPALIVE", "15"))
+
+_CLOSE = None
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    __slots__ = ("route_id", "queue")
+
+    def __init__(self, route_id: Optional[int]):
+        # None이면 전체(선단) 구독
+        self.route_id = route_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WEATHER_ALERT_QUEUE_SIZE)
+
+
+class WeatherAlertHub:
+    def __init__(self):
+        self._subscribers: Set[Subscriber] = set()
+        # route_id -> {waypoint_order: 위험 waypoint 정보}
+        self._danger: Dict[int, Dict[int, dict]] = {}
+        # route_id -> 최근 요약
+        self._summaries: Dict[int, dict] = {}
+        self._lock = asyncio.Lock()
+
+        self.cycles = 0
+        self.last_evaluated_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.transitions = 0
+        self.events_sent = 0
+        self.dropped_subscribers = 0
+
+    # ---- 계산 ----
+
+    async def _evaluate_route(self, geometry, now: float, previous: Dict[int, dict]) -> Tuple[Dict[int, dict], dict]:
+        """
+        항로 하나의 현재 시각 위험 waypoint와 요약.
+        예보를 받지 못한 waypoint는 이전 상태(previous)를 그대로 이어 가 장애 중 거짓 전환을 보내지 않습니다.
+        """
+
+        async def fetch_one(point):
+            _, latitude, longitude = point
+            try:
+                series, stale_age = await fetch_cached(FORECAST_REQUEST, latitude, longitude)
+                return series.at(now), stale_age
+            except Exception:
+                return None
+
+        points = list(geometry.points())
+        results = await gather_in_order(points, fetch_one, WEATHER_REQUEST_DEADLINE, lambda point: None)
+
+        danger: Dict[int, dict] = {}
+        winds, unknown, stale = [], 0, 0
+        for (order, latitude, longitude), result in zip(points, results):
+            if result is None:
+                unknown += 1
+                if order in previous:
+                    danger[order] = previous[order]
+                continue
+            hour, stale_age = result
+            stale += stale_age is not None
+            if hour.get("wind_kph") is not None:
+                winds.append(hour["wind_kph"])
+            reasons = danger_reasons(hour)
+            if reasons:
+                danger[order] = {
+                    "waypoint_order": order,
+                    "latitude": latitude,
+                    "longitude": longitude,
+                    "reasons": reasons,
+                    **{field: hour.get(field) for field, _, _ in DANGER_RULES},
+                }
+
+        summary = {
+            "route_id": geometry.route_id,
+            "waypoints": len(points),
+            "danger": len(danger),
+            "unknown": unknown,
+            "stale": stale,
+            "max_wind_kph": max(winds) if winds else None,
+            "danger_waypoints": sorted(danger),
+        }
+        return danger, summary
+
+    async def evaluate(self, route_ids: List[int], full_cycle: bool = True):
+        """
+        출항 선박 항로(route_ids)와 구독 중인 항로의 위험 상태를 계산하고
+        바뀐 waypoint와 요약을 구독자에게 보냅니다. (미리 조회 주기 리스너)
+        full_cycle=False면 route_ids만 계산하고 다른 항로 상태와 선단 요약은 건드리지 않습니다.
+        """
+        async with self._lock:
+            started = time.monotonic()
+            now = time.time()
+            targets = set(route_ids)
+            if full_cycle:
+                targets |= {s.route_id for s in self._subscribers if s.route_id is not None}
+            async with SessionLocal() as db:
+                geometries = await route_cache.get_many(db, sorted(targets))
+
+            evaluated = await asyncio.gather(*(
+                self._evaluate_route(g, now, self._danger.get(route_id, {}))
+                for route_id, g in geometries.items()
+            ))
+
+            changes: Dict[int, List[dict]] = {}
+            for route_id, (danger, summary) in zip(geometries, evaluated):
+                previous = self._danger.get(route_id, {})
+                route_changes = [
+                    {**info, "route_id": route_id, "is_danger": True}
+                    for order, info in danger.items() if order not in previous
+                ] + [
+                    {"route_id": route_id, "waypoint_order": order, "is_danger": False}
+                    for order in previous if order not in danger
+                ]
+                if route_changes:
+                    changes[route_id] = sorted(route_changes, key=lambda c: c["waypoint_order"])
+                self._danger[route_id] = danger
+                self._summaries[route_id] = summary
+
+            if full_cycle:
+                # 더 이상 계산하지 않는 항로 상태 정리
+                for route_id in list(self._danger):
+                    if route_id not in geometries:
+                        self._danger.pop(route_id, None)
+                        self._summaries.pop(route_id, None)
+                self.cycles += 1
+                self.last_evaluated_at = now
+                self.last_duration = round(time.monotonic() - started, 3)
+
+            self.transitions += sum(len(c) for c in changes.values())
+            self._publish(changes, [self._summaries[route_id] for route_id in geometries], now, full_cycle)
+
+    def _publish(self, changes: Dict[int, List[dict]], summaries: List[dict], now: float, fleet_summary: bool):
+        # 항로별 이벤트는 한 번만 직렬화하고, 선단 구독자용 이벤트도 한 번만 만듦
+        route_events: Dict[int, List[str]] = {}
+        for summary in summaries:
+            route_id = summary["route_id"]
+            events = [sse_event("danger", {"time": int(now), "changes": changes[route_id]})] if route_id in changes else []
+            events.append(sse_event("summary", {"time": int(now), "routes": [summary]}))
+            route_events[route_id] = events
+
+        fleet_events = []
+        if changes:
+            fleet_events.append(sse_event("danger", {
+                "time": int(now),
+                "changes": [c for route_id in sorted(changes) for c in changes[route_id]],
+            }))
+        if fleet_summary:
+            fleet_events.append(sse_event("summary", {"time": int(now), "routes": summaries}))
+
+        for subscriber in list(self._subscribers):
+            events = fleet_events if subscriber.route_id is None else route_events.get(subscriber.route_id, [])
+            for event in events:
+                if not self._offer(subscriber, event):
+                    break
+
+    def _offer(self, subscriber: Subscriber, event: str) -> bool:
+        try:
+            subscriber.queue.put_nowait(event)
+            self.events_sent += 1
+            return True
+        except asyncio.QueueFull:
+            # 따라오지 못하는 구독자는 끊고, 다시 연결하면 스냅샷부터 받게 함
+            self._subscribers.discard(subscriber)
+            self.dropped_subscribers += 1
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(_CLOSE)
+            return False
+
+    # ---- 구독 ----
+
+    def snapshot(self, route_id: Optional[int] = None) -> dict:
+        """현재 위험 waypoint와 요약 (route_id가 없으면 전체)"""
+        route_ids = [route_id] if route_id is not None else sorted(self._danger)
+        return {
+            "time": int(self.last_evaluated_at) if self.last_evaluated_at else None,
+            "danger": [
+                {**info, "route_id": rid, "is_danger": True}
+                for rid in route_ids for info in self._danger.get(rid, {}).values()
+            ],
+            "routes": [self._summaries[rid] for rid in route_ids if rid in self._summaries],
+        }
+
+    async def subscribe(self, route_id: Optional[int]) -> Subscriber:
+        # 아직 계산하지 않은 항로면 먼저 한 번 계산해 스냅샷을 채움
+        if route_id is not None and route_id not in self._summaries:
+            await self.evaluate([route_id], full_cycle=False)
+        subscriber = Subscriber(route_id)
+        self._subscribers.add(subscriber)
+        subscriber.queue.put_nowait(sse_event("snapshot", self.snapshot(route_id)))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, subscriber: Subscriber, is_disconnected):
+        """SSE 본문 생성기. 이벤트가 없으면 WEATHER_ALERT_KEEPALIVE초마다 주석을 보냄"""
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=WEATHER_ALERT_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event is _CLOSE:
+                    break
+                yield event
+        finally:
+            self.unsubscribe(subscriber)
+
+    def close(self):
+        """종료 시 모든 스트림을 끝냄"""
+        for subscriber in list(self._subscribers):
+            self._subscribers.discard(subscriber)
+            try:
+                subscriber.queue.put_nowait(_CLOSE)
+            except asyncio.QueueFull:
+                subscriber.queue.get_nowait()
+                subscriber.queue.put_nowait(_CLOSE)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "fleet_subscribers": sum(1 for s in self._subscribers if s.route_id is None),
+            "routes": len(self._summaries),
+            "danger_waypoints": sum(len(d) for d in self._danger.values()),
+            "rules": [{"field": f, "op": op, "limit": limit} for f, op, limit in DANGER_RULES],
+            "cycles": self.cycles,
+            "last_evaluated_at": self.last_evaluated_at,
+            "last_duration": self.last_duration,
+            "transitions": self.transitions,
+            "events_sent": self.events_sent,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+weather_alerts = WeatherAlertHub()
+# 미리 조회 주기가 끝날 때마다 위험 상태 계산
+weather_prefetcher.add_cycle_listener(weather_alerts.evaluate)
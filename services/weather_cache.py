@@ -0,0 +1,151 @@
+# /services/weather_cache.py
+# WeatherAPI 응답 캐시
+#   - 좌표를 WEATHER_CACHE_GRID_DEG 격자로 맞춘(snap) 뒤 조회하므로 가까운 waypoint끼리 응답을 공유합니다.
+#     (같은 항구에서 출발하는 항로들의 겹치는 구간도 한 번만 조회)
+#   - 키에 시간 구간(WEATHER_CACHE_BUCKET_SECONDS, 기본 15분 = WeatherAPI 갱신 주기)을 넣어
+#     구간이 바뀌면 자연스럽게 새로 조회합니다.
+#   - 같은 키의 동시 요청은 SingleFlight로 업스트림 호출 한 번에 합칩니다.
+#   - 업스트림 장애(회로 차단, 재시도 실패) 시에는 마지막으로 받은 응답(WEATHER_STALE_TTL 이내)을
+#     오래된 값(stale)으로 표시해 대신 반환합니다.
+
+import os
+import time
+from typing import Callable, List, Optional, Tuple
+from services.cache_utils import TTLCache, SingleFlight
+from services.weather_client import weather_client, is_upstream_failure
+
+# 좌표 격자 크기(도). 0.05도 ≈ 위도 방향 5.5km
+WEATHER_CACHE_GRID_DEG = float(os.getenv("WEATHER_CACHE_GRID_DEG", "0.05"))
+WEATHER_CACHE_BUCKET_SECONDS = int(os.getenv("WEATHER_CACHE_BUCKET_SECONDS", "900"))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("WEATHER_CACHE_MAX_ENTRIES", "20000"))
+# 장애 시 대신 반환할 마지막 응답 보관 시간(초)
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", str(6 * 3600)))
+
+
+def snap(latitude: float, longitude: float, grid: float = WEATHER_CACHE_GRID_DEG) -> Tuple[float, float]:
+    """좌표를 격자 중심으로 맞춥니다. (grid <= 0이면 소수 4자리 반올림만)"""
+    if grid <= 0:
+        return round(latitude, 4), round(longitude, 4)
+    return round(round(latitude / grid) * grid, 4), round(round(longitude / grid) * grid, 4)
+
+
+class WeatherCache:
+    def __init__(self, grid_deg: float, bucket_seconds: int, max_entries: int, stale_ttl: int):
+        self.grid_deg = grid_deg
+        self.bucket_seconds = bucket_seconds
+        self._cache = TTLCache(max_entries=max_entries, ttl=bucket_seconds)
+        # 시간 구간과 무관한 키 -> (마지막 응답, 받은 시각)
+        self._last_known = TTLCache(max_entries=max_entries, ttl=stale_ttl)
+        self._flight = SingleFlight()
+        self._load_listeners: List[Callable[[str, float, float, dict], None]] = []
+
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.stale_served = 0
+
+    def add_load_listener(self, listener: Callable[[str, float, float, dict], None]):
+        """업스트림에서 새 응답을 받을 때마다 (path, 격자 위도, 격자 경도, 원본 응답)으로 호출됩니다. (예: 관측 이력 저장)"""
+        self._load_listeners.append(listener)
+
+    def _bucket(self, now: Optional[float] = None) -> Tuple[int, float]:
+        """(시간 구간 번호, 구간이 끝날 때까지 남은 초)"""
+        now = time.time() if now is None else now
+        bucket = int(now // self.bucket_seconds)
+        return bucket, (bucket + 1) * self.bucket_seconds - now
+
+    def _key(self, path: str, latitude: float, longitude: float, parse, params: dict):
+        """(캐시 키, 현재 시간 구간이 끝날 때까지 남은 초)"""
+        lat, lon = snap(latitude, longitude, self.grid_deg)
+        bucket, remaining = self._bucket()
+        return (path, lat, lon, bucket, tuple(sorted(params.items())), parse), remaining
+
+    def contains(
+        self,
+        path: str,
+        latitude: float,
+        longitude: float,
+        parse: Optional[Callable[[dict], object]] = None,
+        **params,
+    ) -> bool:
+        """현재 시간 구간의 응답이 이미 캐시되어 있는지 (적중/미적중 통계에 넣지 않음)"""
+        key, _ = self._key(path, latitude, longitude, parse, params)
+        return key in self._cache
+
+    async def fetch(
+        self,
+        path: str,
+        latitude: float,
+        longitude: float,
+        parse: Optional[Callable[[dict], object]] = None,
+        allow_stale: bool = True,
+        **params,
+    ) -> Tuple[object, Optional[int]]:
+        """
+        path(예: "/current.json")를 격자 좌표로 조회해 (응답, stale 경과 초)를 반환합니다.
+        stale 경과 초는 새 응답이면 None, 장애로 마지막 응답을 대신 반환했으면 그 응답을 받은 뒤 지난 초입니다.
+        캐시된 응답 객체를 공유하므로 호출한 쪽에서 값을 덧붙일 때는 복사해서 사용해야 합니다.
+        parse가 있으면 응답을 한 번만 변환해 변환 결과를 캐시합니다. (변환 실패도 오류로 올림)
+        업스트림 오류는 캐시하지 않으며, 대신 반환할 응답이 없거나 allow_stale=False면 그대로 올립니다.
+        """
+        key, remaining = self._key(path, latitude, longitude, parse, params)
+        _, lat, lon = key[:3]
+        # 시간 구간을 뺀 키
+        last_key = key[:3] + key[4:]
+
+        data = self._cache.get(key)
+        if data is not None:
+            return data, None
+
+        async def load():
+            self.upstream_calls += 1
+            try:
+                result = await weather_client.get_json(path, {"q": f"{lat},{lon}", **params})
+            except Exception:
+                self.upstream_errors += 1
+                raise
+            for listener in self._load_listeners:
+                try:
+                    listener(path, lat, lon, result)
+                except Exception as e:
+                    print(f"[경고] 날씨 응답 후속 처리 실패: {e}")
+            if parse is not None:
+                result = parse(result)
+            # 현재 시간 구간이 끝나면 만료
+            self._cache.set(key, result, ttl=remaining)
+            self._last_known.set(last_key, (result, time.time()))
+            return result
+
+        try:
+            return await self._flight.do(key, load), None
+        except Exception as e:
+            if not allow_stale or not is_upstream_failure(e):
+                raise
+            entry = self._last_known.get(last_key)
+            if entry is None:
+                raise
+            self.stale_served += 1
+            value, fetched_at = entry
+            return value, int(time.time() - fetched_at)
+
+    def clear(self):
+        self._cache.clear()
+        self._last_known.clear()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats.update({
+            "grid_deg": self.grid_deg,
+            "bucket_seconds": self.bucket_seconds,
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+            "stale_served": self.stale_served,
+            "last_known_entries": len(self._last_known),
+            "coalesced": self._flight.coalesced,
+            "inflight": len(self._flight),
+        })
+        return stats
+
+
+weather_cache = WeatherCache(
+    WEATHER_CACHE_GRID_DEG, WEATHER_CACHE_BUCKET_SECONDS, WEATHER_CACHE_MAX_ENTRIES, WEATHER_STALE_TTL
+)
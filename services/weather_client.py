@@ -0,0 +1,295 @@
+# /services/weather_client.py
+# WeatherAPI 호출용 공용 HTTP 클라이언트
+# 애플리케이션 수명(lifespan) 동안 하나의 httpx.AsyncClient를 유지해 keep-alive 연결을 재사용하고
+# (h2 패키지가 있으면 HTTP/2 다중화), 동시 호출 수는 세마포어로 제한합니다.
+# 호출마다 전체 시한(재시도 포함) 안에서 일시적 오류를 지수 백오프로 재시도하고,
+# 연속 실패가 이어지면 회로 차단기가 열려 한동안 업스트림을 호출하지 않고 바로 실패합니다.
+
+import asyncio
+import importlib.util
+import os
+import random
+import time
+from collections import Counter, deque
+from typing import Awaitable, Callable, List, Optional, Sequence, TypeVar
+import numpy as np
+import httpx
+
+WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.weatherapi.com/v1")
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "WEATHER_API_KEY")
+# 동시에 보낼 수 있는 WeatherAPI 요청 수 (앱 전체)
+WEATHER_CONCURRENCY = int(os.getenv("WEATHER_CONCURRENCY", "8"))
+WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", "20"))
+# 개별 HTTP 요청 타임아웃(초)
+WEATHER_HTTP_TIMEOUT = float(os.getenv("WEATHER_HTTP_TIMEOUT", "3"))
+# 업스트림 호출 하나에 허용하는 전체 시간(초, 동시 호출 대기·재시도 포함)
+WEATHER_CALL_DEADLINE = float(os.getenv("WEATHER_CALL_DEADLINE", "6"))
+# 일시적 오류(연결 오류, 타임아웃, 429, 5xx) 재시도 횟수와 백오프 기준 시간(초)
+WEATHER_RETRIES = int(os.getenv("WEATHER_RETRIES", "2"))
+WEATHER_RETRY_BACKOFF = float(os.getenv("WEATHER_RETRY_BACKOFF", "0.2"))
+# 연속 실패가 이 횟수에 이르면 회로를 열고, WEATHER_BREAKER_RESET_SECONDS 후 시험 호출 1건을 허용
+WEATHER_BREAKER_FAILURES = int(os.getenv("WEATHER_BREAKER_FAILURES", "5"))
+WEATHER_BREAKER_RESET_SECONDS = float(os.getenv("WEATHER_BREAKER_RESET_SECONDS", "30"))
+# 항로 하나의 날씨 조회 전체에 허용하는 시간(초). 넘으면 남은 waypoint는 오류로 반환
+WEATHER_REQUEST_DEADLINE = float(os.getenv("WEATHER_REQUEST_DEADLINE", "8"))
+# h2 패키지가 설치되어 있으면 HTTP/2 사용
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class UpstreamUnavailable(Exception):
+    """WeatherAPI를 지금 호출할 수 없음 (회로 열림, 호출 시한 초과)"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """회로 차단기가 열려 있어 호출하지 않음"""
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """업스트림 장애로 볼 오류인지 (요청 자체가 잘못된 4xx는 제외)"""
+    if isinstance(exc, (UpstreamUnavailable, httpx.TransportError)):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code == 429
+    return False
+
+
+class CircuitBreaker:
+    """
+    closed: 정상 호출. 연속 실패가 failure_threshold에 이르면 open
+    open: reset_timeout초 동안 호출하지 않고 바로 실패
+    half_open: 시험 호출 1건만 허용. 성공하면 closed, 실패하면 다시 open
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+
+        self.opened = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.short_circuited += 1
+                return False
+            self.state = "half_open"
+            self._trial = False
+        if self.state == "half_open":
+            if self._trial:
+                self.short_circuited += 1
+                return False
+            self._trial = True
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._trial = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self._trial = False
+        if self.state == "half_open" or (
+            self.state == "closed" and self.consecutive_failures >= self.failure_threshold
+        ):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self.opened += 1
+            print(f"[경고] WeatherAPI 회로 차단기 열림 (연속 실패 {self.consecutive_failures}회)")
+
+    def release(self):
+        """결과 없이 끝난(취소된) 시험 호출 반환"""
+        self._trial = False
+
+    def stats(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_seconds": self.reset_timeout,
+            "retry_in_seconds": retry_in,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class UpstreamMetrics:
+    """최근 window건의 HTTP 시도 지연 시간과 결과별 누적 횟수"""
+
+    def __init__(self, window: int = 1024):
+        self._latencies: deque = deque(maxlen=window)
+        self.outcomes: Counter = Counter()
+        self.retries = 0
+
+    def record(self, seconds: float, outcome: str):
+        self._latencies.append(seconds)
+        self.outcomes[outcome] += 1
+
+    def stats(self) -> dict:
+        latency = None
+        if self._latencies:
+            values = np.array(self._latencies) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            latency = {
+                "window": len(values),
+                "avg_ms": round(float(values.mean()), 1),
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(values.max()), 1),
+            }
+        return {"attempts": sum(self.outcomes.values()), "outcomes": dict(self.outcomes), "retries": self.retries, "latency": latency}
+
+
+def _outcome(exc: Optional[BaseException], status_code: Optional[int] = None) -> str:
+    if exc is None:
+        return "ok" if status_code < 400 else f"http_{status_code // 100}xx"
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    return "transport_error"
+
+
+class WeatherClient:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.breaker = CircuitBreaker(WEATHER_BREAKER_FAILURES, WEATHER_BREAKER_RESET_SECONDS)
+        self.metrics = UpstreamMetrics()
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=WEATHER_API_BASE_URL,
+            http2=HTTP2_AVAILABLE,
+            timeout=WEATHER_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=WEATHER_MAX_CONNECTIONS,
+                max_keepalive_connections=WEATHER_MAX_CONNECTIONS,
+            ),
+        )
+        self._semaphore = asyncio.Semaphore(WEATHER_CONCURRENCY)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _attempt(self, path: str, params: dict, deadline: float) -> httpx.Response:
+        async with self._semaphore:
+            # 동시 호출 대기 중에 회로가 열렸으면 바로 실패
+            if not self.breaker.allow():
+                raise CircuitOpenError("WeatherAPI 회로 차단 중")
+            # 동시 호출 대기로 시한을 다 쓴 경우 업스트림을 호출하지 않음
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise UpstreamUnavailable(f"호출 시한 초과 ({WEATHER_CALL_DEADLINE}s)")
+            timeout = min(WEATHER_HTTP_TIMEOUT, remaining)
+            started = time.monotonic()
+            try:
+                # 연결 풀 대기 등 httpx 타임아웃 밖의 지연도 시한 안에서 끊기도록 한 번 더 감쌈
+                response = await asyncio.wait_for(
+                    self._client.get(path, params={"key": WEATHER_API_KEY, **params}, timeout=timeout),
+                    timeout=timeout,
+                )
+            except asyncio.TimeoutError:
+                self.metrics.record(time.monotonic() - started, "timeout")
+                raise httpx.TimeoutException(f"{timeout:.1f}s 안에 응답 없음")
+            except httpx.TransportError as e:
+                self.metrics.record(time.monotonic() - started, _outcome(e))
+                raise
+        self.metrics.record(time.monotonic() - started, _outcome(None, response.status_code))
+        return response
+
+    async def get_json(self, path: str, params: dict, retries: int = WEATHER_RETRIES) -> dict:
+        """
+        WeatherAPI GET 호출 (조회만 하므로 재시도해도 안전).
+        - 연결 오류/타임아웃/429/5xx는 WEATHER_CALL_DEADLINE 안에서 최대 retries번 재시도
+        - 4xx 응답은 재시도하지 않고 httpx.HTTPStatusError로 올림
+        - 회로가 열려 있거나 시한을 넘기면 UpstreamUnavailable
+        lifespan 밖(스크립트 등)에서 호출되면 클라이언트를 바로 만듭니다.
+        """
+        if self._client is None:
+            await self.start()
+        deadline = time.monotonic() + WEATHER_CALL_DEADLINE
+        attempt = 0
+        while True:
+            try:
+                response = await self._attempt(path, params, deadline)
+                response.raise_for_status()
+            except CircuitOpenError:
+                raise
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except UpstreamUnavailable:
+                # 업스트림 상태와 무관한 로컬 시한 초과
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_upstream_failure(e):
+                    # 4xx: 업스트림은 정상 응답함
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                attempt += 1
+                # 전체 지터 지수 백오프. 시한 안에 재시도할 수 없으면 포기
+                delay = random.uniform(0, WEATHER_RETRY_BACKOFF * 2 ** (attempt - 1))
+                if attempt > retries or time.monotonic() + delay >= deadline:
+                    raise
+                self.metrics.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            return response.json()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "upstream": self.metrics.stats(),
+            "http2": HTTP2_AVAILABLE,
+            "concurrency": WEATHER_CONCURRENCY,
+            "call_deadline_seconds": WEATHER_CALL_DEADLINE,
+            "retries": WEATHER_RETRIES,
+        }
+
+
+# 애플리케이션 전역 WeatherAPI 클라이언트 (main.py lifespan에서 start/close)
+weather_client = WeatherClient()
+
+
+async def gather_in_order(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    deadline: float,
+    on_timeout: Callable[[T], R],
+) -> List[R]:
+    """
+    items마다 worker를 동시에 실행하고 입력 순서대로 결과를 반환합니다.
+    deadline(초) 안에 끝나지 않은 작업은 취소하고 on_timeout(item) 값으로 채웁니다.
+    worker는 자체 오류를 결과 값으로 바꿔 반환해야 합니다.
+    """
+    tasks = [asyncio.create_task(worker(item)) for item in items]
+    if not tasks:
+        return []
+
+    _, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return [
+        on_timeout(item) if task in pending else task.result()
+        for item, task in zip(items, tasks)
+    ]
@@ -0,0 +1,345 @@
+# /services/weather_history.py
+# 날씨 관측 이력
+#   - WeatherAPI 현재 날씨 응답을 받을 때마다(weather_cache 로드 리스너) 격자 셀·정시당 한 행을
+#     write-behind 버퍼로 모아 weather_observations에 묶음 삽입합니다.
+#   - 지난 날짜(KST)의 시간별 관측은 weather_daily로 일별 집계하고,
+#     WEATHER_HISTORY_RAW_DAYS보다 오래된 시간별 행은 삭제합니다.
+#   - GET /weather/route/{id}/history는 항로 waypoint를 셀로 바꿔 (셀, 시간) 인덱스 범위로 읽습니다.
+
+import asyncio
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pytz
+from sqlalchemy import select, delete, insert, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import SessionLocal
+from models.tables import WeatherObservation, WeatherDaily
+from services.route_cache import route_cache
+from services.weather_cache import weather_cache, snap
+from services.weather_series import json_rows
+from services.write_behind import WriteBehindBuffer
+
+WEATHER_HISTORY_ENABLED = os.getenv("WEATHER_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+WEATHER_HISTORY_FLUSH_INTERVAL = float(os.getenv("WEATHER_HISTORY_FLUSH_INTERVAL", "5"))
+WEATHER_HISTORY_BATCH_SIZE = int(os.getenv("WEATHER_HISTORY_BATCH_SIZE", "500"))
+WEATHER_HISTORY_MAX_PENDING = int(os.getenv("WEATHER_HISTORY_MAX_PENDING", "20000"))
+# 시간별 관측 보관 일수 (일별 집계가 끝난 날짜만 삭제)
+WEATHER_HISTORY_RAW_DAYS = int(os.getenv("WEATHER_HISTORY_RAW_DAYS", "30"))
+# 일별 집계 실행 주기(초)
+WEATHER_HISTORY_ROLLUP_INTERVAL = float(os.getenv("WEATHER_HISTORY_ROLLUP_INTERVAL", "3600"))
+# resolution=auto일 때 이 일수 이하 범위는 시간별로 응답
+WEATHER_HISTORY_HOURLY_DAYS = int(os.getenv("WEATHER_HISTORY_HOURLY_DAYS", "7"))
+# 한 번에 조회할 수 있는 최대 범위
+WEATHER_HISTORY_MAX_HOURS = 31 * 24
+WEATHER_HISTORY_MAX_DAYS = 366
+
+KST = pytz.timezone("Asia/Seoul")
+
+OBSERVATION_FIELDS = ("wind_kph", "gust_kph", "wave_m", "vis_km", "precip_mm", "temp_c", "condition_code")
+DAILY_FIELDS = (
+    "samples", "wind_avg_kph", "wind_max_kph", "gust_max_kph", "wave_max_m",
+    "vis_min_km", "precip_sum_mm", "temp_min_c", "temp_max_c", "condition_code",
+)
+_INTEGER_FIELDS = ("condition_code", "samples")
+
+observation_buffer = WriteBehindBuffer(
+    "weather_observations",
+    WeatherObservation.__table__,
+    flush_interval=WEATHER_HISTORY_FLUSH_INTERVAL,
+    batch_size=WEATHER_HISTORY_BATCH_SIZE,
+    max_pending=WEATHER_HISTORY_MAX_PENDING,
+)
+
+
+def _utc_naive(value: datetime) -> datetime:
+    """DB에는 UTC 기준 naive datetime으로 저장합니다. (시간대 없는 입력은 KST로 봄)"""
+    if value.tzinfo is None:
+        value = KST.localize(value)
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _kst_day_start_utc(day: date) -> datetime:
+    return _utc_naive(datetime(day.year, day.month, day.day))
+
+
+def _kst_today() -> date:
+    return datetime.now(KST).date()
+
+
+class ObservationRecorder:
+    """현재 날씨 응답 → 격자 셀·정시당 한 행 (같은 시간의 두 번째 응답부터는 건너뜀)"""
+
+    def __init__(self, max_cells: int = 100000):
+        self.max_cells = max_cells
+        self._last_hour: Dict[Tuple[float, float], datetime] = {}
+        self.recorded = 0
+        self.skipped = 0
+
+    def __call__(self, path: str, cell_lat: float, cell_lon: float, data: dict):
+        if path != "/current.json":
+            return
+        current = data.get("current") or {}
+        epoch = current.get("last_updated_epoch") or time.time()
+        observed_at = datetime.fromtimestamp(int(epoch) // 3600 * 3600, timezone.utc).replace(tzinfo=None)
+
+        cell = (cell_lat, cell_lon)
+        if self._last_hour.get(cell) == observed_at:
+            self.skipped += 1
+            return
+        if len(self._last_hour) >= self.max_cells:
+            self._last_hour.clear()
+        self._last_hour[cell] = observed_at
+
+        observation_buffer.add([{
+            "cell_lat": cell_lat,
+            "cell_lon": cell_lon,
+            "observed_at": observed_at,
+            "wind_kph": current.get("wind_kph"),
+            "gust_kph": current.get("gust_kph"),
+            # WeatherAPI 해양(marine) 응답의 유의 파고. 일반 current 응답에는 없음
+            "wave_m": current.get("sig_ht_mt"),
+            "vis_km": current.get("vis_km"),
+            "precip_mm": current.get("precip_mm"),
+            "temp_c": current.get("temp_c"),
+            "condition_code": (current.get("condition") or {}).get("code"),
+        }])
+        self.recorded += 1
+
+
+observation_recorder = ObservationRecorder()
+
+
+# ---- 일별 집계 ----
+
+def _mode(values: pd.Series):
+    values = values.dropna()
+    return values.mode().iloc[0] if len(values) else None
+
+
+async def rollup_day(db: AsyncSession, day: date) -> int:
+    """KST 날짜 하나의 시간별 관측을 셀별로 집계해 weather_daily를 다시 씁니다. 집계한 셀 수를 반환합니다."""
+    start = _kst_day_start_utc(day)
+    end = _kst_day_start_utc(day + timedelta(days=1))
+    result = await db.execute(
+        select(WeatherObservation.cell_lat, WeatherObservation.cell_lon, WeatherObservation.observed_at,
+               *[getattr(WeatherObservation, f) for f in OBSERVATION_FIELDS])
+        .where(WeatherObservation.observed_at >= start, WeatherObservation.observed_at < end)
+    )
+    df = pd.DataFrame(result.all(), columns=["cell_lat", "cell_lon", "observed_at", *OBSERVATION_FIELDS])
+
+    await db.execute(delete(WeatherDaily).where(WeatherDaily.day == day))
+    if df.empty:
+        await db.commit()
+        return 0
+
+    df = df.drop_duplicates(["cell_lat", "cell_lon", "observed_at"]).astype({f: "float64" for f in OBSERVATION_FIELDS})
+    daily = df.groupby(["cell_lat", "cell_lon"]).agg(
+        samples=("observed_at", "size"),
+        wind_avg_kph=("wind_kph", "mean"),
+        wind_max_kph=("wind_kph", "max"),
+        gust_max_kph=("gust_kph", "max"),
+        wave_max_m=("wave_m", "max"),
+        vis_min_km=("vis_km", "min"),
+        precip_sum_mm=("precip_mm", lambda s: s.sum(min_count=1)),
+        temp_min_c=("temp_c", "min"),
+        temp_max_c=("temp_c", "max"),
+        condition_code=("condition_code", _mode),
+    ).reset_index()
+    daily["wind_avg_kph"] = daily["wind_avg_kph"].round(2)
+
+    rows = []
+    for record in daily.to_dict("records"):
+        row = {k: (None if v is None or v != v else v) for k, v in record.items()}
+        row["samples"] = int(row["samples"])
+        if row["condition_code"] is not None:
+            row["condition_code"] = int(row["condition_code"])
+        row["day"] = day
+        rows.append(row)
+    await db.execute(insert(WeatherDaily), rows)
+    await db.commit()
+    return len(rows)
+
+
+async def rollup(db: AsyncSession) -> dict:
+    """
+    마지막으로 집계한 날짜(다시 집계)부터 어제(KST)까지 일별 집계 후,
+    보관 기간이 지났고 집계가 끝난 시간별 관측을 삭제합니다.
+    """
+    today = _kst_today()
+    last_day = (await db.execute(select(func.max(WeatherDaily.day)))).scalar()
+    first_raw = (await db.execute(select(func.min(WeatherObservation.observed_at)))).scalar()
+    if first_raw is None:
+        return {"days": 0, "cells": 0, "deleted": 0}
+
+    start = last_day or datetime.fromtimestamp(
+        first_raw.replace(tzinfo=timezone.utc).timestamp(), KST
+    ).date()
+    days, cells = 0, 0
+    day = start
+    while day < today:
+        cells += await rollup_day(db, day)
+        days += 1
+        day += timedelta(days=1)
+
+    deleted = 0
+    if days or last_day:
+        rolled_until = day if days else last_day + timedelta(days=1)
+        cutoff = min(_kst_day_start_utc(today - timedelta(days=WEATHER_HISTORY_RAW_DAYS)), _kst_day_start_utc(rolled_until))
+        result = await db.execute(delete(WeatherObservation).where(WeatherObservation.observed_at < cutoff))
+        await db.commit()
+        deleted = result.rowcount or 0
+    return {"days": days, "cells": cells, "deleted": deleted}
+
+
+class WeatherHistoryRollup:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.last_result: Optional[dict] = None
+        self.last_run_at: Optional[float] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> dict:
+        # 방금 받은 관측까지 반영한 뒤 집계
+        await observation_buffer.flush()
+        async with SessionLocal() as db:
+            self.last_result = await rollup(db)
+        self.runs += 1
+        self.last_run_at = time.time()
+        return self.last_result
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[오류] 날씨 관측 일별 집계 실패: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_result": self.last_result,
+            "raw_retention_days": WEATHER_HISTORY_RAW_DAYS,
+        }
+
+
+weather_rollup = WeatherHistoryRollup(WEATHER_HISTORY_ROLLUP_INTERVAL)
+
+if WEATHER_HISTORY_ENABLED:
+    weather_cache.add_load_listener(observation_recorder)
+
+
+# ---- 조회 ----
+
+async def get_route_history(
+    db: AsyncSession,
+    route_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    resolution: str = "auto",
+):
+    """
+    항로 waypoint별 관측 이력을 (waypoint × 시간) 열 형식으로 반환합니다.
+    - start/end: 시간대가 없으면 KST로 봄. 기본은 최근 24시간
+    - resolution: hour(시간별 관측) / day(일별 집계, KST 날짜) / auto(범위가 짧고 보관 기간 안이면 hour)
+    범위가 잘못되면 ValueError
+    """
+    geometry = await route_cache.get(db, route_id)
+    if not geometry:
+        return {"error": "해당 경로의 waypoint를 찾을 수 없습니다."}
+
+    end_utc = _utc_naive(end) if end else datetime.utcnow()
+    start_utc = _utc_naive(start) if start else end_utc - timedelta(hours=24)
+    if start_utc >= end_utc:
+        raise ValueError("from은 to보다 이전이어야 합니다.")
+    if resolution == "auto":
+        raw_since = datetime.utcnow() - timedelta(days=WEATHER_HISTORY_RAW_DAYS)
+        short = end_utc - start_utc <= timedelta(days=WEATHER_HISTORY_HOURLY_DAYS)
+        resolution = "hour" if short and start_utc >= raw_since else "day"
+
+    # waypoint → 격자 셀
+    points = list(geometry.points())
+    cells: Dict[Tuple[float, float], int] = {}
+    waypoint_cells = [cells.setdefault(snap(lat, lon), len(cells)) for _, lat, lon in points]
+    cell_keys = list(cells)
+
+    if resolution == "hour":
+        first = start_utc.replace(minute=0, second=0, microsecond=0)
+        # end 직전까지 시작한 정시들
+        axis = pd.date_range(first, end_utc, freq="h", inclusive="left")
+        if len(axis) > WEATHER_HISTORY_MAX_HOURS:
+            raise ValueError(f"시간별 조회는 최대 {WEATHER_HISTORY_MAX_HOURS // 24}일까지 가능합니다.")
+        table, time_col, fields = WeatherObservation, WeatherObservation.observed_at, OBSERVATION_FIELDS
+        condition = (time_col >= first, time_col < end_utc)
+        labels = [ts.tz_localize("UTC").tz_convert(KST).strftime("%Y-%m-%d %H:%M") for ts in axis]
+        column_of = {ts.to_pydatetime(): i for i, ts in enumerate(axis)}
+    else:
+        first_day = datetime.fromtimestamp(start_utc.replace(tzinfo=timezone.utc).timestamp(), KST).date()
+        last_day = datetime.fromtimestamp((end_utc - timedelta(microseconds=1)).replace(tzinfo=timezone.utc).timestamp(), KST).date()
+        days = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        if len(days) > WEATHER_HISTORY_MAX_DAYS:
+            raise ValueError(f"일별 조회는 최대 {WEATHER_HISTORY_MAX_DAYS}일까지 가능합니다.")
+        table, time_col, fields = WeatherDaily, WeatherDaily.day, DAILY_FIELDS
+        condition = (time_col >= first_day, time_col <= last_day)
+        labels = [d.isoformat() for d in days]
+        column_of = {d: i for i, d in enumerate(days)}
+
+    # (셀, 시간) 복합 인덱스 범위 조회
+    result = await db.execute(
+        select(table.cell_lat, table.cell_lon, time_col, *[getattr(table, f) for f in fields])
+        .where(tuple_(table.cell_lat, table.cell_lon).in_(cell_keys), *condition)
+    )
+
+    matrices = {f: np.full((len(cell_keys), len(labels)), np.nan) for f in fields}
+    rows = 0
+    for cell_lat, cell_lon, moment, *values in result:
+        row = cells.get((round(cell_lat, 4), round(cell_lon, 4)))
+        col = column_of.get(moment)
+        if row is None or col is None:
+            continue
+        rows += 1
+        for f, v in zip(fields, values):
+            if v is not None:
+                matrices[f][row, col] = v
+
+    # 셀 행렬 → waypoint 행렬 (같은 셀의 waypoint는 같은 행)
+    index = np.array(waypoint_cells, dtype=np.int64)
+    return {
+        "route_id": route_id,
+        "resolution": resolution,
+        "from": KST.fromutc(start_utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "to": KST.fromutc(end_utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "times": labels,
+        "waypoints": {
+            "waypoint_order": [p[0] for p in points],
+            "latitude": [p[1] for p in points],
+            "longitude": [p[2] for p in points],
+        },
+        "series": {f: json_rows(matrices[f][index], integer=f in _INTEGER_FIELDS) for f in fields},
+        "records": rows,
+    }
+
+
+def history_stats() -> dict:
+    return {
+        "recorder": {"recorded": observation_recorder.recorded, "skipped_same_hour": observation_recorder.skipped},
+        "buffer": observation_buffer.stats(),
+        "rollup": weather_rollup.stats(),
+    }
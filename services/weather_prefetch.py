@@ -0,0 +1,159 @@
+# /services/weather_prefetch.py
+# 출항 중인 선박(ships.departure != 0)의 운항 항로(ships.route_id) 날씨를 백그라운드에서 미리 조회합니다.
+# 캐시 시간 구간(WEATHER_CACHE_BUCKET_SECONDS)이 바뀐 직후에 현재 날씨/예보를 채워 두므로
+# 사용자 요청은 대부분 캐시에서 응답합니다. 업스트림 호출은 WEATHER_PREFETCH_RATE(건/초)로 제한합니다.
+
+import asyncio
+import os
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from db import SessionLocal
+from models.tables import Ship
+from services.route_cache import route_cache
+from services.weather_cache import snap, WEATHER_CACHE_BUCKET_SECONDS
+from services.weather_service import ROUTE_WEATHER_REQUESTS, fetch_cached, is_cached
+
+WEATHER_PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# 실행 주기(초). 기본값은 캐시 시간 구간과 같아 구간이 바뀔 때마다 한 번 실행
+WEATHER_PREFETCH_INTERVAL = float(os.getenv("WEATHER_PREFETCH_INTERVAL", str(WEATHER_CACHE_BUCKET_SECONDS)))
+# 주기 시작 후 최대 지연(초). 여러 인스턴스가 같은 순간에 몰리지 않도록 무작위로 분산
+WEATHER_PREFETCH_JITTER = float(os.getenv("WEATHER_PREFETCH_JITTER", "30"))
+# 초당 최대 업스트림 호출 수
+WEATHER_PREFETCH_RATE = float(os.getenv("WEATHER_PREFETCH_RATE", "5"))
+
+
+class RateLimiter:
+    """호출 시작 간격을 1/rate초 이상으로 맞춥니다."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        delay = self._next - now
+        self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class WeatherPrefetcher:
+    def __init__(self, interval: float, jitter: float, rate: float):
+        self.interval = interval
+        self.jitter = jitter
+        self.rate = rate
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[List[int]], Awaitable[None]]] = []
+
+        self.cycles = 0
+        self.last_started_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_routes = 0
+        self.last_cells = 0
+        self.fetched = 0
+        self.skipped = 0
+        self.failures = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def add_cycle_listener(self, listener: Callable[[List[int]], Awaitable[None]]):
+        """미리 조회 주기가 끝날 때마다 출항 선박 항로 id 목록으로 호출됩니다. (예: 위험 알림 계산)"""
+        self._listeners.append(listener)
+
+    def _next_delay(self) -> float:
+        """다음 주기 경계(벽시계 기준, 캐시 시간 구간과 맞춤)까지 남은 시간 + jitter"""
+        now = time.time()
+        boundary = (now // self.interval + 1) * self.interval
+        return boundary - now + random.uniform(0, self.jitter)
+
+    async def _run(self):
+        # 시작 직후 한 번 채운 뒤 주기마다 실행
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"[오류] 날씨 미리 조회 실패: {e}")
+            await asyncio.sleep(self._next_delay())
+
+    async def _targets(self) -> Tuple[List[int], List[Tuple[float, float]]]:
+        """(출항 선박 항로 id 목록, 조회할 격자 셀 대표 좌표 목록)"""
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Ship.route_id)
+                .where(Ship.departure != 0, Ship.route_id.isnot(None))
+                .distinct()
+            )
+            route_ids = list(result.scalars())
+            geometries = await route_cache.get_many(db, route_ids)
+
+        # 같은 격자 셀에 속한 waypoint는 캐시 키가 같으므로 한 번만 조회
+        cells: Dict[Tuple[float, float], Tuple[float, float]] = {}
+        for geometry in geometries.values():
+            for _, latitude, longitude in geometry.points():
+                cells.setdefault(snap(latitude, longitude), (latitude, longitude))
+        return list(geometries), list(cells.values())
+
+    async def run_once(self) -> dict:
+        started = time.monotonic()
+        self.last_started_at = time.time()
+        route_ids, cells = await self._targets()
+        limiter = RateLimiter(self.rate)
+
+        async def refresh(request, latitude, longitude):
+            try:
+                # 장애 시 오래된 값으로 채운 것은 미리 조회 성공으로 보지 않음
+                await fetch_cached(request, latitude, longitude, allow_stale=False)
+                self.fetched += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"[경고] 날씨 미리 조회 실패 ({request[0]} {latitude},{longitude}): {e}")
+
+        tasks = []
+        for latitude, longitude in cells:
+            for request in ROUTE_WEATHER_REQUESTS:
+                if is_cached(request, latitude, longitude):
+                    self.skipped += 1
+                    continue
+                await limiter.wait()
+                tasks.append(asyncio.create_task(refresh(request, latitude, longitude)))
+        await asyncio.gather(*tasks)
+
+        self.cycles += 1
+        self.last_routes = len(route_ids)
+        self.last_cells = len(cells)
+        self.last_duration = round(time.monotonic() - started, 3)
+
+        for listener in self._listeners:
+            try:
+                await listener(route_ids)
+            except Exception as e:
+                print(f"[오류] 날씨 미리 조회 후속 처리 실패: {e}")
+        return {"routes": len(route_ids), "cells": len(cells), "requests": len(tasks), "duration": self.last_duration}
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "interval_seconds": self.interval,
+            "jitter_seconds": self.jitter,
+            "rate_per_second": self.rate,
+            "cycles": self.cycles,
+            "last_started_at": self.last_started_at,
+            "last_duration": self.last_duration,
+            "last_routes": self.last_routes,
+            "last_cells": self.last_cells,
+            "fetched": self.fetched,
+            "skipped_cached": self.skipped,
+            "failures": self.failures,
+        }
+
+
+weather_prefetcher = WeatherPrefetcher(WEATHER_PREFETCH_INTERVAL, WEATHER_PREFETCH_JITTER, WEATHER_PREFETCH_RATE)
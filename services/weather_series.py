@@ -0,0 +1,91 @@
+# /services/weather_series.py
+# forecast.json 응답을 시간 인덱스 배열로 한 번만 변환해 두는 시간별 예보 시리즈
+# 임의 시각(offset)의 예보는 (시각 - 시작 시각) / 1시간 인덱스 계산으로 바로 찾습니다.
+
+from typing import List, Optional
+import numpy as np
+
+HOUR_SECONDS = 3600
+# 타임라인 응답에 담는 시간별 항목 (WeatherAPI forecast hour 필드 이름)
+SERIES_FIELDS = (
+    "temp_c", "wind_kph", "gust_kph", "wind_degree", "precip_mm",
+    "vis_km", "chance_of_rain", "humidity", "pressure_mb", "condition_code",
+)
+
+
+class HourlySeries:
+    __slots__ = ("location", "hours", "epochs", "start_epoch", "regular", "columns")
+
+    def __init__(self, location: dict, hours: List[dict]):
+        self.location = location
+        self.hours = hours
+        self.epochs = np.fromiter((h["time_epoch"] for h in hours), dtype=np.int64, count=len(hours))
+        self.start_epoch = int(self.epochs[0])
+        # 1시간 간격이 끊김 없이 이어지면 인덱스 계산, 아니면 이진 탐색
+        self.regular = bool(np.all(np.diff(self.epochs) == HOUR_SECONDS))
+        self.columns = {
+            field: np.array([h.get(field, np.nan) for h in hours], dtype=np.float64)
+            for field in SERIES_FIELDS if field != "condition_code"
+        }
+        self.columns["condition_code"] = np.array(
+            [(h.get("condition") or {}).get("code", np.nan) for h in hours], dtype=np.float64
+        )
+
+    @classmethod
+    def from_forecast(cls, data: dict) -> "HourlySeries":
+        hours = [h for day in data.get("forecast", {}).get("forecastday", []) for h in day.get("hour", [])]
+        if not hours:
+            raise ValueError("Hourly forecast not found.")
+        # time은 현지 시각 문자열이므로 UTC 기준 time_epoch로 정렬/조회
+        hours.sort(key=lambda h: h["time_epoch"])
+        return cls(data.get("location", {}), hours)
+
+    def __len__(self):
+        return len(self.hours)
+
+    @property
+    def end_epoch(self) -> int:
+        return int(self.epochs[-1])
+
+    def index_at(self, epoch: float) -> int:
+        """epoch(UTC 초)에 가장 가까운 시간 인덱스 (범위 밖이면 처음/마지막)"""
+        if self.regular:
+            i = int(round((epoch - self.start_epoch) / HOUR_SECONDS))
+        else:
+            i = int(np.searchsorted(self.epochs, epoch))
+            if i > 0 and (i == len(self.epochs) or epoch - self.epochs[i - 1] <= self.epochs[i] - epoch):
+                i -= 1
+        return min(max(i, 0), len(self.hours) - 1)
+
+    def at(self, epoch: float) -> dict:
+        return self.hours[self.index_at(epoch)]
+
+
+def align(series: List[Optional[HourlySeries]], fields=SERIES_FIELDS):
+    """
+    waypoint별 시리즈를 공통 시간축에 맞춘 (시간축 epoch 배열, {필드: waypoint × 시간 행렬})을 반환합니다.
+    값이 없는 칸(조회 실패 waypoint, 시리즈 범위 밖)은 NaN입니다.
+    """
+    present = [s for s in series if s is not None]
+    if not present:
+        return np.empty(0, dtype=np.int64), {field: np.empty((len(series), 0)) for field in fields}
+
+    start = min(s.start_epoch for s in present)
+    end = max(s.end_epoch for s in present)
+    axis = np.arange(start, end + HOUR_SECONDS, HOUR_SECONDS, dtype=np.int64)
+    matrices = {field: np.full((len(series), len(axis)), np.nan) for field in fields}
+
+    for row, s in enumerate(series):
+        if s is None:
+            continue
+        # 같은 시간축 위의 열 위치 (불규칙 시리즈도 시각 기준으로 배치)
+        cols = (s.epochs - start) // HOUR_SECONDS
+        for field in fields:
+            matrices[field][row, cols] = s.columns[field]
+    return axis, matrices
+
+
+def json_rows(matrix: np.ndarray, integer: bool = False):
+    """waypoint × 시간 행렬 → JSON 행 목록 (NaN은 null)"""
+    cast = int if integer else (lambda v: round(v, 2))
+    return [[None if v != v else cast(v) for v in row] for row in matrix.tolist()]
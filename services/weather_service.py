@@ -1,131 +1,203 @@
 import httpx
 import logging
+import os
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from models.tables import Waypoint
-from datetime import datetime, timedelta, timezone
+from services.route_cache import route_cache
+from services.weather_client import gather_in_order, UpstreamUnavailable, WEATHER_REQUEST_DEADLINE
+from services.weather_cache import weather_cache
+from services.weather_series import HourlySeries, align, json_rows, SERIES_FIELDS
+from datetime import datetime, timedelta
+import numpy as np
 import pytz
 
-WEATHER_API_KEY = "WEATHER_API_KEY"
+KST = pytz.timezone("Asia/Seoul")
+
+
+def _threshold(name: str, default: str):
+    """환경변수 기준값. 빈 값이면 해당 항목은 위험 판단에 쓰지 않음"""
+    value = os.getenv(name, default).strip()
+    return float(value) if value else None
+
+
+# 위험 기준: 하나라도 넘으면 is_danger
+WEATHER_DANGER_WIND_KPH = _threshold("WEATHER_DANGER_WIND_KPH", "30")      # 풍속 초과
+WEATHER_DANGER_GUST_KPH = _threshold("WEATHER_DANGER_GUST_KPH", "")        # 돌풍 초과
+WEATHER_DANGER_PRECIP_MM = _threshold("WEATHER_DANGER_PRECIP_MM", "")      # 시간당 강수량 초과
+WEATHER_DANGER_MIN_VIS_KM = _threshold("WEATHER_DANGER_MIN_VIS_KM", "")    # 시정 미만
+
+# (예보 항목, 비교, 기준값)
+DANGER_RULES = [
+    (field, op, limit)
+    for field, op, limit in (
+        ("wind_kph", ">", WEATHER_DANGER_WIND_KPH),
+        ("gust_kph", ">", WEATHER_DANGER_GUST_KPH),
+        ("precip_mm", ">", WEATHER_DANGER_PRECIP_MM),
+        ("vis_km", "<", WEATHER_DANGER_MIN_VIS_KM),
+    )
+    if limit is not None
+]
+
+
+def danger_reasons(hour: dict) -> List[str]:
+    """기준을 넘은 항목 이름 목록 (비어 있으면 안전)"""
+    reasons = []
+    for field, op, limit in DANGER_RULES:
+        value = hour.get(field)
+        if value is not None and (value > limit if op == ">" else value < limit):
+            reasons.append(field)
+    return reasons
+
+
+def danger_mask(matrices: dict) -> np.ndarray:
+    """waypoint × 시간 행렬별 위험 여부 (1/0, 예보가 없는 칸은 NaN)"""
+    wind = matrices["wind_kph"]
+    danger = np.zeros(wind.shape, dtype=bool)
+    for field, op, limit in DANGER_RULES:
+        values = matrices[field]
+        with np.errstate(invalid="ignore"):
+            danger |= (values > limit) if op == ">" else (values < limit)
+    return np.where(np.isnan(wind), np.nan, danger)
+
+
+# 항로 날씨 조회가 사용하는 WeatherAPI 요청 (path, 응답 변환, 파라미터). 미리 조회(weather_prefetch)도 같은 키를 채움
+CURRENT_REQUEST = ("/current.json", None, {"aqi": "no"})
+FORECAST_REQUEST = ("/forecast.json", HourlySeries.from_forecast, {"days": 2, "aqi": "no"})
+ROUTE_WEATHER_REQUESTS = (CURRENT_REQUEST, FORECAST_REQUEST)
+
+
+async def fetch_cached(request, latitude: float, longitude: float, allow_stale: bool = True):
+    """(응답, stale 경과 초 또는 None)"""
+    path, parse, params = request
+    return await weather_cache.fetch(path, latitude, longitude, parse=parse, allow_stale=allow_stale, **params)
+
+
+def is_cached(request, latitude: float, longitude: float) -> bool:
+    path, parse, params = request
+    return weather_cache.contains(path, latitude, longitude, parse=parse, **params)
+
+
+async def _fetch_series(latitude: float, longitude: float):
+    """waypoint 좌표의 2일치 시간별 예보 시리즈 (캐시). (HourlySeries, stale 경과 초 또는 None)"""
+    return await fetch_cached(FORECAST_REQUEST, latitude, longitude)
+
+
+def _mark_stale(entry: dict, stale_age) -> dict:
+    """업스트림 장애로 마지막 응답을 대신 반환한 경우 표시"""
+    if stale_age is not None:
+        entry["stale"] = True
+        entry["stale_age_seconds"] = stale_age
+    return entry
+
+
+def _deadline_error(point):
+    """전체 조회 시간(WEATHER_REQUEST_DEADLINE) 안에 끝나지 않은 waypoint"""
+    waypoint_order, latitude, longitude = point
+    return {
+        "waypoint_order": waypoint_order,
+        "latitude": latitude,
+        "longitude": longitude,
+        "error": f"Deadline exceeded ({WEATHER_REQUEST_DEADLINE}s)"
+    }
+
 
 # 현재 날씨 조회 (current.json)
 async def fetch_weather_by_route(session: AsyncSession, route_id: int):
-    result = await session.execute(
-        select(Waypoint).where(Waypoint.route_id == route_id).order_by(Waypoint.waypoint_order)
-    )
-    waypoints = result.scalars().all()
+    geometry = await route_cache.get(session, route_id)
 
-    if not waypoints:
+    if not geometry:
         return {"error": "해당 경로의 waypoint를 찾을 수 없습니다."}
 
-    url = "https://api.weatherapi.com/v1/current.json"
-    weather_results = []
+    async def fetch_one(point):
+        waypoint_order, latitude, longitude = point
+        q_param = f"{round(latitude, 4)},{round(longitude, 4)}"
+        try:
+            # 캐시된 응답을 공유하므로 복사 후 waypoint 정보를 덧붙임
+            data, stale_age = await fetch_cached(CURRENT_REQUEST, latitude, longitude)
+            data = dict(data)
+            data["waypoint_order"] = waypoint_order
+            data["latitude"] = latitude
+            data["longitude"] = longitude
+            return _mark_stale(data, stale_age)
 
-    async with httpx.AsyncClient() as client:
-        for wp in waypoints:
-            q_param = f"{round(wp.latitude, 4)},{round(wp.longitude, 4)}"
-            params = {
-                "key": WEATHER_API_KEY,
-                "q": q_param,
-                "aqi": "no"
+        except httpx.HTTPStatusError as e:
+            logging.warning(f"[WeatherAPI 400] {q_param}: {e.response.text}")
+            return {
+                "waypoint_order": waypoint_order,
+                "latitude": latitude,
+                "longitude": longitude,
+                "error": f"HTTP {e.response.status_code}: {e.response.text}"
+            }
+        except httpx.RequestError as e:
+            logging.error(f"[WeatherAPI Error] {q_param}: {str(e)}")
+            return {
+                "waypoint_order": waypoint_order,
+                "latitude": latitude,
+                "longitude": longitude,
+                "error": f"Request failed: {str(e)}"
+            }
+        except UpstreamUnavailable as e:
+            return {
+                "waypoint_order": waypoint_order,
+                "latitude": latitude,
+                "longitude": longitude,
+                "error": f"Upstream unavailable: {str(e)}"
             }
-            try:
-                response = await client.get(url, params=params, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-
-                data["waypoint_order"] = wp.waypoint_order
-                data["latitude"] = wp.latitude
-                data["longitude"] = wp.longitude
-                weather_results.append(data)
-
-            except httpx.HTTPStatusError as e:
-                logging.warning(f"[WeatherAPI 400] {q_param}: {e.response.text}")
-                weather_results.append({
-                    "waypoint_order": wp.waypoint_order,
-                    "latitude": wp.latitude,
-                    "longitude": wp.longitude,
-                    "error": f"HTTP {e.response.status_code}: {e.response.text}"
-                })
-            except httpx.RequestError as e:
-                logging.error(f"[WeatherAPI Error] {q_param}: {str(e)}")
-                weather_results.append({
-                    "waypoint_order": wp.waypoint_order,
-                    "latitude": wp.latitude,
-                    "longitude": wp.longitude,
-                    "error": f"Request failed: {str(e)}"
-                })
 
+    # waypoint별 요청을 동시에 보내고 결과는 waypoint 순서대로 정렬
+    weather_results = await gather_in_order(
+        list(geometry.points()), fetch_one, WEATHER_REQUEST_DEADLINE, _deadline_error
+    )
     return {"route_id": route_id, "weather": weather_results}
 
 
 # 시간 offset 기준 예보 조회 (forecast.json)
 async def fetch_forecast_by_route(session: AsyncSession, route_id: int, offset: int):
-    result = await session.execute(
-        select(Waypoint).where(Waypoint.route_id == route_id).order_by(Waypoint.waypoint_order)
-    )
-    waypoints = result.scalars().all()
+    geometry = await route_cache.get(session, route_id)
 
-    if not waypoints:
+    if not geometry:
         return {"error": "해당 경로의 waypoint를 찾을 수 없습니다."}
 
-    url = "https://api.weatherapi.com/v1/forecast.json"
-    weather_results = []
-
     # 현재시간(KST) + offset 계산 → UTC 변환
-    now_kst = datetime.now(pytz.timezone("Asia/Seoul"))
+    now_kst = datetime.now(KST)
     target_kst = now_kst + timedelta(hours=offset)
     target_kst = target_kst.replace(minute=0, second=0, microsecond=0)
     target_utc = target_kst.astimezone(pytz.utc)
+    target_epoch = target_utc.timestamp()
 
     print(f"[DEBUG] 현재 KST: {now_kst}, 타겟 KST: {target_kst}, 타겟 UTC: {target_utc}")
 
-    async with httpx.AsyncClient() as client:
-        for wp in waypoints:
-            q_param = f"{round(wp.latitude, 4)},{round(wp.longitude, 4)}"
-            params = {
-                "key": WEATHER_API_KEY,
-                "q": q_param,
-                "days": 2,
-                "aqi": "no"
+    async def fetch_one(point):
+        waypoint_order, latitude, longitude = point
+        q_param = f"{round(latitude, 4)},{round(longitude, 4)}"
+        try:
+            # 시리즈는 격자/시간 구간마다 한 번만 받아 변환해 두므로 offset이 바뀌어도 다시 조회하지 않음
+            series, stale_age = await _fetch_series(latitude, longitude)
+            closest = series.at(target_epoch)
+            reasons = danger_reasons(closest)
+
+            return _mark_stale({
+                "waypoint_order": waypoint_order,
+                "latitude": latitude,
+                "longitude": longitude,
+                "location": series.location,
+                "current": closest,
+                "is_danger": bool(reasons),
+                "danger_reasons": reasons,
+            }, stale_age)
+
+        except Exception as e:
+            logging.warning(f"[WeatherAPI Forecast Error] {q_param}: {e}")
+            return {
+                "waypoint_order": waypoint_order,
+                "latitude": latitude,
+                "longitude": longitude,
+                "error": str(e)
             }
-            try:
-                response = await client.get(url, params=params, timeout=5)
-                response.raise_for_status()
-                data = response.json()
-
-                forecast_days = data.get("forecast", {}).get("forecastday", [])
-                all_hours = []
-                for day in forecast_days:
-                    all_hours.extend(day.get("hour", []))
-
-                if not all_hours:
-                    raise ValueError("Hourly forecast not found.")
-
-                closest = min(
-                    all_hours,
-                    key=lambda h: abs(
-                        datetime.strptime(h["time"], "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc) - target_utc
-                    )
-                )
-
-                weather_results.append({
-                    "waypoint_order": wp.waypoint_order,
-                    "latitude": wp.latitude,
-                    "longitude": wp.longitude,
-                    "location": data.get("location", {}),
-                    "current": closest,
-                    "is_danger": closest["wind_kph"] > 30,
-                })
-
-            except Exception as e:
-                logging.warning(f"[WeatherAPI Forecast Error] {q_param}: {e}")
-                weather_results.append({
-                    "waypoint_order": wp.waypoint_order,
-                    "latitude": wp.latitude,
-                    "longitude": wp.longitude,
-                    "error": str(e)
-                })
+
+    weather_results = await gather_in_order(
+        list(geometry.points()), fetch_one, WEATHER_REQUEST_DEADLINE, _deadline_error
+    )
 
     return {
         "route_id": route_id,
@@ -135,3 +207,54 @@ async def fetch_forecast_by_route(session: AsyncSession, route_id: int, offset:
         "weather": weather_results
     }
 
+
+# 항로 전체 시간별 예보 (waypoint × 시간 열 형식)
+async def fetch_forecast_timeline(session: AsyncSession, route_id: int):
+    geometry = await route_cache.get(session, route_id)
+
+    if not geometry:
+        return {"error": "해당 경로의 waypoint를 찾을 수 없습니다."}
+
+    async def fetch_one(point):
+        _, latitude, longitude = point
+        try:
+            return await _fetch_series(latitude, longitude)
+        except Exception as e:
+            logging.warning(f"[WeatherAPI Forecast Error] {round(latitude, 4)},{round(longitude, 4)}: {e}")
+            return str(e)
+
+    points = list(geometry.points())
+    results = await gather_in_order(
+        points, fetch_one, WEATHER_REQUEST_DEADLINE,
+        lambda point: f"Deadline exceeded ({WEATHER_REQUEST_DEADLINE}s)"
+    )
+    # 성공한 waypoint는 (HourlySeries, stale 경과 초), 실패한 waypoint는 오류 메시지
+    series = [r[0] if isinstance(r, tuple) else None for r in results]
+    axis, matrices = align(series)
+
+    danger = danger_mask(matrices)
+
+    return {
+        "route_id": route_id,
+        "step_seconds": 3600,
+        "times": axis.tolist(),
+        "times_kst": [datetime.fromtimestamp(t, KST).strftime("%Y-%m-%d %H:%M") for t in axis.tolist()],
+        "waypoints": {
+            "waypoint_order": [p[0] for p in points],
+            "latitude": [p[1] for p in points],
+            "longitude": [p[2] for p in points],
+        },
+        "series": {
+            field: json_rows(matrices[field], integer=field == "condition_code")
+            for field in SERIES_FIELDS
+        },
+        "is_danger": [[None if v != v else bool(v) for v in row] for row in danger.tolist()],
+        "errors": [
+            {"waypoint_order": point[0], "error": result}
+            for point, result in zip(points, results) if not isinstance(result, tuple)
+        ],
+        "stale": [
+            {"waypoint_order": point[0], "stale_age_seconds": result[1]}
+            for point, result in zip(points, results) if isinstance(result, tuple) and result[1] is not None
+        ],
+    }
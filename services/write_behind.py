@@ -0,0 +1,175 @@
+# /services/write_behind.py
+# 자주 들어오는 작은 쓰기(예: 선박 위치 보고)를 메모리에 모았다가 주기적으로
+# 다중 행 INSERT 한 번 + 커밋 한 번으로 반영하는 write-behind 버퍼입니다.
+
+import asyncio
+import os
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import Table, insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+from db import SessionLocal
+
+# 같은 배치가 이 횟수만큼 연속으로 실패하면 반씩 나눠 반영하고, 그래도 실패하는 행은 버립니다.
+WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))
+
+
+def _is_row_error(e: Exception) -> bool:
+    """행 자체가 잘못돼 다시 시도해도 실패하는 오류인지 (FK/제약 위반, 값 형식 오류 등)"""
+    if isinstance(e, (IntegrityError, DataError)):
+        return True
+    # DB에 보내기 전 파라미터 처리 단계의 오류 (DB 연결 오류는 DBAPIError)
+    return isinstance(e, StatementError) and not isinstance(e, DBAPIError)
+
+
+class WriteBehindBuffer:
+    """
+    - flush_interval초마다, 또는 batch_size만큼 쌓이면 즉시 반영합니다.
+    - DB 오류 시 행을 버리지 않고 다음 주기에 다시 시도합니다.
+      같은 배치가 max_retries번 연속 실패하면 반씩 나눠 반영해 문제 행만 골라 버립니다. (rejected, 로그에 행 내용 출력)
+      나눠 반영하는 중에 연결 오류 등 행과 무관한 오류가 나면 남은 행은 다시 대기열에 둡니다.
+    - 대기 행이 max_pending을 넘으면 가장 오래된 행부터 버립니다. (메모리 보호)
+    - stop() 시 남은 행을 모두 반영한 뒤 종료합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        table: Table,
+        flush_interval: float,
+        batch_size: int,
+        max_pending: int,
+        max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+    ):
+        self.name = name
+        self.table = table
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_retries = max(1, max_retries)
+        # 맨 앞 배치의 연속 실패 횟수
+        self._head_failures = 0
+
+        self._rows: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.flushed = 0
+        self.commits = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def add(self, rows: Iterable[dict]):
+        self._rows.extend(rows)
+        overflow = len(self._rows) - self.max_pending
+        if overflow > 0:
+            for _ in range(overflow):
+                self._rows.popleft()
+            self.dropped += overflow
+            print(f"[경고] {self.name} 대기 행이 {self.max_pending}건을 넘어 오래된 {overflow}건을 버렸습니다.")
+        if len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    async def start(self):
+        # 이벤트 루프마다 새로 만듦 (테스트 등에서 루프가 바뀌는 경우 대비)
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def _run(self):
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        await self.flush()
+
+    async def _insert(self, rows: List[dict]):
+        async with SessionLocal() as db:
+            await db.execute(insert(self.table), rows)
+            await db.commit()
+
+    async def _isolate(self, batch: List[dict]) -> Tuple[int, List[dict]]:
+        """
+        재시도 한도를 넘은 배치를 반씩 나눠 반영하며 실패하는 행만 버립니다.
+        (반영한 행 수, 행과 무관한 오류로 중단해 되돌릴 행)을 반환합니다.
+        """
+        written = 0
+        pending = deque([batch])
+        while pending:
+            rows = pending.popleft()
+            try:
+                await self._insert(rows)
+            except Exception as e:
+                if len(rows) > 1:
+                    half = len(rows) // 2
+                    pending.appendleft(rows[half:])
+                    pending.appendleft(rows[:half])
+                    continue
+                if not _is_row_error(e):
+                    return written, rows + [row for chunk in pending for row in chunk]
+                self.rejected += 1
+                print(f"[오류] {self.name} 행 1건을 반영하지 못해 버렸습니다: {e} / {rows[0]}")
+                continue
+            self.flushed += len(rows)
+            self.commits += 1
+            written += len(rows)
+        return written, []
+
+    async def flush(self) -> int:
+        """대기 중인 행을 batch_size 단위로 반영합니다. 반영한 행 수를 반환합니다."""
+        written = 0
+        async with self._lock:
+            while self._rows:
+                batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                try:
+                    await self._insert(batch)
+                except Exception as e:
+                    self.failures += 1
+                    self._head_failures += 1
+                    if self._head_failures < self.max_retries:
+                        # 실패한 배치는 순서를 유지한 채 앞에 되돌려 두고 다음 주기에 재시도
+                        self._rows.extendleft(reversed(batch))
+                        print(f"[오류] {self.name} {len(batch)}건 반영 실패 ({self._head_failures}/{self.max_retries}): {e}")
+                        break
+
+                    # 계속 실패하는 배치는 문제 행을 골라내고 나머지를 반영
+                    print(f"[경고] {self.name} {len(batch)}건이 {self._head_failures}회 연속 실패해 나눠서 반영합니다: {e}")
+                    self._head_failures = 0
+                    done, remaining = await self._isolate(batch)
+                    written += done
+                    if remaining:
+                        self._rows.extendleft(reversed(remaining))
+                        break
+                    continue
+                self._head_failures = 0
+                self.flushed += len(batch)
+                self.commits += 1
+                written += len(batch)
+        return written
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._rows),
+            "flushed": self.flushed,
+            "commits": self.commits,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "max_retries": self.max_retries,
+            "flush_interval": self.flush_interval,
+            "batch_size": self.batch_size,
+        }
@@ -0,0 +1,119 @@
+# /Backend/stub_weather_api.py
+# 오프라인 테스트용 WeatherAPI 대역 서버
+# current.json / forecast.json을 WeatherAPI와 같은 형태로, 좌표와 시각에 따라 결정적인 값으로 응답합니다.
+# (날씨 미리 조회 스케줄러, 캐시, 재시도 동작을 실제 API 키/쿼터 없이 확인할 때 사용)
+#
+# 실행:
+#   uvicorn stub_weather_api:app --port 8081
+#   WEATHER_API_BASE_URL=http://127.0.0.1:8081/v1 uvicorn main:app --reload
+#
+# 환경변수:
+#   STUB_WEATHER_LATENCY_MS   응답 지연(ms, 기본 50)
+#   STUB_WEATHER_FAIL_RATE    503으로 실패시킬 비율(0~1, 기본 0)
+
+import asyncio
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from fastapi import FastAPI, HTTPException, Query
+import pytz
+
+STUB_WEATHER_LATENCY_MS = float(os.getenv("STUB_WEATHER_LATENCY_MS", "50"))
+STUB_WEATHER_FAIL_RATE = float(os.getenv("STUB_WEATHER_FAIL_RATE", "0"))
+
+KST = pytz.timezone("Asia/Seoul")
+CONDITIONS = [(1000, "Sunny"), (1003, "Partly cloudy"), (1063, "Patchy rain possible"), (1189, "Moderate rain")]
+
+app = FastAPI(title="Stub WeatherAPI")
+app.state.calls = 0
+
+
+def _parse_q(q: str):
+    try:
+        lat, lon = (float(v) for v in q.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail={"error": {"code": 1006, "message": "No matching location found."}})
+    return lat, lon
+
+
+def _weather(lat: float, lon: float, epoch: int) -> dict:
+    """좌표/시각에 따라 천천히 변하는 값 (같은 입력이면 항상 같은 값)"""
+    phase = epoch / 3600 / 6 + lat * 3 + lon * 2
+    wind = 18 + 16 * math.sin(phase)
+    code, text = CONDITIONS[int(abs(math.sin(phase / 2)) * len(CONDITIONS)) % len(CONDITIONS)]
+    return {
+        "temp_c": round(17 + 6 * math.sin(epoch / 86400 * 2 * math.pi + lon), 1),
+        "wind_kph": round(wind, 1),
+        "wind_degree": int((phase * 57) % 360),
+        "gust_kph": round(wind * 1.4, 1),
+        "precip_mm": round(max(0.0, 3 * math.sin(phase / 3)), 1),
+        "vis_km": round(10 - max(0.0, 8 * math.sin(phase / 4)), 1),
+        "humidity": int(60 + 30 * math.sin(phase / 5)),
+        "pressure_mb": round(1013 + 8 * math.cos(phase / 7), 1),
+        "chance_of_rain": int(max(0.0, 100 * math.sin(phase / 3))),
+        "condition": {"text": text, "code": code},
+    }
+
+
+def _location(lat: float, lon: float, now: int) -> dict:
+    return {
+        "name": f"stub {lat:.2f},{lon:.2f}",
+        "lat": lat,
+        "lon": lon,
+        "tz_id": "Asia/Seoul",
+        "localtime_epoch": now,
+        "localtime": datetime.fromtimestamp(now, KST).strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+async def _simulate():
+    app.state.calls += 1
+    if STUB_WEATHER_LATENCY_MS > 0:
+        await asyncio.sleep(STUB_WEATHER_LATENCY_MS / 1000)
+    if random.random() < STUB_WEATHER_FAIL_RATE:
+        raise HTTPException(status_code=503, detail="stub failure")
+
+
+@app.get("/v1/current.json")
+async def current(q: str = Query(...), key: str = Query(None), aqi: str = "no"):
+    await _simulate()
+    lat, lon = _parse_q(q)
+    now = int(time.time())
+    updated = now // 900 * 900
+    current = _weather(lat, lon, updated)
+    current.update({
+        "last_updated_epoch": updated,
+        "last_updated": datetime.fromtimestamp(updated, KST).strftime("%Y-%m-%d %H:%M"),
+    })
+    return {"location": _location(lat, lon, now), "current": current}
+
+
+@app.get("/v1/forecast.json")
+async def forecast(q: str = Query(...), key: str = Query(None), days: int = 1, aqi: str = "no"):
+    await _simulate()
+    lat, lon = _parse_q(q)
+    now = int(time.time())
+    today = datetime.fromtimestamp(now, KST).replace(hour=0, minute=0, second=0, microsecond=0)
+    forecastday = []
+    for d in range(max(1, min(days, 14))):
+        day = today + timedelta(days=d)
+        hours = []
+        for h in range(24):
+            local = KST.normalize(day + timedelta(hours=h))
+            epoch = int(local.timestamp())
+            hour = _weather(lat, lon, epoch)
+            hour.update({"time_epoch": epoch, "time": local.strftime("%Y-%m-%d %H:%M")})
+            hours.append(hour)
+        forecastday.append({"date": day.strftime("%Y-%m-%d"), "date_epoch": int(day.timestamp()), "hour": hours})
+    return {
+        "location": _location(lat, lon, now),
+        "current": _weather(lat, lon, now // 900 * 900),
+        "forecast": {"forecastday": forecastday},
+    }
+
+
+@app.get("/stats")
+async def stats():
+    return {"calls": app.state.calls}